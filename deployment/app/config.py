@@ -11,7 +11,7 @@ import tempfile  # Added for test environment fallback
 from collections.abc import Callable  # Modified
 from functools import lru_cache
 from pathlib import Path  # Added
-from typing import Any
+from typing import Any, Literal
 
 import numpy as np
 import pandas as pd
@@ -267,6 +267,33 @@ class DatabaseSettings(BaseSettings):
     database_busy_timeout: int = Field(
         default=5000, description="SQLite busy timeout in milliseconds"
     )
+    journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST"] = Field(
+        default="WAL", description="SQLite journal mode"
+    )
+    synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = Field(
+        default="NORMAL", description="SQLite synchronous level"
+    )
+    cache_size_kib: int = Field(
+        default=65536, description="SQLite page cache size per connection in KiB"
+    )
+    mmap_size_bytes: int = Field(
+        default=268435456, description="SQLite memory-mapped I/O size in bytes"
+    )
+    pool_max_idle: int = Field(
+        default=8, description="Idle connections kept for reuse per database file"
+    )
+    pool_max_lifetime_seconds: float = Field(
+        default=3600.0,
+        description="Pooled connections older than this are closed instead of reused",
+    )
+    pool_health_check_interval_seconds: float = Field(
+        default=30.0,
+        description="Pooled connections idle for longer than this are checked before reuse",
+    )
+    multiindex_cache_size: int = Field(
+        default=100000,
+        description="Multi-index attribute tuples whose IDs are cached per process",
+    )
 
     # Database directory creation is handled in AppSettings computed properties
 
@@ -479,6 +506,10 @@ class DataRetentionSettings(BaseSettings):
         default=30,  # 30 days
         description="Retention period for database backup files in days",
     )
+    processed_files_cache_retention_days: int = Field(
+        default=60,  # ~2 months
+        description="Days since last use after which cached processed upload files and monthly artifacts are removed",
+    )
 
     # Execution settings
     cleanup_enabled: bool = Field(
@@ -607,6 +638,23 @@ class AppSettings(BaseSettings):
         description="Optional per-job-type overrides for refractory period (e.g., {'training': 600})",
     )
 
+    data_processing_max_workers: int | None = Field(
+        default=1,
+        description="Worker processes for parsing uploaded sales files and grouping their months (1 disables the pool, None uses all CPUs; each worker holds its own copy of the parsed data)",
+    )
+    data_processing_csv_memory_limit_mb: float | None = Field(
+        default=None,
+        description="Stream uploaded CSV files in chunks of about this many MB per file (None reads each file at once)",
+    )
+    data_processing_excel_engine: str | None = Field(
+        default=None,
+        description="Excel engine tried before the default pandas engine, e.g. 'calamine' (needs python-calamine, cell types may differ; None uses the default engine only)",
+    )
+    data_processing_profiling: bool = Field(
+        default=False,
+        description="Write a per-step timing and memory profile of each data processing job to the logs directory",
+    )
+
     price_category_bins: list[float] = Field(
         default=[
             0.0,
@@ -635,6 +683,13 @@ class AppSettings(BaseSettings):
         ensure_directory_exists(path)
         return path
 
+    @property
+    def processed_files_cache_dir(self) -> str:
+        """Directory for processed upload files and monthly pipeline artifacts cached by content hash."""
+        path = os.path.join(self.data_root_dir, "cache", "processed_files")
+        ensure_directory_exists(path)
+        return path
+
     @property
     def file_storage_dir(self) -> str:
         """Base directory for storing uploaded files (models, reports, etc.)."""
@@ -1,5 +1,6 @@
 import logging
-import shutil
+import sqlite3
+from contextlib import closing
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -27,8 +28,12 @@ def create_database_backup() -> Path | None:
     backup_path = backup_dir / backup_filename
 
     try:
-        # Copy the database file
-        shutil.copy2(db_path, backup_path)
+        # Use the SQLite backup API: with WAL journaling, recent commits may
+        # still be in the -wal file rather than in the database file itself.
+        with closing(sqlite3.connect(db_path)) as source, closing(
+            sqlite3.connect(backup_path)
+        ) as target:
+            source.backup(target)
         logger.info(f"Database backup created successfully: {backup_path}")
         return backup_path
     except Exception as e:
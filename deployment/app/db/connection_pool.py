@@ -0,0 +1,228 @@
+"""
+Reusable SQLite connections.
+
+Opening a connection, applying the pragmas and running the idempotent schema
+script cost more than most queries the API runs, so connections are kept in
+a per-database-file pool and handed out again once released. Connections
+are created by `get_db_connection`, which applies the configured pragmas
+(WAL journaling, busy timeout, cache and mmap sizes).
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from deployment.app.config import get_settings
+from deployment.app.db.database import dict_factory, get_db_connection
+from deployment.app.db.schema import init_db
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    """Bookkeeping for a connection owned by the pool."""
+
+    __slots__ = ("connection", "created_at", "released_at", "file_id")
+
+    def __init__(self, connection: sqlite3.Connection, file_id: tuple[int, int] | None):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.released_at = self.created_at
+        self.file_id = file_id
+
+
+def _file_id(db_path: str) -> tuple[int, int] | None:
+    """Identity of the database file, to notice it being replaced or removed."""
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class SQLiteConnectionPool:
+    """
+    Pool of configured connections to one SQLite database file.
+
+    `acquire` never blocks: when no idle connection is available a new one is
+    opened. `release` keeps up to `max_idle` connections for reuse and closes
+    the rest. A connection is closed instead of reused once it is older than
+    `max_lifetime`, when the database file was replaced, or when it fails the
+    `SELECT 1` health check run on connections idle for longer than
+    `health_check_interval`.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_idle: int = 8,
+        max_lifetime: float = 3600.0,
+        health_check_interval: float = 30.0,
+    ):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self._idle: deque[_PooledConnection] = deque()
+        self._in_use: dict[int, _PooledConnection] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        """Returns a healthy connection, reusing an idle one when possible."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                pooled = self._connect()
+                break
+            if self._is_reusable(pooled, check_health=True):
+                break
+            self._close(pooled)
+
+        with self._lock:
+            self._in_use[id(pooled.connection)] = pooled
+        return pooled.connection
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        """Returns a connection to the pool, closing it if it cannot be reused."""
+        with self._lock:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            logger.warning(f"Releasing a connection not acquired from the pool for {self.db_path}")
+            connection.close()
+            return
+
+        try:
+            if connection.in_transaction:
+                logger.warning("Rolling back a transaction left open on a released connection")
+                connection.rollback()
+            connection.row_factory = dict_factory
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding connection that failed to reset: {e}")
+            self._close(pooled)
+            return
+
+        pooled.released_at = time.monotonic()
+        with self._lock:
+            keep = (
+                not self._closed
+                and len(self._idle) < self.max_idle
+                and self._is_reusable(pooled, check_health=False)
+            )
+            if keep:
+                self._idle.append(pooled)
+        if not keep:
+            self._close(pooled)
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager over `acquire`/`release` that commits on success and
+        rolls back on error.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Closes idle connections; connections in use are closed on release."""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            self._close(pooled)
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    @property
+    def in_use_count(self) -> int:
+        return len(self._in_use)
+
+    def _connect(self) -> _PooledConnection:
+        connection = get_db_connection(self.db_path)
+        init_db(connection=connection)
+        return _PooledConnection(connection, _file_id(self.db_path))
+
+    def _is_reusable(self, pooled: _PooledConnection, check_health: bool) -> bool:
+        now = time.monotonic()
+        if now - pooled.created_at > self.max_lifetime:
+            return False
+        if pooled.file_id != _file_id(self.db_path):
+            return False
+        if check_health and now - pooled.released_at > self.health_check_interval:
+            try:
+                pooled.connection.execute("SELECT 1").fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Discarding connection that failed the health check: {e}")
+                return False
+        return True
+
+    def _close(self, pooled: _PooledConnection) -> None:
+        try:
+            pooled.connection.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing pooled connection: {e}")
+
+
+_pools: dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str | Path | None = None) -> SQLiteConnectionPool:
+    """
+    Returns the pool for a database file, creating it on first use.
+
+    Pools of database files that no longer exist are closed when a new pool
+    is created.
+
+    Args:
+        db_path: Database file; defaults to `settings.database_path`.
+    """
+    settings = get_settings()
+    resolved_path = str(Path(db_path or settings.database_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(resolved_path)
+        if pool is None:
+            for stale_path in [p for p in _pools if _file_id(p) is None]:
+                _pools.pop(stale_path).close()
+            pool = SQLiteConnectionPool(
+                resolved_path,
+                max_idle=settings.db.pool_max_idle,
+                max_lifetime=settings.db.pool_max_lifetime_seconds,
+                health_check_interval=settings.db.pool_health_check_interval_seconds,
+            )
+            _pools[resolved_path] = pool
+        return pool
+
+
+@contextmanager
+def pooled_connection(db_path: str | Path | None = None):
+    """Shortcut for `get_connection_pool(db_path).connection()`."""
+    with get_connection_pool(db_path).connection() as conn:
+        yield conn
+
+
+def close_connection_pools() -> None:
+    """Closes all pools, e.g. on application shutdown."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -1,9 +1,12 @@
 import sqlite3
+import weakref
+from collections.abc import Iterator
 from contextlib import contextmanager
 from datetime import date, datetime
 from typing import Any
 from functools import wraps
 
+import numpy as np
 import pandas as pd
 
 # Import all necessary functions from the database module
@@ -24,8 +27,10 @@ from deployment.app.db.database import (
     delete_model_record_and_file,
     delete_models_by_ids,
     dict_factory,
+    discard_multiindex_ids,
     execute_many_with_batching,
     execute_query,
+    execute_query_columns,
     execute_query_with_batching,
     get_active_config,
     get_active_model,
@@ -37,6 +42,7 @@ from deployment.app.db.database import (
     get_data_upload_result,
     get_db_connection,
     get_effective_config,
+    get_feature_arrays,
     get_feature_dataframe,
     get_features_by_date_range,
     get_job,
@@ -55,7 +61,9 @@ from deployment.app.db.database import (
     get_training_results,
     get_tuning_results,
     insert_predictions,
+    iter_query_columns,
     list_jobs,
+    publish_multiindex_ids,
     try_acquire_job_submission_lock,
     set_config_active,
     set_model_active,
@@ -64,6 +72,7 @@ from deployment.app.db.database import (
     delete_features_by_table,
     insert_features_batch,
 )
+from deployment.app.db.connection_pool import get_connection_pool
 from deployment.app.db.schema import init_db
 
 # Define roles/permissions
@@ -112,25 +121,34 @@ class DataAccessLayer:
         self._owns_connection = False
         self._in_transaction = False  # Track if we're inside a transaction
 
+        self._release_connection = None
+
         if connection:
             self._connection = connection
             self._owns_connection = False  # DAL does not own externally provided connection
-        elif db_path:
+        elif db_path == ":memory:":
             self._connection = get_db_connection(db_path)
             self._owns_connection = True
             init_db(connection=self._connection)  # init_db now handles commit
         else:
-            # Default to in-memory if no path or connection is provided
-            self._connection = get_db_connection()
+            # Pooled connection to db_path, or to settings.database_path by default.
+            # It goes back to the pool on close(), or once the DAL is garbage
+            # collected, since request-scoped DALs are handed to background tasks.
+            pool = get_connection_pool(db_path)
+            self._connection = pool.acquire()
             self._owns_connection = True
-            init_db(connection=self._connection)  # init_db now handles commit
+            self._release_connection = weakref.finalize(self, pool.release, self._connection)
+            self._release_connection.atexit = False
 
         self._connection.row_factory = dict_factory
 
     def close(self):
-        """Closes the database connection if this DAL instance owns it."""
+        """Closes the database connection, or returns it to the pool, if this DAL instance owns it."""
         if self._owns_connection and self._connection:
-            self._connection.close()
+            if self._release_connection is not None:
+                self._release_connection()
+            else:
+                self._connection.close()
             self._connection = None
 
     @property
@@ -142,6 +160,7 @@ class DataAccessLayer:
         """Commit current transaction on the managed connection (no-op if none)."""
         if self._connection:
             self._connection.commit()
+            publish_multiindex_ids(self._connection)
 
     @contextmanager
     def transaction(self):
@@ -162,9 +181,13 @@ class DataAccessLayer:
         except Exception as e:
             if not was_in_transaction:  # Only rollback if we started the transaction
                 self._connection.rollback()
+                discard_multiindex_ids(self._connection)
             raise DatabaseError(f"Transaction failed: {str(e)}") from e
         finally:
             self._in_transaction = was_in_transaction
+        if not was_in_transaction:
+            # IDs created in the transaction are cached only now it committed
+            publish_multiindex_ids(self._connection)
 
     def _authorize(self, required_roles: list[str]):
         """Helper to check if the current user has the required roles."""
@@ -309,7 +332,7 @@ class DataAccessLayer:
         prediction_month_str = prediction_month.isoformat() if prediction_month else None
         return get_prediction_results_by_month(prediction_month_str, model_id, self._connection)
 
-    def get_predictions(self, job_ids: list[str], model_id: str | None = None, prediction_month: date | None = None) -> list[dict]:
+    def get_predictions(self, job_ids: list[str] | None = None, model_id: str | None = None, prediction_month: date | None = None) -> pd.DataFrame:
         self._authorize([UserRoles.ADMIN, UserRoles.USER, UserRoles.SYSTEM])
         return get_predictions(job_ids, model_id, prediction_month, self._connection)
 
@@ -386,6 +409,28 @@ class DataAccessLayer:
         self._authorize([UserRoles.ADMIN, UserRoles.USER, UserRoles.SYSTEM])
         return execute_query(query, connection=self._connection, params=params, fetchall=fetchall)
 
+    def execute_query_columns(
+        self,
+        query: str,
+        params: tuple = (),
+        dtypes: dict[str, Any] | None = None,
+        chunk_size: int | None = None,
+    ) -> pd.DataFrame:
+        """Execute a SELECT and return the rows as a DataFrame of typed columns."""
+        self._authorize([UserRoles.ADMIN, UserRoles.USER, UserRoles.SYSTEM])
+        return execute_query_columns(query, self._connection, params, dtypes, chunk_size)
+
+    def iter_query_columns(
+        self,
+        query: str,
+        params: tuple = (),
+        dtypes: dict[str, Any] | None = None,
+        chunk_size: int = 100000,
+    ) -> Iterator[pd.DataFrame]:
+        """Execute a SELECT and yield the rows as DataFrames of up to `chunk_size` rows."""
+        self._authorize([UserRoles.ADMIN, UserRoles.USER, UserRoles.SYSTEM])
+        return iter_query_columns(query, self._connection, params, dtypes, chunk_size)
+
     def auto_activate_best_config_if_enabled(self) -> bool:
         self._authorize([UserRoles.ADMIN, UserRoles.USER, UserRoles.SYSTEM])
         return auto_activate_best_config_if_enabled(self._connection)
@@ -416,13 +461,23 @@ class DataAccessLayer:
         self._authorize([UserRoles.ADMIN, UserRoles.USER, UserRoles.SYSTEM])
         return get_feature_dataframe(table_name, columns, self._connection, start_date, end_date)
 
+    def get_feature_arrays(
+        self,
+        table_name: str,
+        columns: list[str],
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> dict[str, np.ndarray]:
+        self._authorize([UserRoles.ADMIN, UserRoles.USER, UserRoles.SYSTEM])
+        return get_feature_arrays(table_name, columns, self._connection, start_date, end_date)
+
     def get_report_features(
         self,
         multiidx_ids: list[int] | None = None,
         start_date: date | None = None,
         end_date: date | None = None,
         feature_subset: list[str] | None = None,
-    ) -> list[dict]:
+    ) -> pd.DataFrame:
         self._authorize([UserRoles.ADMIN, UserRoles.USER, UserRoles.SYSTEM])
         return get_report_features(
             multiidx_ids=multiidx_ids,
@@ -7,6 +7,7 @@ including cleanup of historical predictions and management of model files.
 
 import logging
 from datetime import datetime, timedelta
+from pathlib import Path
 
 from ..config import get_settings
 from .data_access_layer import (  # Import DataAccessLayer
@@ -270,8 +271,50 @@ def cleanup_old_models(
         return []
 
 
+def cleanup_processed_files_cache(
+    days_to_keep: int | None = None, cache_dir: str | None = None
+) -> int:
+    """
+    Remove cached processed upload files and monthly pipeline artifacts
+    not used within the retention period.
+
+    Cache hits refresh an entry's modification time, so the age is measured
+    from the last upload that used it.
+
+    Args:
+        days_to_keep: Number of days to keep unused entries.
+                      If None, uses the value from settings.
+        cache_dir: Cache directory. If None, uses the value from settings.
+
+    Returns:
+        Number of removed cache entries
+    """
+    settings = get_settings()
+    if days_to_keep is None:
+        days_to_keep = settings.data_retention.processed_files_cache_retention_days
+    if cache_dir is None:
+        cache_dir = settings.processed_files_cache_dir
+
+    cutoff_ts = (datetime.now() - timedelta(days=days_to_keep)).timestamp()
+    removed = 0
+    entries = [
+        *Path(cache_dir).glob("*.parquet"),
+        *Path(cache_dir).glob("month_*.pkl"),
+    ]
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff_ts:
+                entry.unlink()
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove cache entry {entry}: {e}")
+
+    logger.info(f"Removed {removed} processed file cache entries older than {days_to_keep} days")
+    return removed
+
+
 def run_cleanup_job(dal: DataAccessLayer = None) -> None:
-    """Runs all cleanup routines: predictions, models, and historical data."""
+    """Runs all cleanup routines: predictions, models, historical data and caches."""
     if dal is None:
         dal = DataAccessLayer(user_context=UserContext(roles=[UserRoles.SYSTEM]))
     try:
@@ -292,3 +335,8 @@ def run_cleanup_job(dal: DataAccessLayer = None) -> None:
     except Exception as e:
         import logging
         logging.getLogger(__name__).error(f"Error in historical data cleanup: {e}")
+    try:
+        deleted_cache_entries = cleanup_processed_files_cache()
+        print(f"Deleted {deleted_cache_entries} processed file cache entries.")
+    except Exception as e:
+        logger.error(f"Error in processed files cache cleanup: {e}")
@@ -3,14 +3,19 @@ import json
 import logging
 import os
 import sqlite3
+import threading
 import uuid
+from collections import OrderedDict
+from collections.abc import Iterator
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import pandas as pd
 from pydantic import ValidationError
 from deployment.app.config import get_settings
+from deployment.app.db.schema import MULTIINDEX_NAMES, multiindex_key_hash
 from deployment.app.models.api_models import TrainingConfig
 from deployment.app.utils.retry import retry_with_backoff
 
@@ -19,6 +24,9 @@ logger = logging.getLogger("plastinka.database")
 # SQLite default limit is 999, use 900 for safety
 SQLITE_MAX_VARIABLES = 900
 
+# Rows per executemany call when saving predictions
+PREDICTIONS_INSERT_BATCH_SIZE = 5000
+
 
 def json_default_serializer(obj):
     """
@@ -128,7 +136,7 @@ def get_db_connection(
 
         current_db_path.parent.mkdir(parents=True, exist_ok=True)
         conn = sqlite3.connect(str(current_db_path), check_same_thread=False)
-        conn.execute("PRAGMA foreign_keys = ON;")
+        _configure_connection(conn)
         conn.row_factory = dict_factory
         return conn
     except Exception as e:
@@ -141,6 +149,19 @@ def get_db_connection(
 
 
 
+def _configure_connection(conn: sqlite3.Connection) -> None:
+    """Applies the pragmas from `settings.db` to a new connection."""
+    db_settings = get_settings().db
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {int(db_settings.database_busy_timeout)};")
+    conn.execute(f"PRAGMA journal_mode = {db_settings.journal_mode};")
+    conn.execute(f"PRAGMA synchronous = {db_settings.synchronous};")
+    # A negative cache_size is in KiB rather than pages
+    conn.execute(f"PRAGMA cache_size = -{int(db_settings.cache_size_kib)};")
+    conn.execute(f"PRAGMA mmap_size = {int(db_settings.mmap_size_bytes)};")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+
+
 def dict_factory(cursor, row):
     """Convert row to dictionary"""
     return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
@@ -271,6 +292,132 @@ def execute_many(
             cursor.close()
 
 
+def _frame_from_rows(
+    rows: list[tuple],
+    columns: list[str],
+    dtypes: dict[str, Any] | None = None,
+) -> pd.DataFrame:
+    """
+    Builds a DataFrame from plain row tuples.
+
+    Columns listed in `dtypes` are cast to the given dtype, the others are
+    inferred (integers, floats or objects; NULLs in numeric columns become NaN).
+    """
+    values = np.array(rows, dtype=object).reshape(len(rows), len(columns))
+    frame = pd.DataFrame(values, columns=columns, copy=False)
+    if dtypes:
+        frame = frame.astype({name: dtype for name, dtype in dtypes.items() if name in frame.columns})
+    return frame.infer_objects()
+
+
+def _iter_row_chunks(
+    query: str,
+    connection: sqlite3.Connection,
+    params: tuple = (),
+    chunk_size: int | None = None,
+) -> Iterator[tuple[list[str], list[tuple]]]:
+    """
+    Yields `(columns, rows)` with rows as plain tuples, `chunk_size` rows at a
+    time (all at once if None). The first chunk is always yielded, even if
+    empty, so callers get the column names.
+    """
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        if not chunk_size:
+            yield columns, cursor.fetchall()
+            return
+        rows = cursor.fetchmany(chunk_size)
+        yield columns, rows
+        while rows := cursor.fetchmany(chunk_size):
+            yield columns, rows
+    except sqlite3.Error as e:
+        logger.error(f"Database error in columnar query: {query[:100]}: {str(e)}", exc_info=True)
+        raise DatabaseError(
+            message=f"Database operation failed: {str(e)}",
+            query=query,
+            params=params,
+            original_error=e,
+        ) from e
+    finally:
+        if cursor:
+            cursor.close()
+
+
+def iter_query_columns(
+    query: str,
+    connection: sqlite3.Connection,
+    params: tuple = (),
+    dtypes: dict[str, Any] | None = None,
+    chunk_size: int = 100000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Execute a SELECT and yield the result as DataFrames of up to `chunk_size` rows.
+
+    Rows are fetched as plain tuples and turned into typed columns per chunk,
+    without building a dictionary per row like `execute_query` does. Like
+    `execute_query`, this never commits, rolls back or closes the connection.
+
+    Args:
+        query: SQL query with placeholders (?, :name)
+        connection: The database connection to use
+        params: Parameters for the query
+        dtypes: Optional dtypes by column name; other columns are inferred per
+                chunk, so pass dtypes for columns that may be all NULL in a chunk
+        chunk_size: Maximum number of rows per yielded DataFrame
+
+    Yields:
+        DataFrames with the query's columns; nothing if there are no rows
+
+    Raises:
+        DatabaseError: If database operation fails
+    """
+    for columns, rows in _iter_row_chunks(query, connection, params, chunk_size):
+        if rows:
+            yield _frame_from_rows(rows, columns, dtypes)
+
+
+@retry_with_backoff(max_tries=3, base_delay=1.0, max_delay=10.0, component="database_query")
+def execute_query_columns(
+    query: str,
+    connection: sqlite3.Connection,
+    params: tuple = (),
+    dtypes: dict[str, Any] | None = None,
+    chunk_size: int | None = None,
+) -> pd.DataFrame:
+    """
+    Execute a SELECT and return the result as a DataFrame.
+
+    Columnar counterpart of `execute_query(..., fetchall=True)` for large
+    reads: rows are fetched as plain tuples and turned into typed columns
+    directly instead of going through a dictionary per row.
+
+    Args:
+        query: SQL query with placeholders (?, :name)
+        connection: The database connection to use. This function will NOT commit or rollback.
+        params: Parameters for the query
+        dtypes: Optional dtypes by column name (numpy or pandas dtypes, e.g.
+                "int64", "float64" or "Int64" for nullable integers); other
+                columns are inferred
+        chunk_size: Fetch at most this many rows at a time to bound the
+                    intermediate tuples; by default all rows are fetched at once
+
+    Returns:
+        DataFrame with the query's columns, empty (with the columns) if no rows match
+
+    Raises:
+        DatabaseError: If database operation fails
+    """
+    frames = [
+        _frame_from_rows(rows, columns, dtypes)
+        for columns, rows in _iter_row_chunks(query, connection, params, chunk_size)
+    ]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
 # Job-related database functions
 
 
@@ -1017,23 +1164,22 @@ def get_best_model_by_metric(
     def _get_best_model_by_metric_operation(conn_to_use: sqlite3.Connection) -> dict[str, Any] | None:
         order_direction = "DESC" if higher_is_better else "ASC"
 
-        json_path = f"'$.{metric_name}'"
-
         query = f"""
             SELECT
                 m.model_id,
                 m.model_path,
                 m.metadata,
                 tr.metrics,
-                JSON_EXTRACT(tr.metrics, {json_path}) as metric_value
-            FROM training_results tr
+                rm.value as metric_value
+            FROM result_metrics rm
+            JOIN training_results tr ON tr.result_id = rm.result_id
             JOIN models m ON tr.model_id = m.model_id
-            WHERE tr.model_id IS NOT NULL AND JSON_VALID(tr.metrics) = 1 AND JSON_EXTRACT(tr.metrics, {json_path}) IS NOT NULL
-            ORDER BY metric_value {order_direction}
+            WHERE rm.result_type = 'training' AND rm.metric_name = ?
+            ORDER BY rm.value {order_direction}
             LIMIT 1
         """
 
-        result = execute_query(query=query, connection=conn_to_use)
+        result = execute_query(query=query, connection=conn_to_use, params=(metric_name,))
 
         if result:
             if result.get("metadata"):
@@ -1278,47 +1424,55 @@ def insert_predictions(
     df: pd.DataFrame,
     connection: sqlite3.Connection = None,
 ):
+    """
+    Saves the quantile predictions of one result.
+
+    Multi-index IDs for all rows are resolved with one
+    `get_or_create_multiindex_ids_batch` call, and the rows are written
+    with batched `executemany` calls on the caller's connection, so the
+    whole save runs in the caller's transaction.
+    """
     def _insert_predictions_operation(conn_to_use: sqlite3.Connection):
         timestamp = datetime.now().isoformat()
-        predictions_data = []
-
-        for _, row in df.iterrows():
-            multiindex_id = get_or_create_multiindex_id(
-                barcode=row["barcode"],
-                artist=row["artist"],
-                album=row["album"],
-                cover_type=row["cover_type"],
-                price_category=row["price_category"],
-                release_type=row["release_type"],
-                recording_decade=row["recording_decade"],
-                release_decade=row["release_decade"],
-                style=row["style"],
-                recording_year=int(row["recording_year"]),
-                connection=conn_to_use,
+
+        # Same normalization as the feature store: attribute values as
+        # strings, with recording_year as an integer string
+        index_elems = df[MULTIINDEX_NAMES].astype(str)
+        index_elems["recording_year"] = (
+            df["recording_year"].astype(int).astype(str)
+        )
+        keys = list(index_elems.itertuples(index=False, name=None))
+        id_map = get_or_create_multiindex_ids_batch(
+            list(dict.fromkeys(keys)), conn_to_use
+        )
+        missing = [key for key in keys if key not in id_map]
+        if missing:
+            raise DatabaseError(
+                f"Could not resolve multiindex IDs for {len(missing)} predictions, e.g. {missing[0]}"
             )
 
-            prediction_row = (
-                result_id,
-                multiindex_id,
-                prediction_month,
-                model_id,
-                row["0.05"],
-                row["0.25"],
-                row["0.5"],
-                row["0.75"],
-                row["0.95"],
-                timestamp,
+        n_rows = len(df)
+        predictions_data = list(
+            zip(
+                [result_id] * n_rows,
+                [id_map[key] for key in keys],
+                [prediction_month] * n_rows,
+                [model_id] * n_rows,
+                *(df[q].astype(float).tolist() for q in ["0.05", "0.25", "0.5", "0.75", "0.95"]),
+                [timestamp] * n_rows,
+                strict=True,
             )
-            predictions_data.append(prediction_row)
+        )
 
-        execute_many(
+        execute_many_with_batching(
             """
             INSERT OR REPLACE INTO fact_predictions
             (result_id, multiindex_id, prediction_month, model_id, quantile_05, quantile_25, quantile_50, quantile_75, quantile_95, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             predictions_data,
-            conn_to_use,
+            batch_size=PREDICTIONS_INSERT_BATCH_SIZE,
+            connection=conn_to_use,
         )
 
         return {"result_id": result_id, "predictions_count": len(df)}
@@ -1577,37 +1731,52 @@ def get_prediction_results_by_month(
     return execute_query(query, connection=connection, params=tuple(params), fetchall=True)
 
 
+# Column dtypes of prediction reads, see `get_predictions`
+PREDICTION_COLUMN_DTYPES = {
+    "multiindex_id": "int64",
+    "quantile_05": "float64",
+    "quantile_25": "float64",
+    "quantile_50": "float64",
+    "quantile_75": "float64",
+    "quantile_95": "float64",
+}
+
+
 def get_predictions(
-    job_ids: list[str], 
-    model_id: str | None = None, 
+    job_ids: list[str] | None = None,
+    model_id: str | None = None,
     prediction_month: date | None = None,
     connection: sqlite3.Connection = None
-) -> list[dict]:
+) -> pd.DataFrame:
     """
-    Extract prediction data for the given training jobs.
+    Extract prediction data, optionally for the given prediction jobs.
 
     Args:
-        job_ids: List of training job IDs
+        job_ids: Optional list of prediction job IDs; all jobs if None
         model_id: Optional model_id for filtering
         prediction_month: Optional prediction month for filtering
         connection: Optional existing database connection
 
     Returns:
-        List of dictionaries with prediction data
+        DataFrame with one row per prediction, with product attributes and
+        the quantiles as float columns. Empty if nothing matches.
     """
-    if not job_ids:
-        return []
-
-    job_ids_placeholder = ",".join(["?" for _ in job_ids])
+    if job_ids is not None and not job_ids:
+        return pd.DataFrame()
 
     # Get prediction results for these jobs
-    base_query = f"""
+    base_query = """
         SELECT DISTINCT pr.result_id, pr.job_id, pr.model_id
         FROM prediction_results pr
-        WHERE pr.job_id IN ({job_ids_placeholder})
+        WHERE 1 = 1
     """
 
-    params_list: list[Any] = job_ids.copy()
+    params_list: list[Any] = []
+
+    if job_ids:
+        job_ids_placeholder = ",".join(["?" for _ in job_ids])
+        base_query += f" AND pr.job_id IN ({job_ids_placeholder})"
+        params_list.extend(job_ids)
 
     if model_id:
         base_query += " AND pr.model_id = ?"
@@ -1622,8 +1791,8 @@ def get_predictions(
     )
 
     if not prediction_results:
-        logger.warning("No prediction results found for training jobs")
-        return []
+        logger.warning("No prediction results found for prediction jobs")
+        return pd.DataFrame()
 
     result_ids = [pr["result_id"] for pr in prediction_results]
     result_ids_placeholder = ",".join(["?" for _ in result_ids])
@@ -1667,8 +1836,11 @@ def get_predictions(
 
     predictions_query += " ORDER BY dmm.artist, dmm.album, fp.prediction_month"
 
-    return execute_query(
-        predictions_query, params=tuple(query_params), fetchall=True, connection=connection
+    return execute_query_columns(
+        predictions_query,
+        connection=connection,
+        params=tuple(query_params),
+        dtypes=PREDICTION_COLUMN_DTYPES,
     )
 
 def get_report_result(result_id: str, connection: sqlite3.Connection = None) -> dict:
@@ -1761,6 +1933,185 @@ def update_processing_run(
 # MultiIndex mapping functions
 
 
+class _MultiindexIdCache:
+    """
+    Process-level LRU cache from normalized multi-index tuples to IDs.
+
+    Entries are kept per database file and dropped whenever the file or
+    the highest multiindex_id changes, except by inserts published from
+    this process, i.e. after inserts (or deletes) by other connections.
+
+    IDs read or created inside an open transaction may still be rolled
+    back. They are held as candidates of their connection and only cached
+    once the transaction has ended, if they match the committed rows (see
+    `publish`). Committed entries are read inside transactions as well.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, tuple], int] = OrderedDict()
+        self._versions: dict[str, tuple] = {}
+        # id(connection) -> (database file, {tuple: multiindex_id})
+        self._candidates: OrderedDict[int, tuple[str, dict[tuple, int]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(connection: sqlite3.Connection, db_file: str) -> tuple | None:
+        """The database file identity and its highest multiindex_id."""
+        try:
+            file_id = os.stat(db_file).st_ino
+        except OSError:
+            return None
+        cursor = connection.cursor()
+        cursor.row_factory = None
+        max_id = cursor.execute("SELECT MAX(multiindex_id) FROM dim_multiindex_mapping").fetchone()[0]
+        return file_id, max_id or 0
+
+    def _drop_entries(self, db_file: str) -> None:
+        for key in [key for key in self._entries if key[0] == db_file]:
+            del self._entries[key]
+
+    def database_key(self, connection: sqlite3.Connection) -> str | None:
+        """
+        Returns the cache namespace of the connection's database and drops
+        its entries if the database changed; None for in-memory databases.
+        """
+        cursor = connection.cursor()
+        cursor.row_factory = None
+        db_file = next(
+            (row[2] for row in cursor.execute("PRAGMA database_list") if row[1] == "main"),
+            "",
+        )
+        if not db_file:
+            return None
+        version = self._version(connection, db_file)
+        if version is None:
+            return None
+        with self._lock:
+            stored = self._versions.get(db_file)
+            if stored == version:
+                return db_file
+            if (
+                connection.in_transaction
+                and stored is not None
+                and stored[0] == version[0]
+                and version[1] >= stored[1]
+            ):
+                # The transaction's own inserts raise the highest ID; the
+                # version is checked again once the connection is outside it
+                return db_file
+            self._versions[db_file] = version
+            self._drop_entries(db_file)
+        return db_file
+
+    def get_many(self, db_file: str, keys: list[tuple]) -> dict[tuple, int]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                multiindex_id = self._entries.get((db_file, key))
+                if multiindex_id is not None:
+                    self._entries.move_to_end((db_file, key))
+                    found[key] = multiindex_id
+        return found
+
+    def put_many(self, db_file: str, id_map: dict[tuple, int]) -> None:
+        with self._lock:
+            for key, multiindex_id in id_map.items():
+                self._entries[(db_file, key)] = multiindex_id
+                self._entries.move_to_end((db_file, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def add_candidates(
+        self, connection: sqlite3.Connection, db_file: str, id_map: dict[tuple, int]
+    ) -> None:
+        """Holds IDs resolved inside the connection's open transaction."""
+        with self._lock:
+            _, candidates = self._candidates.pop(id(connection), (db_file, {}))
+            candidates.update(id_map)
+            self._candidates[id(connection)] = (db_file, candidates)
+            # Connections that never publish (e.g. closed mid-transaction)
+            # lose their candidates first
+            while (
+                len(self._candidates) > 1
+                and sum(len(ids) for _, ids in self._candidates.values()) > self.maxsize
+            ):
+                self._candidates.popitem(last=False)
+
+    def discard(self, connection: sqlite3.Connection) -> None:
+        with self._lock:
+            self._candidates.pop(id(connection), None)
+
+    def publish(self, connection: sqlite3.Connection) -> None:
+        """
+        Caches the connection's candidates that match the committed rows.
+
+        Must be called outside of a transaction. Candidates of a rolled back
+        transaction, or whose rowid was reused since, fail the key_hash check.
+        """
+        with self._lock:
+            db_file, candidates = self._candidates.pop(id(connection), (None, None))
+        if not candidates or connection.in_transaction:
+            return
+        rows = execute_query_with_batching(
+            "SELECT multiindex_id, key_hash FROM dim_multiindex_mapping "
+            "WHERE multiindex_id IN ({placeholders})",
+            sorted(set(candidates.values())),
+            connection=connection,
+        )
+        key_hashes = {int(row["multiindex_id"]): row["key_hash"] for row in rows}
+        committed = {
+            key: multiindex_id
+            for key, multiindex_id in candidates.items()
+            if key_hashes.get(multiindex_id) == multiindex_key_hash(key)
+        }
+        version = self._version(connection, db_file)
+        if version is None:
+            return
+        with self._lock:
+            stored = self._versions.get(db_file)
+            if stored != version:
+                # Growth made up of the published rows alone keeps the entries
+                new_ids = {
+                    multiindex_id
+                    for multiindex_id in committed.values()
+                    if stored is not None and multiindex_id > stored[1]
+                }
+                if not (
+                    stored is not None
+                    and stored[0] == version[0]
+                    and len(new_ids) == version[1] - stored[1]
+                ):
+                    self._drop_entries(db_file)
+                self._versions[db_file] = version
+        self.put_many(db_file, committed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._candidates.clear()
+
+
+_multiindex_id_cache = _MultiindexIdCache(maxsize=get_settings().db.multiindex_cache_size)
+
+
+def publish_multiindex_ids(connection: sqlite3.Connection) -> None:
+    """
+    Caches the multi-index IDs resolved inside the connection's transaction
+    that has just been committed. Cache failures are only logged.
+    """
+    try:
+        _multiindex_id_cache.publish(connection)
+    except Exception as e:
+        logger.warning(f"Could not cache committed multi-index IDs: {e}")
+
+
+def discard_multiindex_ids(connection: sqlite3.Connection) -> None:
+    """Forgets the multi-index IDs resolved inside a rolled back transaction."""
+    _multiindex_id_cache.discard(connection)
+
+
 def get_or_create_multiindex_ids_batch(
     tuples_to_process: list[tuple],
     connection: sqlite3.Connection
@@ -1768,64 +2119,79 @@ def get_or_create_multiindex_ids_batch(
     """
     Efficiently gets or creates multiple multi-index IDs in a single batch.
 
+    Tuples are looked up in the process-level ID cache first, then by
+    `key_hash` in batches; only tuples missing from both are inserted.
+    IDs resolved inside a transaction are cached once it has committed,
+    see `publish_multiindex_ids`.
+
     Args:
         tuples_to_process: A list of unique tuples, each representing a multi-index.
         connection: An active sqlite3.Connection object.
 
     Returns:
-        A dictionary mapping each input tuple to its integer multiindex_id.
+        A dictionary mapping each input tuple, with its values converted to
+        str, to its integer multiindex_id.
     """
     if not tuples_to_process:
         return {}
 
     def _batch_operation(conn_to_use: sqlite3.Connection) -> dict[tuple, int]:
-        execute_query("CREATE TEMP TABLE _tuples_to_find (barcode TEXT, artist TEXT, album TEXT, cover_type TEXT, price_category TEXT, release_type TEXT, recording_decade TEXT, release_decade TEXT, style TEXT, recording_year INTEGER)", conn_to_use)
+        values_by_key = {
+            tuple(str(value) for value in values): tuple(values)
+            for values in tuples_to_process
+        }
+        in_transaction = conn_to_use.in_transaction
+        if not in_transaction:
+            # The connection's last transaction has ended since its last call
+            publish_multiindex_ids(conn_to_use)
+        db_file = _multiindex_id_cache.database_key(conn_to_use)
+        id_map = _multiindex_id_cache.get_many(db_file, list(values_by_key)) if db_file else {}
+        hashes = {
+            multiindex_key_hash(key): key for key in values_by_key if key not in id_map
+        }
+        if not hashes:
+            return id_map
+
+        def _fetch_by_hash(key_hashes: list[int]) -> dict[tuple, int]:
+            rows = execute_query_with_batching(
+                "SELECT key_hash, multiindex_id FROM dim_multiindex_mapping "
+                "WHERE key_hash IN ({placeholders})",
+                key_hashes,
+                connection=conn_to_use,
+            )
+            return {hashes[row["key_hash"]]: int(row["multiindex_id"]) for row in rows}
+
+        found = _fetch_by_hash(list(hashes))
+        if db_file and in_transaction:
+            _multiindex_id_cache.add_candidates(conn_to_use, db_file, found)
+        elif db_file:
+            _multiindex_id_cache.put_many(db_file, found)
+        id_map.update(found)
+
+        new_rows = [
+            (*values_by_key[key], key_hash)
+            for key_hash, key in hashes.items()
+            if key not in found
+        ]
+        if new_rows:
+            # Rows written without key_hash (e.g. by older versions) are
+            # matched on the UNIQUE attribute columns and get it filled in.
+            names = ", ".join(MULTIINDEX_NAMES)
+            execute_many(
+                f"""
+                INSERT INTO dim_multiindex_mapping ({names}, key_hash)
+                VALUES ({", ".join("?" * (len(MULTIINDEX_NAMES) + 1))})
+                ON CONFLICT({names}) DO UPDATE SET key_hash = excluded.key_hash
+                """,
+                new_rows,
+                conn_to_use,
+            )
+            created = _fetch_by_hash([row[-1] for row in new_rows])
+            if db_file:
+                # Cached once the caller commits, see `publish_multiindex_ids`
+                _multiindex_id_cache.add_candidates(conn_to_use, db_file, created)
+            id_map.update(created)
 
-        try:
-            execute_many("INSERT INTO _tuples_to_find VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", tuples_to_process, conn_to_use)
-
-            query_existing = """
-                SELECT t.*, m.multiindex_id
-                FROM _tuples_to_find t
-                JOIN dim_multiindex_mapping m ON
-                    m.barcode = t.barcode AND
-                    m.artist = t.artist AND
-                    m.album = t.album AND
-                    m.cover_type = t.cover_type AND
-                    m.price_category = t.price_category AND
-                    m.release_type = t.release_type AND
-                    m.recording_decade = t.recording_decade AND
-                    m.release_decade = t.release_decade AND
-                    m.style = t.style AND
-                    m.recording_year = t.recording_year
-            """
-            existing_rows = execute_query(query_existing, conn_to_use, fetchall=True) or []
-
-            existing_tuples = set()
-            id_map = {}
-            for row in existing_rows:
-                existing_tuple = tuple(str(row[col]) for col in row.keys() if col != 'multiindex_id')
-                existing_tuples.add(existing_tuple)
-                id_map[existing_tuple] = int(row['multiindex_id'])
-
-            new_tuples = [t for t in tuples_to_process if tuple(t) not in existing_tuples]
-
-            if new_tuples:
-                insert_query = """
-                INSERT OR IGNORE INTO dim_multiindex_mapping (
-                    barcode, artist, album, cover_type, price_category,
-                    release_type, recording_decade, release_decade, style, recording_year
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                execute_many(insert_query, new_tuples, conn_to_use)
-
-                all_rows = execute_query(query_existing, conn_to_use, fetchall=True) or []
-                for row in all_rows:
-                    full_tuple = tuple(str(row[col]) for col in row.keys() if col != 'multiindex_id')
-                    id_map[full_tuple] = int(row['multiindex_id'])
-
-        finally:
-            execute_query("DROP TABLE _tuples_to_find", conn_to_use)
         return id_map
 
     try:
@@ -1867,15 +2233,7 @@ def get_or_create_multiindex_id(
     Returns:
         Multiindex ID
     """
-    # Check if mapping already exists
-    query = """
-    SELECT multiindex_id FROM dim_multiindex_mapping
-    WHERE barcode = ? AND artist = ? AND album = ? AND cover_type = ? AND
-          price_category = ? AND release_type = ? AND recording_decade = ? AND
-          release_decade = ? AND style = ? AND recording_year = ?
-    """
-
-    params = (
+    values = (
         barcode,
         artist,
         album,
@@ -1889,27 +2247,8 @@ def get_or_create_multiindex_id(
     )
 
     try:
-        existing = execute_query(query, connection=connection, params=params)
-
-        if existing:
-            return existing["multiindex_id"]
-
-        # Create new mapping
-        insert_query = """
-        INSERT INTO dim_multiindex_mapping (
-            barcode, artist, album, cover_type, price_category,
-            release_type, recording_decade, release_decade, style, recording_year
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-
-        execute_query(insert_query, connection=connection, params=params)
-
-        # Get the new ID
-        result = execute_query(
-            "SELECT last_insert_rowid() as multiindex_id", connection=connection
-        )
-        return result["multiindex_id"]
-
+        id_map = get_or_create_multiindex_ids_batch([values], connection)
+        return id_map[tuple(str(value) for value in values)]
     except DatabaseError:
         logger.error("Failed to get or create multiindex mapping")
         raise
@@ -1980,7 +2319,7 @@ def get_report_features(
     end_date: date | None = None,
     feature_subset: list[str] | None = None,
     connection: sqlite3.Connection = None,
-) -> list[dict]:
+) -> pd.DataFrame:
     """
     Retrieves a specific subset of report features and associated product
     attributes, filtered by a specific month or a date range.
@@ -1996,25 +2335,27 @@ def get_report_features(
                         (e.g., ["avg_sales_items", "lost_sales_rub"]). If None, all are fetched.
         connection: Optional existing database connection to use
     Returns:
-        A list of dictionaries, where each dictionary contains product attributes
-        and its requested features. Returns an empty list if no matching data is found.
-
-    Raises:
-        ValueError: If no date filter (prediction_month or start/end_date) is provided.
+        A DataFrame with one row per item and date, with the product attributes
+        and the requested features as float columns. Empty if no matching data
+        is found.
     """
 
     # Build the SELECT clause
-    select_parts = ["dmm.*", "rf.multiindex_id as rf_multiindex_id", "rf.data_date"]  # Alias to avoid collision
+    select_parts = ["dmm.multiindex_id"] + [f"dmm.{name}" for name in MULTIINDEX_NAMES]
+    select_parts += ["rf.multiindex_id as rf_multiindex_id", "rf.data_date"]  # Alias to avoid collision
     if feature_subset:
-        selected_features = list(
-            EXPECTED_REPORT_FEATURES_SET.intersection(feature_subset)
-        )
+        selected_features = [
+            feature for feature in EXPECTED_REPORT_FEATURES if feature in feature_subset
+        ]
     else:
         selected_features = EXPECTED_REPORT_FEATURES
     
     for feature in selected_features:
         select_parts.append(f"rf.{feature}")
 
+    dtypes = {"multiindex_id": "int64", "rf_multiindex_id": "int64"}
+    dtypes.update((feature, "float64") for feature in selected_features)
+
     select_clause = "SELECT " + ", ".join(select_parts)
     from_clause = """
     FROM report_features rf
@@ -2030,62 +2371,43 @@ def get_report_features(
     if end_date:
         where_clauses.append("rf.data_date <= ?")
         params.append(end_date.strftime("%Y-%m-%d"))
-    # Handle multiidx_ids with batching if provided
-
-    if multiidx_ids:
-        # Use existing batching function for multiidx_ids filtering
-        where_clauses.append("rf.multiindex_id IN ({placeholders})")
-        query_template = f"{select_clause} {from_clause} WHERE {' AND '.join(where_clauses)}"
-
-        # Execute with batching using the existing function
-        return execute_query_with_batching(
-            query_template=query_template,
-            ids=multiidx_ids,
-            batch_size=get_batch_size(),
-            connection=connection,
-            fetchall=True,
-            placeholder_name="placeholders"
-        )
-    else:
+
+    try:
+        if multiidx_ids:
+            # Batch the IN clause to stay below the SQLite variable limit
+            where_clauses.append("rf.multiindex_id IN ({placeholders})")
+            query_template = f"{select_clause} {from_clause} WHERE {' AND '.join(where_clauses)}"
+            frames = [
+                execute_query_columns(
+                    query_template.format(placeholders=", ".join("?" * len(batch_ids))),
+                    connection=connection,
+                    params=tuple(params) + tuple(batch_ids),
+                    dtypes=dtypes,
+                )
+                for batch_ids in split_ids_for_batching(
+                    multiidx_ids, get_batch_size() - len(params)
+                )
+            ]
+            return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
         # No multiidx_ids, single query for all items in the date range
         if where_clauses:
-            query_template = f"{select_clause} {from_clause} WHERE {' AND '.join(where_clauses)}"
+            query = f"{select_clause} {from_clause} WHERE {' AND '.join(where_clauses)}"
         else:
-            query_template = f"{select_clause} {from_clause}"
-
-        try:
-            results = execute_query(query=query_template, connection=connection, params=tuple(params), fetchall=True)
-            return results or []
-        except DatabaseError as e:
-            logger.error(f"Failed to get report features: {e}")
-            raise
+            query = f"{select_clause} {from_clause}"
+        return execute_query_columns(query, connection=connection, params=tuple(params), dtypes=dtypes)
+    except DatabaseError as e:
+        logger.error(f"Failed to get report features: {e}")
+        raise
 
 
-def get_feature_dataframe(
+def _feature_query(
     table_name: str,
     columns: list[str],
-    connection: sqlite3.Connection,
     start_date: str | None = None,
     end_date: str | None = None,
-) -> list[dict]:
-    """
-    Fetches feature data from a specified table for a given date range.
-
-    Selects 'multiindex_id', 'data_date', and the specified value columns
-    from the given table, filtering by date if provided.
-
-    Args:
-        table_name: The name of the feature table (e.g., 'fact_sales').
-        columns: A list of value columns to select (e.g., ['value'] or
-                 ['availability', 'confidence']).
-        connection: An active database connection.
-        start_date: The start date for the range (YYYY-MM-DD).
-        end_date: The end date for the range (YYYY-MM-DD).
-
-    Returns:
-        A list of dictionaries, where each dictionary represents a row of data.
-        Returns an empty list if no data is found.
-    """
+) -> tuple[str, tuple]:
+    """Builds the SELECT for a feature table, see `get_feature_dataframe`."""
     # Basic sanitization for table and column names
     def _is_safe_identifier(name: str) -> bool:
         return all(c.isalnum() or c == '_' for c in name)
@@ -2112,13 +2434,74 @@ def get_feature_dataframe(
     if where_clauses:
         query += " WHERE " + " AND ".join(where_clauses)
 
+    return query, tuple(params)
+
+
+def get_feature_dataframe(
+    table_name: str,
+    columns: list[str],
+    connection: sqlite3.Connection,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> list[dict]:
+    """
+    Fetches feature data from a specified table for a given date range.
+
+    Selects 'multiindex_id', 'data_date', and the specified value columns
+    from the given table, filtering by date if provided.
+
+    Args:
+        table_name: The name of the feature table (e.g., 'fact_sales').
+        columns: A list of value columns to select (e.g., ['value'] or
+                 ['availability', 'confidence']).
+        connection: An active database connection.
+        start_date: The start date for the range (YYYY-MM-DD).
+        end_date: The end date for the range (YYYY-MM-DD).
+
+    Returns:
+        A list of dictionaries, where each dictionary represents a row of data.
+        Returns an empty list if no data is found.
+    """
+    query, params = _feature_query(table_name, columns, start_date, end_date)
+
     try:
-        return execute_query(query=query, connection=connection, params=tuple(params), fetchall=True) or []
+        return execute_query(query=query, connection=connection, params=params, fetchall=True) or []
     except DatabaseError as e:
         logger.error(f"Failed to get feature dataframe from {table_name}: {e}")
         raise
 
 
+def get_feature_arrays(
+    table_name: str,
+    columns: list[str],
+    connection: sqlite3.Connection,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Fetches the same rows as `get_feature_dataframe` as one array per column.
+
+    Rows are read with `execute_query_columns`, without building a dictionary
+    per row.
+
+    Returns:
+        Dictionary with an int64 'multiindex_id' array, an object 'data_date'
+        array of date strings and a float64 array per value column
+        (NULL values become NaN).
+    """
+    query, params = _feature_query(table_name, columns, start_date, end_date)
+    dtypes = {"multiindex_id": "int64", "data_date": object}
+    dtypes.update((column, "float64") for column in columns)
+
+    try:
+        frame = execute_query_columns(query, connection, params, dtypes=dtypes)
+    except DatabaseError as e:
+        logger.error(f"Failed to get feature arrays from {table_name}: {e}")
+        raise
+
+    return {column: frame[column].to_numpy() for column in frame.columns}
+
+
 def delete_configs_by_ids(
     config_ids: list[str], connection: sqlite3.Connection = None
 ) -> dict[str, Any]:
@@ -2478,15 +2861,16 @@ def get_tuning_results(
             raise ValueError(f"Invalid metric name: {metric_name}")
 
         order_direction = "DESC" if higher_is_better else "ASC"
-        json_path = f"'$.{metric_name}'"
 
         query = f"""
-            SELECT *, json_extract(metrics, {json_path}) as metric_value
-            FROM tuning_results
-            WHERE json_valid(metrics) = 1 AND json_extract(metrics, {json_path}) IS NOT NULL
-            ORDER BY metric_value {order_direction}
+            SELECT tu.*, rm.value as metric_value
+            FROM result_metrics rm
+            JOIN tuning_results tu ON tu.result_id = rm.result_id
+            WHERE rm.result_type = 'tuning' AND rm.metric_name = ?
+            ORDER BY rm.value {order_direction}
             LIMIT ?
         """
+        params = [metric_name, limit]
     else:
         # Default sorting by creation date if no metric is specified
         query = "SELECT * FROM tuning_results ORDER BY created_at DESC LIMIT ?"
@@ -2512,7 +2896,8 @@ def get_top_configs(
     Selection rules:
     1. Optionally include the currently active config first.
     2. Then order configs by metric from both *training_results* and *tuning_results* tables.
-       Rows where metric is NULL are ignored.
+       Rows where metric is NULL are ignored. Metric values come from the
+       indexed `result_metrics` table rather than the results' metrics JSON.
     3. Falls back to most recently created configs if no metrics.
     """
     metric_name = metric_name or "val_MIC"
@@ -2520,69 +2905,67 @@ def get_top_configs(
         logger.error("get_top_configs: Invalid metric name provided. Raising error.")
         raise ValueError("Invalid metric_name")
     order = "DESC" if higher_is_better else "ASC"
-
-    json_path = f"'$.{metric_name}'"
-
-    sql = f"""
-        WITH config_metrics AS (
-            SELECT
-                c.config_id,
-                c.config,
-                c.created_at,
-                c.is_active,
-                c.source,
-                (SELECT JSON_EXTRACT(tr.metrics, {json_path})
-                 FROM training_results tr
-                 WHERE tr.config_id = c.config_id
-                 AND JSON_VALID(tr.metrics) = 1 AND JSON_EXTRACT(tr.metrics, {json_path}) IS NOT NULL
-                 ORDER BY JSON_EXTRACT(tr.metrics, {json_path}) {order} LIMIT 1) as training_metric,
-                (SELECT JSON_EXTRACT(tu.metrics, {json_path})
-                 FROM tuning_results tu
-                 WHERE tu.config_id = c.config_id
-                 AND JSON_VALID(tu.metrics) = 1 AND JSON_EXTRACT(tu.metrics, {json_path}) IS NOT NULL
-                 ORDER BY JSON_EXTRACT(tu.metrics, {json_path}) {order} LIMIT 1) as tuning_metric
-            FROM configs c
-        ),
-        final_metrics AS (
-            SELECT
-                config_id,
-                config,
-                created_at,
-                is_active,
-                source,
-                CASE
-                    WHEN training_metric IS NOT NULL AND tuning_metric IS NOT NULL THEN
-                        CASE WHEN {higher_is_better} THEN
-                            MAX(training_metric, tuning_metric)
-                        ELSE
-                            MIN(training_metric, tuning_metric)
-                        END
-                    WHEN training_metric IS NOT NULL THEN training_metric
-                    WHEN tuning_metric IS NOT NULL THEN tuning_metric
-                    ELSE NULL
-                END as best_metric,
-                (SELECT metrics FROM training_results WHERE config_id = config_metrics.config_id ORDER BY JSON_EXTRACT(metrics, {json_path}) {order} LIMIT 1) as training_metrics_json,
-                (SELECT metrics FROM tuning_results WHERE config_id = config_metrics.config_id ORDER BY JSON_EXTRACT(metrics, {json_path}) {order} LIMIT 1) as tuning_metrics_json
-            FROM config_metrics
-        )
-        SELECT config_id, config, created_at, is_active, source, best_metric, training_metrics_json, tuning_metrics_json
-        FROM final_metrics
-    """
+    best = "MAX" if higher_is_better else "MIN"
 
     where_conditions = []
+    params: list[Any] = [metric_name, metric_name]
 
     if not include_active:
-        where_conditions.append("is_active = 0")
+        where_conditions.append("c.is_active = 0")
 
     if source:
-        where_conditions.append(f"source = '{source}'")
+        where_conditions.append("c.source = ?")
+        params.append(source)
 
-    if where_conditions:
-        sql += " WHERE " + " AND ".join(where_conditions)
+    where_clause = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+    params.append(limit)
+
+    # Only the returned configs look up the metrics JSON of their best result,
+    # preferring training over tuning results
+    metrics_json = """
+        SELECT r.metrics FROM {table} r
+        LEFT JOIN result_metrics rm
+            ON rm.result_type = '{result_type}' AND rm.result_id = r.result_id AND rm.metric_name = ?
+        WHERE r.config_id = top.config_id
+        ORDER BY rm.value {order} LIMIT 1
+    """
+    training_metrics_json = metrics_json.format(table="training_results", result_type="training", order=order)
+    tuning_metrics_json = metrics_json.format(table="tuning_results", result_type="tuning", order=order)
+    params += [metric_name, metric_name]
 
-    sql += f" ORDER BY is_active DESC, best_metric {order} NULLS LAST, created_at DESC LIMIT ?"
+    sql = f"""
+        WITH best_metrics AS (
+            SELECT config_id, {best}(value) as best_metric
+            FROM (
+                SELECT tr.config_id, rm.value
+                FROM result_metrics rm
+                JOIN training_results tr ON tr.result_id = rm.result_id
+                WHERE rm.result_type = 'training' AND rm.metric_name = ?
+                UNION ALL
+                SELECT tu.config_id, rm.value
+                FROM result_metrics rm
+                JOIN tuning_results tu ON tu.result_id = rm.result_id
+                WHERE rm.result_type = 'tuning' AND rm.metric_name = ?
+            )
+            GROUP BY config_id
+        ),
+        top AS (
+            SELECT c.config_id, c.config, c.created_at, c.is_active, c.source, bm.best_metric
+            FROM configs c
+            LEFT JOIN best_metrics bm ON bm.config_id = c.config_id
+            {where_clause}
+            ORDER BY c.is_active DESC, bm.best_metric {order} NULLS LAST, c.created_at DESC
+            LIMIT ?
+        )
+        SELECT
+            top.*,
+            ({training_metrics_json}) as training_metrics_json,
+            ({tuning_metrics_json}) as tuning_metrics_json
+        FROM top
+        ORDER BY is_active DESC, best_metric {order} NULLS LAST, created_at DESC
+    """
 
-    rows = execute_query(sql, connection, (limit,), fetchall=True) or []
+    rows = execute_query(sql, connection, tuple(params), fetchall=True) or []
 
     top_cfgs = []
     for r in rows:
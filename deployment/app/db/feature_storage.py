@@ -1,7 +1,7 @@
 import warnings
 import logging
 from datetime import date, datetime
-from typing import Any
+from typing import Any, NamedTuple
 
 import numpy as np
 import pandas as pd
@@ -12,6 +12,22 @@ from deployment.app.db.schema import MULTIINDEX_NAMES
 
 logger = logging.getLogger(__name__)
 
+STOCK_FEATURE_NAMES = ("availability", "confidence")
+
+
+class FeatureCube(NamedTuple):
+    """
+    Dense monthly features, as consumed by `PlastinkaBaseTSDataset`.
+
+    Field names match the dataset constructor arguments, so a cube can be
+    passed as `**cube._asdict()`.
+    """
+
+    monthly_sales: np.ndarray  # months x items
+    stock_features: np.ndarray  # months x features x items
+    time_index: pd.DatetimeIndex  # month starts
+    items: pd.MultiIndex  # product attributes, MULTIINDEX_NAMES levels
+
 
 class SQLFeatureStore:
     """Store for saving and loading pandas DataFrames to/from SQL database using DataAccessLayer."""
@@ -362,18 +378,18 @@ class SQLFeatureStore:
 
         # 1. Load raw data for all groups and collect IDs
         for group_name, config in configs.items():
-            # This DAL method needs to be created.
-            data = self._dal.get_feature_dataframe(
-                table_name=config["table"],
-                columns=config["value_columns"],
-                start_date=start_date,
-                end_date=end_date,
+            df = pd.DataFrame(
+                self._dal.get_feature_arrays(
+                    table_name=config["table"],
+                    columns=config["value_columns"],
+                    start_date=start_date,
+                    end_date=end_date,
+                )
             )
-            if not data:
+            if df.empty:
                 logger.warning(f"No data found for feature group '{group_name}'")
                 continue
 
-            df = pd.DataFrame(data)
             if 'multiindex_id' in df.columns:
                 all_multiindex_ids.update(df['multiindex_id'].unique())
                 raw_dfs[group_name] = df
@@ -402,6 +418,119 @@ class SQLFeatureStore:
 
         return final_features
 
+    def load_feature_cube(
+        self,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        stock_feature_names: tuple[str, ...] = STOCK_FEATURE_NAMES,
+    ) -> FeatureCube:
+        """
+        Loads monthly sales and stock features as dense arrays.
+
+        Gives the same values as pivoting the `load_features` output and
+        summing sales by month, but scatters the fetched columns straight
+        into the arrays by integer position instead of merging and pivoting
+        DataFrames.
+
+        Items are the products with sales in the range, sorted by their
+        attributes; months span the first to the last month with sales.
+        Missing values are zeros.
+
+        Args:
+            start_date: Start date for data range (YYYY-MM-DD).
+            end_date: End date for data range (YYYY-MM-DD).
+            stock_feature_names: `report_features` columns stacked into
+                the stock features, in order.
+
+        Raises:
+            ValueError: If there are no sales or stock features in the range.
+        """
+        sales = self._dal.get_feature_arrays(
+            table_name="fact_sales",
+            columns=["value"],
+            start_date=start_date,
+            end_date=end_date,
+        )
+        stock = self._dal.get_feature_arrays(
+            table_name="report_features",
+            columns=list(stock_feature_names),
+            start_date=start_date,
+            end_date=end_date,
+        )
+        if not len(sales["multiindex_id"]):
+            raise ValueError("No sales found for the requested date range.")
+        if not len(stock["multiindex_id"]):
+            raise ValueError("No report features found for the requested date range.")
+
+        sales_ids = np.unique(sales["multiindex_id"])
+        mapping_data = self._dal.get_multiindex_mapping_by_ids(sales_ids.tolist())
+        attributes_df = pd.DataFrame(
+            mapping_data, columns=["multiindex_id", *MULTIINDEX_NAMES], dtype=str
+        ).dropna()
+        items = pd.MultiIndex.from_frame(attributes_df[MULTIINDEX_NAMES])
+        order = items.argsort()
+        items = items[order]
+        item_ids = attributes_df["multiindex_id"].to_numpy(dtype=np.int64)[order]
+
+        id_order = np.argsort(item_ids)
+        sales_items = _positions(item_ids[id_order], sales["multiindex_id"], id_order)
+        sales_months = _months(sales["data_date"])
+        valid = (sales_items >= 0) & ~np.isnan(sales["value"])
+        if not valid.any():
+            raise ValueError("No mapped sales found for the requested date range.")
+
+        first_month = sales_months[valid].min()
+        n_months = int(sales_months[valid].max() - first_month) + 1
+        n_items = len(items)
+        flat_positions = (sales_months[valid] - first_month) * n_items + sales_items[valid]
+        monthly_sales = np.abs(
+            np.bincount(
+                flat_positions,
+                weights=sales["value"][valid],
+                minlength=n_months * n_items,
+            ).reshape(n_months, n_items)
+        )
+
+        stock_items = _positions(item_ids[id_order], stock["multiindex_id"], id_order)
+        stock_months = _months(stock["data_date"]) - first_month
+        valid = (stock_items >= 0) & (stock_months >= 0) & (stock_months < n_months)
+        stock_features = np.zeros(
+            (n_months, len(stock_feature_names), n_items), dtype=np.float64
+        )
+        for i, name in enumerate(stock_feature_names):
+            stock_features[stock_months[valid], i, stock_items[valid]] = np.nan_to_num(
+                stock[name][valid]
+            )
+
+        time_index = pd.date_range(
+            start=np.datetime64(int(first_month), "M"), periods=n_months, freq="MS"
+        )
+        logger.info(
+            f"Loaded feature cube with {n_months} months and {n_items} items."
+        )
+        return FeatureCube(monthly_sales, stock_features, time_index, items)
+
+    def load_report_features(
+        self,
+        multiidx_ids: list[int] | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        feature_subset: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Loads report features with product attributes, see
+        `DataAccessLayer.get_report_features`.
+
+        Returns:
+            DataFrame with one row per item and date; empty if nothing matches.
+        """
+        return self._dal.get_report_features(
+            multiidx_ids=multiidx_ids,
+            start_date=start_date,
+            end_date=end_date,
+            feature_subset=feature_subset,
+        )
+
     def _format_feature_group(
         self,
         raw_df: pd.DataFrame,
@@ -485,6 +614,21 @@ class SQLFeatureStore:
         return result
 
 
+def _positions(sorted_keys: np.ndarray, values: np.ndarray, key_positions: np.ndarray) -> np.ndarray:
+    """Maps `values` to `key_positions` of the matching sorted keys, -1 if absent."""
+    if not len(sorted_keys):
+        return np.full(len(values), -1, dtype=np.int64)
+    found_at = np.searchsorted(sorted_keys, values).clip(max=len(sorted_keys) - 1)
+    return np.where(sorted_keys[found_at] == values, key_positions[found_at], -1)
+
+
+def _months(dates: np.ndarray) -> np.ndarray:
+    """Month numbers (months since 1970-01) of an array of date strings."""
+    codes, unique_dates = pd.factorize(dates)
+    unique_months = pd.to_datetime(unique_dates).to_numpy().astype("datetime64[M]")
+    return unique_months.astype(np.int64)[codes]
+
+
 class FeatureStoreFactory:
     """Factory for creating feature store instances."""
 
@@ -542,6 +686,21 @@ def load_features(
     return features
 
 
+def load_feature_cube(
+    store_type: str = "sql",
+    start_date: str | None = None,
+    end_date: str | None = None,
+    dal: DataAccessLayer = None,
+    **kwargs,
+) -> FeatureCube:
+    """Helper function to load the dense feature cube, requiring a DAL instance."""
+    if not dal:
+        raise ValueError("A DataAccessLayer instance must be provided.")
+
+    store = FeatureStoreFactory.get_store(store_type=store_type, dal=dal, **kwargs)
+    return store.load_feature_cube(start_date=start_date, end_date=end_date)
+
+
 def load_report_features(
     store_type: str = "sql",
     multiidx_ids: list[int] | None = None,
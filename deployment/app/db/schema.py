@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import os
 import sqlite3
@@ -20,6 +21,7 @@ CREATE TABLE IF NOT EXISTS dim_multiindex_mapping (
     release_decade TEXT,  -- Год выпуска
     style TEXT,     -- Стиль
     recording_year INTEGER, -- recording_year
+    key_hash INTEGER, -- multiindex_key_hash() of the attributes above
     UNIQUE(barcode, artist, album, cover_type, price_category, release_type,
            recording_decade, release_decade, style, recording_year)
 );
@@ -186,6 +188,69 @@ CREATE TABLE IF NOT EXISTS job_submission_locks (
     PRIMARY KEY (job_type, param_hash)
 );
 
+-- Numeric metrics of training and tuning results, one row per metric, kept
+-- in sync with the results' metrics JSON by the triggers below
+CREATE TABLE IF NOT EXISTS result_metrics (
+    result_type TEXT NOT NULL,  -- 'training' or 'tuning'
+    result_id TEXT NOT NULL,
+    metric_name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (result_type, result_id, metric_name)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_training_results_metrics_insert
+AFTER INSERT ON training_results
+BEGIN
+    INSERT OR REPLACE INTO result_metrics (result_type, result_id, metric_name, value)
+    SELECT 'training', NEW.result_id, j.key, j.value
+    FROM json_each(CASE WHEN json_valid(NEW.metrics) THEN
+        CASE WHEN json_type(NEW.metrics) = 'object' THEN NEW.metrics END END) j
+    WHERE j.type IN ('integer', 'real');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_training_results_metrics_update
+AFTER UPDATE OF result_id, metrics ON training_results
+BEGIN
+    DELETE FROM result_metrics WHERE result_type = 'training' AND result_id = OLD.result_id;
+    INSERT OR REPLACE INTO result_metrics (result_type, result_id, metric_name, value)
+    SELECT 'training', NEW.result_id, j.key, j.value
+    FROM json_each(CASE WHEN json_valid(NEW.metrics) THEN
+        CASE WHEN json_type(NEW.metrics) = 'object' THEN NEW.metrics END END) j
+    WHERE j.type IN ('integer', 'real');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_training_results_metrics_delete
+AFTER DELETE ON training_results
+BEGIN
+    DELETE FROM result_metrics WHERE result_type = 'training' AND result_id = OLD.result_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tuning_results_metrics_insert
+AFTER INSERT ON tuning_results
+BEGIN
+    INSERT OR REPLACE INTO result_metrics (result_type, result_id, metric_name, value)
+    SELECT 'tuning', NEW.result_id, j.key, j.value
+    FROM json_each(CASE WHEN json_valid(NEW.metrics) THEN
+        CASE WHEN json_type(NEW.metrics) = 'object' THEN NEW.metrics END END) j
+    WHERE j.type IN ('integer', 'real');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tuning_results_metrics_update
+AFTER UPDATE OF result_id, metrics ON tuning_results
+BEGIN
+    DELETE FROM result_metrics WHERE result_type = 'tuning' AND result_id = OLD.result_id;
+    INSERT OR REPLACE INTO result_metrics (result_type, result_id, metric_name, value)
+    SELECT 'tuning', NEW.result_id, j.key, j.value
+    FROM json_each(CASE WHEN json_valid(NEW.metrics) THEN
+        CASE WHEN json_type(NEW.metrics) = 'object' THEN NEW.metrics END END) j
+    WHERE j.type IN ('integer', 'real');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tuning_results_metrics_delete
+AFTER DELETE ON tuning_results
+BEGIN
+    DELETE FROM result_metrics WHERE result_type = 'tuning' AND result_id = OLD.result_id;
+END;
 
 CREATE TABLE IF NOT EXISTS report_features (
     data_date DATE NOT NULL,
@@ -258,6 +323,9 @@ CREATE INDEX IF NOT EXISTS idx_tuning_results_config ON tuning_results(config_id
 CREATE INDEX IF NOT EXISTS idx_tuning_results_job ON tuning_results(job_id);
 CREATE INDEX IF NOT EXISTS idx_tuning_results_created ON tuning_results(created_at);
 
+-- Index for ranking results by metric
+CREATE INDEX IF NOT EXISTS idx_result_metrics_rank ON result_metrics(result_type, metric_name, value);
+
 CREATE INDEX IF NOT EXISTS idx_retry_events_op ON retry_events(component, operation);
 CREATE INDEX IF NOT EXISTS idx_retry_events_time ON retry_events(timestamp);
 
@@ -279,6 +347,61 @@ MULTIINDEX_NAMES = [
 ]
 
 
+def multiindex_key_hash(values) -> int:
+    """
+    Compact lookup key of a multi-index tuple (values in MULTIINDEX_NAMES order).
+
+    Values are compared as strings, so `('..', '2015')` and `('..', 2015)`
+    give the same key.
+    """
+    joined = "\x1f".join(str(value) for value in values)
+    digest = hashlib.blake2b(joined.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _migrate_multiindex_key_hash(conn: sqlite3.Connection) -> None:
+    """Adds and indexes dim_multiindex_mapping.key_hash, filling rows that lack it."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(dim_multiindex_mapping)")}
+    if "key_hash" not in columns:
+        conn.execute("ALTER TABLE dim_multiindex_mapping ADD COLUMN key_hash INTEGER")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_multiindex_key_hash "
+        "ON dim_multiindex_mapping(key_hash)"
+    )
+    names = ", ".join(MULTIINDEX_NAMES)
+    rows = conn.execute(
+        f"SELECT multiindex_id, {names} FROM dim_multiindex_mapping WHERE key_hash IS NULL"
+    ).fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE dim_multiindex_mapping SET key_hash = ? WHERE multiindex_id = ?",
+            [(multiindex_key_hash(row[1:]), row[0]) for row in rows],
+        )
+        logger.info(f"Filled key_hash for {len(rows)} multi-index mappings.")
+
+
+def _backfill_result_metrics(conn: sqlite3.Connection) -> None:
+    """Fills result_metrics for results saved before the table existed."""
+    if conn.execute("SELECT 1 FROM result_metrics LIMIT 1").fetchone():
+        return
+    filled = 0
+    for result_type, table in (("training", "training_results"), ("tuning", "tuning_results")):
+        cursor = conn.execute(
+            f"""
+            INSERT OR IGNORE INTO result_metrics (result_type, result_id, metric_name, value)
+            SELECT ?, r.result_id, j.key, j.value
+            FROM {table} r,
+                 json_each(CASE WHEN json_valid(r.metrics) THEN
+                     CASE WHEN json_type(r.metrics) = 'object' THEN r.metrics END END) j
+            WHERE j.type IN ('integer', 'real')
+            """,
+            (result_type,),
+        )
+        filled += cursor.rowcount
+    if filled:
+        logger.info(f"Filled result_metrics with {filled} metrics of existing results.")
+
+
 def init_db(db_path: str = None, connection: sqlite3.Connection = None):
     """
     Initialize the database with schema.
@@ -334,6 +457,8 @@ def init_db(db_path: str = None, connection: sqlite3.Connection = None):
             conn.execute("PRAGMA foreign_keys = ON;")
             cursor = conn.cursor()
             cursor.executescript(SCHEMA_SQL)
+            _migrate_multiindex_key_hash(conn)
+            _backfill_result_metrics(conn)
             conn.commit()
 
             return True
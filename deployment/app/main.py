@@ -14,6 +14,7 @@ from deployment.app.api.results import router as results_router
 from deployment.app.config import get_settings
 
 settings = get_settings()
+from deployment.app.db.connection_pool import close_connection_pools
 from deployment.app.db.schema import init_db
 from deployment.app.logger_config import configure_logging
 from deployment.app.services.auth import get_docs_user
@@ -35,6 +36,8 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    close_connection_pools()
+
 # Create FastAPI application with lifespan
 app = FastAPI(
     title="Plastinka Sales Predictor API",
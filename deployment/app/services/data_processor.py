@@ -52,7 +52,18 @@ async def process_data_files(
             stock_path=str(stock_path),
             sales_path=str(sales_dir_path),
             bins=settings.price_category_interval_index,
+            max_workers=settings.data_processing_max_workers,
+            cache_dir=settings.processed_files_cache_dir,
+            csv_memory_limit_mb=settings.data_processing_csv_memory_limit_mb,
+            excel_engine=settings.data_processing_excel_engine,
+            profile_path=(
+                Path(settings.logs_dir) / f"data_processing_profile_{job_id}.csv"
+                if settings.data_processing_profiling
+                else None
+            ),
         )
+        # The profile is persisted by process_data and is not a feature
+        features.pop("pipeline_profile", None)
 
         dal.update_job_status(job_id, JobStatus.RUNNING.value, progress=80)
 
@@ -229,7 +229,7 @@ async def _verify_datasphere_job_inputs(job_id: str, input_dir_path: Path, job_c
     # Check required files
     missing_required: list[str] = []
     for req_file in job_config.required_input_files:
-        if not (input_dir_path / req_file).is_file():
+        if not (input_dir_path / req_file).exists():
             missing_required.append(req_file)
 
     if missing_required:
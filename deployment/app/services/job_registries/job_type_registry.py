@@ -63,7 +63,7 @@ JOB_TYPE_CONFIGS = {
         name="train",
         script_dir_getter=lambda s: s.datasphere_job_train_dir,
         config_filename="config.yaml",
-        required_input_files=["train.dill", "config.json", "inference.dill"],
+        required_input_files=["train", "config.json", "inference"],
         optional_input_files=[],
         expected_output_files=["model.onnx", "predictions.csv", "metrics.json"],
         result_processor_name="process_training_results",
@@ -76,7 +76,7 @@ JOB_TYPE_CONFIGS = {
         name="tune",
         script_dir_getter=lambda s: s.datasphere_job_tune_dir,
         config_filename="config.yaml",
-        required_input_files=["train.dill", "config.json"],
+        required_input_files=["train", "config.json"],
         optional_input_files=["tuning_settings.json", "initial_configs.json"],
         expected_output_files=["best_configs.json", "metrics.json"],
         result_processor_name="process_tuning_results",
@@ -241,8 +241,8 @@ class RetryMonitor:
             if self._persistence_backend == "db":
                 try:
                     # Use a separate connection to avoid database locks
-                    from deployment.app.db.database import get_db_connection
-                    with get_db_connection(db_path_override=self._db_path) as separate_conn:
+                    from deployment.app.db.connection_pool import pooled_connection
+                    with pooled_connection(self._db_path) as separate_conn:
                         self._insert_event_db(event, separate_conn)
                 except Exception as db_exc:
                     logger.error(
@@ -566,10 +566,10 @@ class RetryMonitor:
         """Fetch recent retry_events rows up to self._capacity using DAL."""
         
         try:
-            from deployment.app.db.database import get_db_connection
+            from deployment.app.db.connection_pool import pooled_connection
             from deployment.app.dependencies import get_dal_system_sync
 
-            with get_db_connection(db_path_override=self._db_path) as conn:
+            with pooled_connection(self._db_path) as conn:
                 dal = get_dal_system_sync(connection=conn)
                 return dal.fetch_recent_retry_events(limit=self._capacity)
         except Exception as e:
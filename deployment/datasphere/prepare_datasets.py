@@ -2,17 +2,12 @@ import logging
 from collections.abc import Sequence
 from warnings import warn
 
-import pandas as pd
-
 from deployment.app.db import feature_storage
-from deployment.app.db.schema import MULTIINDEX_NAMES
 from plastinka_sales_predictor.data_preparation import (
     GlobalLogMinMaxScaler,
     MultiColumnLabelBinarizer,
     PlastinkaInferenceTSDataset,
     PlastinkaTrainingTSDataset,
-    get_monthly_sales_pivot,
-    COLTYPES
 )
 
 DEFAULT_OUTPUT_DIR = "./datasets/"  # Default location if not specified
@@ -36,50 +31,32 @@ logger = logging.getLogger(__name__)
 
 
 def prepare_datasets(
-    raw_features: dict,
-    stock_features: pd.DataFrame,
+    feature_cube: feature_storage.FeatureCube,
     save_directory: str,
     datasets_to_generate: Sequence[str] = ("train", "inference"),
 ) -> tuple[PlastinkaTrainingTSDataset | None, PlastinkaInferenceTSDataset | None]:
     """
-    Loads data from DB, prepares features, creates full dataset.
+    Prepares features, creates full dataset.
     Saves train and validation datasets to the specified output_dir.
 
     Args:
-        raw_features: Dictionary of raw features loaded from the database.
-        stock_features: DataFrame of stock features loaded from the database.
-        output_dir: Directory to save the prepared datasets.
+        feature_cube: Dense monthly sales and stock features loaded from the database.
+        save_directory: Directory to save the prepared datasets.
         datasets_to_generate: List of dataset types to generate (e.g., ["train", "val", "inference"])
 
     Returns:
-        Tuple of (train_dataset, val_dataset, inference_dataset)
+        Tuple of (train_dataset, inference_dataset)
     """
     logger.info("Starting feature preparation...")
-    
-    # Validate required raw features exist
-    if (
-        "sales" not in raw_features
-        or "movement" not in raw_features
-    ):
-        raise ValueError("Missing required raw feature data.")
-
-    features = raw_features.copy()
-    logger.info(
-        "Raw features validation passed, proceeding with feature engineering..."
-    )
 
     try:
-        # 1. Create Sales Pivot Table
-        sales_pivot = get_monthly_sales_pivot(features["sales"])
-        logger.info("Sales pivot table created successfully.")
-
-        # 2. Initialize Transformers (as per prepare_datasets.py example)
+        # 1. Initialize Transformers (as per prepare_datasets.py example)
         static_transformer = MultiColumnLabelBinarizer()
         scaler = GlobalLogMinMaxScaler()
 
-        # 3. Create datasets
+        # 2. Create datasets
         output_chunk_length = 1
-        dataset_length = sales_pivot.shape[0]
+        dataset_length = len(feature_cube.time_index)
         default_input_chunk_length = dataset_length - output_chunk_length
 
         if default_input_chunk_length <= 0:
@@ -90,8 +67,7 @@ def prepare_datasets(
 
         # Common dataset parameters
         dataset_params = {
-            "stock_features": stock_features,
-            "monthly_sales": sales_pivot,
+            **feature_cube._asdict(),
             "static_transformer": static_transformer,
             "static_features": DEFAULT_STATIC_FEATURES,
             "scaler": scaler,
@@ -144,54 +120,18 @@ def get_datasets(
     logger.info("get_datasets function started...")
 
     try:
-        # --- ЕДИНЫЙ ШАГ ЗАГРУЗКИ ---
-        # Один вызов для загрузки всех фичей, определённых в конфиге feature_storage
-        all_features = feature_storage.load_features(
+        # Monthly sales and stock features are read straight into dense
+        # month x item arrays, without pivoting DataFrames.
+        feature_cube = feature_storage.load_feature_cube(
             store_type="sql",
             start_date=start_date,
             end_date=end_date,
             dal=dal,
         )
-        logger.info("All features loaded successfully via unified load_features.")
+        logger.info("Feature cube loaded successfully.")
 
-        # --- ИЗВЛЕЧЕНИЕ И ПОДГОТОВКА ДАННЫХ ---
-        # Извлекаем разные типы фичей из результата
-        raw_features = {
-            "sales": all_features.get("sales"),
-            "movement": all_features.get("movement"),
-        }
-        
-        # 'report_features' теперь также загружаются через load_features
-        stock_features_long = all_features.get("report_features")
-
-        if raw_features["sales"] is None or raw_features["movement"] is None:
-            raise ValueError("Missing required 'sales' or 'movement' data from load_features.")
-        
-        if stock_features_long is None:
-             raise ValueError("Missing required 'report_features' data from load_features.")
-
-        # --- ЛОГИКА ПРЕОБРАЗОВАНИЯ В ШИРОКИЙ ФОРМАТ (остаётся без изменений) ---
-        feature_values = ["availability", "confidence"]
-        
-        missing_cols = set(feature_values) - set(stock_features_long.columns)
-        if missing_cols:
-            raise ValueError(f"Loaded report_features are missing columns required for stock features: {missing_cols}")
-
-        stock_features_long['data_date'] = pd.to_datetime(
-            stock_features_long['data_date']
-        )
-        
-        stock_features_wide = stock_features_long.pivot_table(
-            index='data_date',
-            columns=MULTIINDEX_NAMES,
-            values=feature_values
-        )
-        logger.info("Stock features transformed to wide format successfully.")
-
-        # --- ПОДГОТОВКА ДАТАСЕТОВ (здесь без изменений) ---
         train_dataset, inference_dataset = prepare_datasets(
-            raw_features,
-            stock_features_wide,
+            feature_cube,
             output_dir,
             datasets_to_generate,
         )
@@ -204,4 +144,3 @@ def get_datasets(
     except Exception as e:
         logger.error(f"Error in get_datasets: {e}", exc_info=True)
         raise
-
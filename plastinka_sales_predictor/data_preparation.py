@@ -1,15 +1,22 @@
-﻿import logging
+﻿import hashlib
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
 from collections import OrderedDict
 from collections.abc import Callable, Sequence
-from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 from pathlib import Path
 from typing import Optional
 
 import dill
 import numpy as np
 import pandas as pd
-from darts.timeseries import TimeSeries
 from darts.utils.data.torch_datasets.inference_dataset import TorchInferenceDataset
 from darts.utils.data.torch_datasets.training_dataset import TorchTrainingDataset
 from sklearn.base import BaseEstimator, TransformerMixin
@@ -18,6 +25,11 @@ from typing_extensions import Self
 
 import io
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
 logger = logging.getLogger(__name__)
 
 COLTYPES = {
@@ -74,6 +86,30 @@ BASE_FEATURES_DEFAULT = [
     "movement"
 ]
 
+# On-disk layout version of PlastinkaBaseTSDataset.save
+DATASET_FORMAT_VERSION = 2
+
+# Bump when process_raw output changes, to invalidate cached processed files
+PROCESSED_FILE_CACHE_VERSION = 3
+
+# Raw rows behind each row of a frame that was reduced to its distinct rows
+# while reading, see `_read_csv_chunked`. Frames without it count each row
+# once; process_raw and _get_grouped_df accept both
+ROW_COUNT_COLUMN = "_rows"
+
+# Bump when the per-month pipeline steps change, to invalidate cached months
+MONTH_ARTIFACTS_CACHE_VERSION = 2
+
+# Optional Excel engines with the module each one needs. They can give
+# other cell types than the default pandas engine (e.g. dates for date-only
+# cells), so they are only used when requested, see `read_data_file`
+EXCEL_ENGINES = {
+    "calamine": "python_calamine",
+}
+
+# Leading bytes of .xlsx (zip container) and .xls (OLE2 compound file)
+EXCEL_MAGIC_BYTES = (b"PK\x03\x04", b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")
+
 REPORT_FEATURES_DEFAULT = [
     "availability",
     "confidence",
@@ -86,8 +122,8 @@ REPORT_FEATURES_DEFAULT = [
 class PlastinkaBaseTSDataset:
     def __init__(
         self,
-        stock_features: pd.DataFrame,
-        monthly_sales: pd.DataFrame,
+        stock_features: pd.DataFrame | np.ndarray,
+        monthly_sales: pd.DataFrame | np.ndarray,
         static_transformer: BaseEstimator = None,
         static_features: Sequence[str] | None = None,
         scaler: BaseEstimator = None,
@@ -107,26 +143,41 @@ class PlastinkaBaseTSDataset:
         dataset_name: str | None = None,
         dtype: str | np.dtype = np.float32,
         minimum_sales_months: int = 1,
+        time_index: pd.DatetimeIndex | None = None,
+        items: pd.MultiIndex | None = None,
     ):
+        """
+        `monthly_sales` and `stock_features` are either wide DataFrames
+        (dates x items, and dates x (feature, item)) or dense arrays of
+        shape (months, items) and (months, features, items), as built by
+        `SQLFeatureStore.load_feature_cube`. Arrays need `time_index`
+        (regular month starts) and `items` (the item MultiIndex) as well.
+        """
         super().__init__()
         logger.info("Initializing PlastinkaBaseTSDataset...")
-        # --- Регуляризация временного индекса ---
-        monthly_sales = ensure_monthly_regular_index(monthly_sales)
-        monthly_sales = monthly_sales.fillna(0)
-
-        stock_features = ensure_monthly_regular_index(stock_features)
-        stock_features = stock_features.fillna(0)
+        from_arrays = not isinstance(monthly_sales, pd.DataFrame)
+        if from_arrays:
+            if time_index is None or items is None:
+                raise ValueError("time_index and items are required for array inputs")
+            if monthly_sales.shape != (len(time_index), len(items)) or (
+                stock_features.shape[::2] != monthly_sales.shape
+            ):
+                raise ValueError(
+                    f"Array shapes {monthly_sales.shape} and {stock_features.shape} "
+                    f"do not match {len(time_index)} months and {len(items)} items"
+                )
+        else:
+            # --- Регуляризация временного индекса ---
+            monthly_sales = ensure_monthly_regular_index(monthly_sales)
+            monthly_sales = monthly_sales.fillna(0)
+
+            stock_features = ensure_monthly_regular_index(stock_features)
+            stock_features = stock_features.fillna(0)
+            time_index = monthly_sales.index
+            items = monthly_sales.columns.drop_duplicates()
         
         self.dtype = dtype
-        multiidxs = (
-            monthly_sales
-            .columns
-            .drop_duplicates()
-            .to_frame()
-            .astype(str)
-            .values
-            .tolist()
-        )
+        multiidxs = items.to_frame().astype(str).values.tolist()
         self._idx2multiidx = OrderedDict(
             {i: tuple(map(str, multiidxs[i])) for i in range(len(multiidxs))}
         )
@@ -134,13 +185,17 @@ class PlastinkaBaseTSDataset:
             {tuple(map(str, multiidx)): idx for idx, multiidx in enumerate(multiidxs)}
         )
         self._index_names_mapping = OrderedDict(
-            {n: i for i, n in enumerate(monthly_sales.columns.names)}
+            {n: i for i, n in enumerate(items.names)}
         )
-        self._time_index = monthly_sales.index
-        self._monthly_sales = monthly_sales.loc[
-            self._time_index, self._multiidx2idx.keys()
-        ].values.astype(self.dtype)
-        self._stock_features = self._get_stock_features_values(stock_features)
+        self._time_index = time_index
+        if from_arrays:
+            self._monthly_sales = np.asarray(monthly_sales).astype(self.dtype)
+            self._stock_features = np.asarray(stock_features).astype(self.dtype)
+        else:
+            self._monthly_sales = monthly_sales.loc[
+                self._time_index, self._multiidx2idx.keys()
+            ].values.astype(self.dtype)
+            self._stock_features = self._get_stock_features_values(stock_features)
         self._n_time_steps = self._monthly_sales.shape[0]
         self._end = end
         self.start = start
@@ -164,7 +219,7 @@ class PlastinkaBaseTSDataset:
         self.dataset_name = dataset_name
 
         if save_dir is not None:
-            logger.info(f"Saving dataset to {save_dir}/{dataset_name}.dill")
+            logger.info(f"Saving dataset to {save_dir}/{dataset_name}")
             self.save(save_dir, dataset_name)
         logger.info("PlastinkaBaseTSDataset initialized.")
 
@@ -173,6 +228,98 @@ class PlastinkaBaseTSDataset:
         with open(dill_path, "rb") as f:
             return dill.load(f)
 
+    @classmethod
+    def from_directory(cls, dataset_dir: str | Path, mmap_mode: str | None = "r"):
+        """
+        Loads a dataset written by `save`.
+
+        Raw arrays and past covariates are opened as read-only memory maps by
+        default, so opening a dataset does not read them into memory and
+        processes that open the same directory share the underlying pages.
+        """
+        dataset_dir = Path(dataset_dir)
+        with open(dataset_dir / "metadata.json", encoding="utf-8") as f:
+            metadata = json.load(f)
+
+        if metadata.get("format_version") != DATASET_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported dataset format version {metadata.get('format_version')} "
+                f"in {dataset_dir}, expected {DATASET_FORMAT_VERSION}"
+            )
+        if metadata["class_name"] != cls.__name__:
+            logger.warning(
+                f"Loading {metadata['class_name']} saved in {dataset_dir} "
+                f"as {cls.__name__}"
+            )
+
+        ds = cls.__new__(cls)
+        ds._index_memory = {}
+        ds.__dict__.update(metadata["attributes"])
+        ds.dtype = np.dtype(metadata["dtype"]).type
+
+        ds._monthly_sales = np.load(
+            dataset_dir / "monthly_sales.npy", mmap_mode=mmap_mode
+        )
+        ds._stock_features = np.load(
+            dataset_dir / "stock_features.npy", mmap_mode=mmap_mode
+        )
+        multiidxs = np.load(dataset_dir / "multiindex.npy").tolist()
+        ds._idx2multiidx = OrderedDict(
+            {i: tuple(multiidx) for i, multiidx in enumerate(multiidxs)}
+        )
+        ds._multiidx2idx = OrderedDict(
+            {tuple(multiidx): i for i, multiidx in enumerate(multiidxs)}
+        )
+        ds._index_names_mapping = OrderedDict(
+            {n: i for i, n in enumerate(metadata["index_names"])}
+        )
+        ds._time_index = pd.DatetimeIndex(
+            metadata["time_index"], freq=metadata["time_index_freq"]
+        )
+        ds._index_mapping = dict(
+            enumerate(np.load(dataset_dir / "index_mapping.npy").tolist())
+        )
+
+        with open(dataset_dir / "transformers.dill", "rb") as f:
+            transformers = dill.load(f)
+        ds.scaler = transformers["scaler"]
+        ds.static_transformer = transformers["static_transformer"]
+
+        ds.static_covariates_mapping = None
+        if metadata["static_covariates_columns"] is not None:
+            ds.static_covariates_mapping = pd.DataFrame(
+                np.load(dataset_dir / "static_covariates.npy"),
+                columns=metadata["static_covariates_columns"],
+                index=pd.MultiIndex.from_tuples(
+                    ds._multiidx2idx.keys(), names=metadata["index_names"]
+                ),
+            )
+
+        if "_weights_alpha" in metadata["attributes"]:
+            ds.set_reweight_fn(ds._weights_alpha)
+        ds._past_covariates_cached = {
+            entry["feature"]: pd.DataFrame(
+                np.load(dataset_dir / f"past_covariates_{i}.npy", mmap_mode=mmap_mode),
+                index=ds.time_index,
+                columns=pd.MultiIndex.from_tuples(
+                    [tuple(column) for column in entry["columns"]],
+                    names=entry["column_names"],
+                ),
+            )
+            for i, entry in enumerate(metadata["past_covariates"])
+        }
+        ds._sample_arrays_cached = None
+
+        return ds
+
+    @classmethod
+    def load(cls, path: str | Path, mmap_mode: str | None = "r"):
+        """Loads a dataset directory, or a legacy `.dill` file."""
+        path = Path(path)
+        if path.is_dir():
+            return cls.from_directory(path, mmap_mode=mmap_mode)
+        return cls.from_dill(path)
+
     def _get_stock_features_values(self, stock_features):
         full_indices = []
         for level1 in stock_features.columns.get_level_values(0).unique():
@@ -191,7 +338,18 @@ class PlastinkaBaseTSDataset:
         arr = arr.reshape(arr.shape[0], arr.shape[1] // len(self._multiidx2idx), -1)
         return arr
 
-    def save(self, save_dir: str | Path | None = None, dataset_name: str | None = None):
+    def save(
+        self, save_dir: str | Path | None = None, dataset_name: str | None = None
+    ) -> Path:
+        """
+        Saves the dataset as a `<save_dir>/<dataset_name>` directory.
+
+        Raw arrays and the past covariates of the current window go to `.npy`
+        files that `from_directory` can memory-map; index maps, window
+        parameters, the time index and past covariate columns go to
+        `metadata.json`. Fitted transformers are small and are stored with
+        dill. Sample arrays are rebuilt on first access after loading.
+        """
         if save_dir is None:
             save_dir = self.save_dir
 
@@ -201,11 +359,92 @@ class PlastinkaBaseTSDataset:
             else:
                 dataset_name = self.dataset_name
 
-        save_dir = Path(save_dir)
-        save_dir.mkdir(exist_ok=True, parents=True)
+        dataset_dir = Path(save_dir) / dataset_name
+        dataset_dir.mkdir(exist_ok=True, parents=True)
+
+        def _save_array(name, arr):
+            # Write next to the target and swap, the old file may be memory-mapped
+            tmp_path = dataset_dir / f"{name}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(arr))
+            os.replace(tmp_path, dataset_dir / name)
+
+        _save_array("monthly_sales.npy", self._monthly_sales)
+        _save_array("stock_features.npy", self._stock_features)
+        _save_array("multiindex.npy", np.array(list(self._multiidx2idx.keys()), dtype=str))
+        _save_array(
+            "index_mapping.npy",
+            np.fromiter(self._index_mapping.values(), dtype=np.int64),
+        )
+
+        static_covariates_columns = None
+        static_covariates = getattr(self, "static_covariates_mapping", None)
+        if static_covariates is not None:
+            static_covariates_columns = [str(c) for c in static_covariates.columns]
+            _save_array(
+                "static_covariates.npy", static_covariates.to_numpy(dtype=self.dtype)
+            )
+
+        past_covariates = []
+        for i, (feat_name, feat_df) in enumerate(self._past_covariates_cached.items()):
+            _save_array(f"past_covariates_{i}.npy", feat_df.to_numpy())
+            past_covariates.append(
+                {
+                    "feature": feat_name,
+                    "column_names": list(feat_df.columns.names),
+                    "columns": [list(column) for column in feat_df.columns],
+                }
+            )
+
+        with open(dataset_dir / "transformers.dill", "wb") as f:
+            dill.dump(
+                {
+                    "scaler": getattr(self, "scaler", None),
+                    "static_transformer": getattr(self, "static_transformer", None),
+                },
+                f,
+            )
+
+        attributes = {
+            name: getattr(self, name)
+            for name in (
+                "_n_time_steps",
+                "_end",
+                "start",
+                "_past_covariates_fnames",
+                "_past_covariates_span",
+                "minimum_sales_months",
+                "_allow_empty_stock",
+                "input_chunk_length",
+                "output_chunk_length",
+                "static_features",
+                "_weights_alpha",
+                "_idx_mapping",
+                "dataset_name",
+            )
+            if hasattr(self, name)
+        }
+        attributes["save_dir"] = None if self.save_dir is None else str(self.save_dir)
+        metadata = {
+            "format_version": DATASET_FORMAT_VERSION,
+            "class_name": self.__class__.__name__,
+            "dtype": np.dtype(self.dtype).str,
+            "index_names": list(self._index_names_mapping.keys()),
+            "time_index": [t.isoformat() for t in self._time_index],
+            "time_index_freq": self._time_index.freqstr,
+            "static_covariates_columns": static_covariates_columns,
+            "past_covariates": past_covariates,
+            "attributes": attributes,
+        }
+        with open(dataset_dir / "metadata.json", "w", encoding="utf-8") as f:
+            json.dump(
+                metadata,
+                f,
+                ensure_ascii=False,
+                default=lambda o: o.item() if isinstance(o, np.generic) else o,
+            )
 
-        with open(save_dir / f"{dataset_name}.dill", "wb") as f:
-            dill.dump(self, f)
+        return dataset_dir
 
     def prepare_past_covariates(self, span):
         if span is None:
@@ -213,19 +452,116 @@ class PlastinkaBaseTSDataset:
         self._past_covariates_span = span
 
         if self._past_covariates_span is not None:
-            self._past_covariates_cached = {
-                feat: get_past_covariates_df(
-                    self.monthly_sales_df,
-                    self.stock_features,
-                    (feat,),
-                    self._past_covariates_span,
-                )
-                for feat in self._past_covariates_fnames
-            } 
+            past_covariates_dfs = get_past_covariates_dfs(
+                self.monthly_sales_df,
+                self.stock_features,
+                [(feat,) for feat in self._past_covariates_fnames],
+                self._past_covariates_span,
+            )
+            self._past_covariates_cached = dict(
+                zip(self._past_covariates_fnames, past_covariates_dfs)
+            )
         else:
             self.logger.error("Past covariates span is not set, cannot prepare past covariates")
             raise ValueError("Past covariates span is not set")
-            
+
+    def _build_sample_arrays_cache(self):
+        """
+        Precomputes per-item arrays for the current window so that sample
+        extraction is reduced to slicing.
+
+        Produces the same values as `get_past_covariates`,
+        `get_future_covariates` and the scaled target series, laid out as
+        contiguous blocks of shape (n_items, L, n_features). Future covariates
+        depend on the item only through its last multiindex level, so they are
+        stored once per distinct value and referenced by key. Static covariates
+        are stored as a dense (n_items, n_static) matrix in item index order.
+        """
+        items = pd.DataFrame(
+            list(self._idx2multiidx.values()),
+            columns=list(self._index_names_mapping.keys()),
+        )
+        n_items, n_steps = len(items), self.L
+        scaler = getattr(self, "scaler", None)
+
+        past_covariates = []
+        for feat_name, feat_df in self._past_covariates_cached.items():
+            feat_block = None
+            for (feat_vals, recording_decade), item_idxs in items.groupby(
+                [feat_name, "recording_decade"], sort=False
+            ).indices.items():
+                group_values = feat_df.loc[
+                    :, pd.IndexSlice[feat_vals, recording_decade, :]
+                ].values
+                if feat_block is None:
+                    feat_block = np.empty(
+                        (n_items, n_steps, group_values.shape[1]),
+                        dtype=group_values.dtype,
+                    )
+                feat_block[item_idxs] = group_values
+            past_covariates.append(feat_block)
+
+        sales_ewm = (
+            pd.DataFrame(self.monthly_sales)
+            .ewm(span=self._past_covariates_span, adjust=False)
+            .mean()
+            .values
+        )
+        past_covariates.append(sales_ewm.T[:, :, None])
+
+        past_cov_arr = np.concatenate(past_covariates, axis=2)
+        n_past = past_cov_arr.shape[2]
+        if scaler:
+            past_cov_arr = scaler.transform(
+                past_cov_arr.reshape(-1, n_past)
+            ).reshape(n_items, n_steps, n_past)
+
+        past_cov_arr = np.concatenate(
+            [past_cov_arr, np.moveaxis(self.stock_features, 2, 0)], axis=2
+        ).astype(self.dtype)
+
+        series = self.monthly_sales.T[:, :, None]
+        if scaler is not None:
+            series = scaler.transform(
+                series.reshape(-1, 1)
+            ).reshape(n_items, n_steps, 1)
+
+        future_keys, _ = pd.factorize(items.iloc[:, -1])
+        _, first_item_idxs = np.unique(future_keys, return_index=True)
+        future_covariates = np.stack(
+            [
+                self.get_future_covariates(self._idx2multiidx[item_idx])
+                for item_idx in first_item_idxs
+            ]
+        )
+
+        static_covariates = None
+        static_covariates_mapping = getattr(self, "static_covariates_mapping", None)
+        if static_covariates_mapping is not None:
+            static_covariates = static_covariates_mapping.loc[
+                list(self._multiidx2idx.keys())
+            ].to_numpy(dtype=self.dtype)
+
+        self._sample_arrays_cached = {
+            "series": series,
+            "past_covariates": past_cov_arr,
+            "future_covariates": future_covariates,
+            "future_covariates_keys": future_keys,
+            "static_covariates": static_covariates,
+        }
+
+    def _get_sample_arrays_cache(self):
+        if getattr(self, "_sample_arrays_cached", None) is None:
+            self._build_sample_arrays_cache()
+        return self._sample_arrays_cached
+
+    def __getstate__(self):
+        # Sample arrays are derived data: keep them out of pickles and copies
+        state = self.__dict__.copy()
+        state["_sample_arrays_cached"] = None
+        state["_calendar_covariates_cached"] = None
+        return state
+
     def get_static_covariates(self):
         if self.static_transformer is None:
             return None
@@ -258,12 +594,33 @@ class PlastinkaBaseTSDataset:
 
         return static_covariates
 
-    def get_future_covariates(self, item_multiidx):
+    def _get_calendar_covariates(self):
+        """
+        Returns the item-independent part of the future covariates for the
+        current window: the year index and the (msin, mcos, year) block.
+
+        The result depends only on the window's time index, so it is cached
+        per window and shared by all items.
+        """
         time_index = self.time_index
-        is_hot = time_index.map(lambda x: int(x.year)) == item_multiidx[-1]
-        msin, mcos = transform_months(time_index.map(lambda x: x.month))
-        year = minmax_scale(time_index.map(lambda x: x.year))
-        future_covariates = np.vstack([is_hot, msin, mcos, year]).T.astype(self.dtype)
+        window_key = (time_index[0], time_index[-1], len(time_index))
+
+        calendar_covariates = getattr(self, "_calendar_covariates_cached", None)
+        if calendar_covariates is None:
+            calendar_covariates = self._calendar_covariates_cached = {}
+
+        if window_key not in calendar_covariates:
+            years = pd.Index(time_index.year, dtype=np.int64)
+            msin, mcos = transform_months(pd.Index(time_index.month, dtype=np.int64))
+            year = minmax_scale(years)
+            calendar_covariates[window_key] = (years, np.vstack([msin, mcos, year]).T)
+
+        return calendar_covariates[window_key]
+
+    def get_future_covariates(self, item_multiidx):
+        years, calendar = self._get_calendar_covariates()
+        is_hot = years == item_multiidx[-1]
+        future_covariates = np.hstack([is_hot[:, None], calendar]).astype(self.dtype)
 
         return future_covariates
 
@@ -338,7 +695,7 @@ class PlastinkaBaseTSDataset:
             return True
 
         if copy:
-            ds = deepcopy(self)
+            ds = self._window_view()
         else:
             ds = self
 
@@ -356,10 +713,10 @@ class PlastinkaBaseTSDataset:
             if scaler:
                 ds.set_scaler(scaler)
 
-            self.static_features = static_features
+            ds.static_features = static_features
             if transformer:
                 ds.set_static_transformer(transformer)
-                self.static_covariates_mapping = self.get_static_covariates()
+                ds.static_covariates_mapping = ds.get_static_covariates()
 
             if weights_alpha is not None:
                 ds.set_reweight_fn(weights_alpha)
@@ -368,6 +725,8 @@ class PlastinkaBaseTSDataset:
                 ds._idx_mapping = ds._build_index_mapping()
 
             ds.prepare_past_covariates(span)
+            # Built on the first sample access, see `_get_sample_arrays_cache`
+            ds._sample_arrays_cached = None
 
             return ds
 
@@ -385,14 +744,65 @@ class PlastinkaBaseTSDataset:
             )
             raise e
 
+    def _window_view(self):
+        """
+        Returns a shallow copy of the dataset for `setup_dataset(copy=True)`.
+
+        The copy shares the raw sales and stock arrays, index dictionaries and
+        fitted transformers with the source; it owns only its window bounds,
+        index mapping and derived caches. Everything `setup_dataset` changes
+        is reassigned rather than modified in place, so the two never see
+        each other's changes. The shared arrays are exposed read-only to the
+        copy: code that needs to modify them must replace them with a new
+        array, as the inference dataset does when padding.
+        """
+        ds = self.__class__.__new__(self.__class__)
+        ds.__dict__.update(self.__getstate__())
+        for name in ("_monthly_sales", "_stock_features"):
+            arr = getattr(self, name).view()
+            arr.flags.writeable = False
+            setattr(ds, name, arr)
+        return ds
+
     def _build_index_mapping(self):
-        current_index = 0
-        self._index_mapping, _index_mapping = {}, {}
-        for i in range(len(self)):
-            if self._sample_is_valid(i):
-                _index_mapping[current_index] = i
-                current_index += 1
-        self._index_mapping = _index_mapping
+        self._index_mapping = {}
+        valid_mask = self._get_valid_samples_mask()
+        # Raw sample index is item * outputs_per_array + window start
+        valid_indices = np.flatnonzero(valid_mask.T.ravel())
+        self._index_mapping = dict(enumerate(valid_indices.tolist()))
+
+    def _get_valid_samples_mask(self):
+        """
+        Bulk equivalent of `_sample_is_valid` over all raw sample indices.
+
+        Returns a boolean array of shape (outputs_per_array, n_items) where
+        element [s, i] tells whether the window starting at `s` for item `i`
+        is a valid sample.
+        """
+        n_items = self.monthly_sales.shape[1]
+        starts = np.arange(max(self.outputs_per_array, 0))
+        length = self.input_chunk_length + self.output_chunk_length
+        ends = np.where(starts + length < self._n_time_steps, starts + length, self.L)
+
+        positive_cumsum = np.vstack(
+            [
+                np.zeros((1, n_items), dtype=np.int64),
+                np.cumsum(self.monthly_sales > 0.0, axis=0),  # scaled zero
+            ]
+        )
+        enough_sales = (
+            (positive_cumsum[ends] - positive_cumsum[starts])
+            >=
+            self.minimum_sales_months
+        )
+
+        if self._allow_empty_stock:
+            return enough_sales
+
+        target_stock = self.stock_features[-self.output_chunk_length :]
+        in_stock = np.any(target_stock, axis=(0, 1))
+
+        return enough_sales & in_stock[None, :]
 
     def _sample_is_valid(self, index):
         index, start_index, end_index = self._project_index(index)
@@ -423,6 +833,7 @@ class PlastinkaBaseTSDataset:
 
             return weights
 
+        self._weights_alpha = alpha
         self.reweight_fn = reweight_fn
 
     def reset_window(self, copy: bool = True):
@@ -433,31 +844,28 @@ class PlastinkaBaseTSDataset:
     def _get_raw_sample_arrays(self, array_index, start_index, end_index):
         """
         Extracts raw NumPy arrays for a given index, common to both training and inference datasets.
+        Static covariates are returned as a (1, n_static) array, or None.
         """
         end_index_safe = end_index if end_index is not None else self._n_time_steps
+        cache = self._get_sample_arrays_cache()
 
-        series_item = np.expand_dims(
-            self.monthly_sales[start_index:end_index_safe, array_index], axis=1
-        )
-        item_multiidx = self._idx2multiidx[array_index]
-        # Renamed for clarity as per user's suggestion
-        future_covariates_item = self.get_future_covariates(item_multiidx)
+        series_item = cache["series"][array_index, start_index:end_index_safe]
+        future_covariates_item = cache["future_covariates"][
+            cache["future_covariates_keys"][array_index]
+        ]
         historic_future_covariates_item = future_covariates_item[
             start_index: end_index_safe - self.output_chunk_length
         ]
         future_covariates_item_output_chunk = future_covariates_item[
             end_index_safe - self.output_chunk_length: end_index_safe
         ]
-        past_covariates_item = self.get_past_covariates(item_multiidx)[
-            start_index:end_index_safe
+        past_covariates_item = cache["past_covariates"][
+            array_index, start_index:end_index_safe
         ]
 
         static_covariates_item = None
-        if self.static_covariates_mapping is not None:
-            static_covariates_item = self.static_covariates_mapping.loc[item_multiidx]
-
-        if self.scaler is not None:
-            series_item = self.scaler.transform(series_item)
+        if cache["static_covariates"] is not None:
+            static_covariates_item = cache["static_covariates"][array_index][None, :]
 
         soft_availability = np.expand_dims(
             past_covariates_item[: -self.output_chunk_length, -1], 1
@@ -475,6 +883,58 @@ class PlastinkaBaseTSDataset:
             reweight_fn_output,
         )
 
+    def _get_raw_batch_arrays(self, indices):
+        """
+        Batch counterpart of `_project_index` + `_get_raw_sample_arrays`.
+
+        Gathers the samples for `indices` with fancy indexing into the sample
+        arrays cache. Returns arrays stacked along a leading batch axis, in
+        the same order as `_get_raw_sample_arrays`; static covariates are
+        of shape (batch, 1, n_static).
+        """
+        raw_indices = np.asarray(indices, dtype=np.int64)
+        if self._index_mapping:
+            raw_indices = np.fromiter(
+                (self._index_mapping[i] for i in raw_indices.tolist()),
+                dtype=np.int64,
+                count=len(raw_indices),
+            )
+        array_indices = raw_indices // self.outputs_per_array
+        start_indices = raw_indices % self.outputs_per_array
+
+        length = self.input_chunk_length + self.output_chunk_length
+        cache = self._get_sample_arrays_cache()
+        rows = array_indices[:, None]
+        steps = start_indices[:, None] + np.arange(length)
+
+        series = cache["series"][rows, steps]
+        past_covariates = cache["past_covariates"][rows, steps]
+        future_covariates = cache["future_covariates"][
+            cache["future_covariates_keys"][rows], steps
+        ]
+        historic_future_covariates = future_covariates[:, : -self.output_chunk_length]
+        future_covariates_output_chunk = future_covariates[
+            :, -self.output_chunk_length :
+        ]
+
+        static_covariates = None
+        if cache["static_covariates"] is not None:
+            static_covariates = cache["static_covariates"][array_indices][:, None, :]
+
+        soft_availability = past_covariates[:, : -self.output_chunk_length, -1:]
+        reweight_fn_output = self.reweight_fn(
+            series[:, : -self.output_chunk_length] * soft_availability
+        )
+
+        return (
+            series,
+            past_covariates,
+            historic_future_covariates,
+            future_covariates_output_chunk,
+            static_covariates,
+            reweight_fn_output,
+        )
+
     def __len__(self):
         if self._index_mapping:
             return len(self._index_mapping)
@@ -574,22 +1034,70 @@ class PlastinkaTrainingTSDataset(PlastinkaBaseTSDataset, TorchTrainingDataset):
         past_target = series_item[: -self.output_chunk_length]
         future_target = series_item[-self.output_chunk_length :]
 
-        static_covariates_item_array = None
-        if static_covariates_item is not None:
-            static_covariates_item_array = np.expand_dims(
-                static_covariates_item.values, 1
-            ).T
         output = (
             past_target,
             past_covariates_item[: -self.output_chunk_length], # Past part of past_covariates
             historic_future_covariates_item,
             future_covariates_item_output_chunk,
-            static_covariates_item_array,
+            static_covariates_item,
             reweight_fn_output,
             future_target,
         )
         return output
 
+    def __getitems__(self, indices):
+        """
+        Returns the samples for `indices` as one pre-stacked batch.
+
+        The layout matches `__getitem__` with a leading batch axis. The
+        DataLoader must use `collate_fn`, which only converts the arrays to
+        tensors.
+        """
+        (
+            series,
+            past_covariates,
+            historic_future_covariates,
+            future_covariates_output_chunk,
+            static_covariates,
+            reweight_fn_output,
+        ) = self._get_raw_batch_arrays(indices)
+
+        return _StackedBatch(
+            (
+                series[:, : -self.output_chunk_length],
+                past_covariates[:, : -self.output_chunk_length],
+                historic_future_covariates,
+                future_covariates_output_chunk,
+                static_covariates,
+                reweight_fn_output,
+                series[:, -self.output_chunk_length :],
+            )
+        )
+
+    @staticmethod
+    def collate_fn(batch):
+        """
+        DataLoader collate function for `__getitems__` batches.
+
+        Lists of `__getitem__` samples are stacked first, as the Darts
+        collate does.
+        """
+        import torch
+
+        if not isinstance(batch, _StackedBatch):
+            batch = [
+                None if samples[0] is None else np.stack(samples)
+                for samples in zip(*batch)
+            ]
+        return tuple(
+            torch.from_numpy(np.ascontiguousarray(arr)) if arr is not None else None
+            for arr in batch
+        )
+
+
+class _StackedBatch(tuple):
+    """Marks a batch already stacked by `PlastinkaTrainingTSDataset.__getitems__`."""
+
 
 class PlastinkaInferenceTSDataset(PlastinkaBaseTSDataset, TorchInferenceDataset):
     def __init__(self, *args, **kwargs):
@@ -622,7 +1130,7 @@ class PlastinkaInferenceTSDataset(PlastinkaBaseTSDataset, TorchInferenceDataset)
         self.reset_window()
 
         if self.save_dir is not None:
-            logger.info(f"Saving inference dataset to {self.save_dir}/{self.dataset_name}.dill")
+            logger.info(f"Saving inference dataset to {self.save_dir}/{self.dataset_name}")
             self.save(self.save_dir, self.dataset_name)
 
     def __getitem__(self, idx):
@@ -637,28 +1145,15 @@ class PlastinkaInferenceTSDataset(PlastinkaBaseTSDataset, TorchInferenceDataset)
             _, # reweight_fn_output not needed for inference __getitem__
         ) = self._get_raw_sample_arrays(array_index, start_index, end_index)
 
-        # Darts InferenceDataset expects a SeriesSchema for target_series (7th element)
-        # and pred_time (8th element).
-        time_index_for_ts = self.time_index[start_index: end_index] # Use unpacked start_index, end_index
-
-        # This is a workaround because Darts doesn't provide a direct way to build SeriesSchema
-        # without a TimeSeries object from raw data, but expects a SeriesSchema from __getitem__.
-
-        static_covariates_item_array = None
-        if static_covariates_item is not None:
-            static_covariates_item_array = np.expand_dims(
-                static_covariates_item.values, 1
-            ).T
-
-        dummy_ts = TimeSeries.from_times_and_values(
-            times=time_index_for_ts,
-            values=series_item,
-            static_covariates=static_covariates_item,
-        )
+        # Darts InferenceDataset expects the target series schema (7th element)
+        # and the prediction start time (8th element).
+        target_series_schema = self._get_series_schema(static_covariates_item)
 
-        target_series_schema = dummy_ts.schema  # Extract the schema
-
-        pred_time = dummy_ts.time_index[-self.output_chunk_length] # The time of the first point in the forecast horizon
+        end_index_safe = end_index if end_index is not None else self._n_time_steps
+        # The time of the first point in the forecast horizon
+        pred_time = self._time_index[
+            self.start + end_index_safe - self.output_chunk_length
+        ]
 
         # Align with TorchInferenceDatasetOutput signature:
         # (past_target, past_covariates, future_past_covariates, historic_future_covariates, future_covariates, static_covariates, target_series_schema, pred_time)
@@ -668,12 +1163,48 @@ class PlastinkaInferenceTSDataset(PlastinkaBaseTSDataset, TorchInferenceDataset)
             None, # future_past_covariates (not explicitly generated by your current logic)
             historic_future_covariates_item, # historic_future_covariates
             future_covariates_item_output_chunk, # future_covariates
-            static_covariates_item_array, # static_covariates
+            static_covariates_item, # static_covariates
             target_series_schema, # target_series (now SeriesSchema)
             pred_time, # pred_time
         )
         return output
 
+    def _get_series_schema(self, static_covariates_item=None):
+        """
+        Returns the `TimeSeries.schema()` of an item's target series.
+
+        Everything but the static covariates is the same for all items, so it
+        is computed once per dataset instead of building a `TimeSeries` for
+        every sample.
+        """
+        base_schema = getattr(self, "_series_schema_cached", None)
+        if base_schema is None:
+            time_freq = self._time_index.freq
+            if time_freq is None:
+                time_freq = pd.tseries.frequencies.to_offset(
+                    pd.infer_freq(self._time_index)
+                )
+            base_schema = {
+                "time_freq": time_freq,
+                "time_name": self._time_index.name,
+                "columns": pd.Index(["0"]),
+                "static_covariates": None,
+                "hierarchy": None,
+                "metadata": None,
+            }
+            self._series_schema_cached = base_schema
+
+        schema = dict(base_schema)
+        if static_covariates_item is not None:
+            schema["static_covariates"] = pd.DataFrame(
+                static_covariates_item,
+                index=base_schema["columns"],
+                columns=pd.Index(
+                    self.static_covariates_mapping.columns, name="static_covariates"
+                ),
+            )
+        return schema
+
     def reset_window(self):
         if self._n_time_steps:
             self.setup_dataset(
@@ -893,7 +1424,8 @@ def validate_feature_date_columns(df: pd.DataFrame) -> pd.DataFrame:
         (validated["release_type"] != "Оригинал")
         & (validated["release_year"].notna())
     ]
-    if len(valid_rereleases) > 10:
+    rerelease_counts = _row_counts(valid_rereleases)
+    if rerelease_counts.sum() > 10:
         diff_years = (
             valid_rereleases["release_year"]
             - valid_rereleases["recording_year"]
@@ -901,7 +1433,10 @@ def validate_feature_date_columns(df: pd.DataFrame) -> pd.DataFrame:
         # Check for valid (non-NaN) differences before calculating mean
         mean_gap = 15
         if not diff_years.empty and not diff_years.isnull().all():
-            mean_gap = diff_years.mean()
+            mean_gap = (
+                diff_years.mul(rerelease_counts).sum()
+                / rerelease_counts[diff_years.notna()].sum()
+            )
             if pd.notna(mean_gap):
                 mean_gap = int(round(mean_gap))
 
@@ -938,11 +1473,8 @@ def validate_date_columns(
         idx = validated["created_date"] > validated["sold_date"]
         validated.loc[idx, "created_date"] = validated.loc[idx, "sold_date"]
 
-        dominant_month_period = (
-            validated["sold_date"]
-            .dt
-            .to_period('M')
-            .mode()[0]
+        dominant_month_period = _weighted_mode(
+            validated["sold_date"].dt.to_period('M'), _row_counts(validated)
         )
         outlier_mask = (
             validated["sold_date"]
@@ -958,31 +1490,54 @@ def validate_date_columns(
     return validated
 
 
+def _row_counts(df: pd.DataFrame) -> pd.Series:
+    """Raw rows behind each row of `df`, see `ROW_COUNT_COLUMN`."""
+    if ROW_COUNT_COLUMN in df.columns:
+        return df[ROW_COUNT_COLUMN]
+    return pd.Series(1, index=df.index)
+
+
+def _weighted_mode(values: pd.Series, counts: pd.Series):
+    """`values.mode()[0]` with each value counted `counts` times."""
+    # Sorted totals, so ties go to the smallest value as in `Series.mode`
+    return counts.groupby(values).sum().idxmax()
+
+
+def _group_modes(df: pd.DataFrame, keys: list[str], column: str) -> pd.Series:
+    """
+    Most frequent non-null `column` value of each row's `keys` group, with
+    ties going to the smallest value as in `Series.mode`. Rows whose group
+    has no values or a missing key get NaN.
+    """
+    counts = (
+        _row_counts(df)
+        .groupby([df[key] for key in [*keys, column]], observed=True)
+        .sum()
+        .rename("_count")
+        .reset_index()
+    )
+    modes = (
+        counts
+        .sort_values(["_count", column], ascending=[False, True], kind="stable")
+        .drop_duplicates(keys)
+        .drop(columns="_count")
+    )
+    row_modes = df[keys].merge(modes, on=keys, how="left")[column]
+    return pd.Series(row_modes.to_numpy(), index=df.index, name=column)
+
+
 def validate_categories(df: pd.DataFrame) -> pd.DataFrame:
     validated = df.copy()
 
-    def _mode_or_first(series: pd.Series):
-        non_null = series.dropna()
-        if non_null.empty:
-            return np.nan
-        mode_vals = non_null.mode()
-        if not mode_vals.empty:
-            return mode_vals.iloc[0]
-        return non_null.iloc[0]
-
     for gpouping_cols in [
         ["artist", "album", "release_decade"],
         ["price_category", "release_decade"],
     ]:
-        fill_vals = (
-            validated
-            .groupby(gpouping_cols, observed=True)["cover_type"]
-            .transform(_mode_or_first)
-        )
+        fill_vals = _group_modes(validated, gpouping_cols, "cover_type")
         validated["cover_type"] = validated["cover_type"].fillna(fill_vals)
 
-    validated["cover_type"] = validated["cover_type"].map(
-        lambda x: "Sealed" if x == "SS" else "Opened"
+    validated["cover_type"] = (
+        validated["cover_type"].eq("SS").map({True: "Sealed", False: "Opened"})
     )
     return validated
 
@@ -990,27 +1545,20 @@ def validate_categories(df: pd.DataFrame) -> pd.DataFrame:
 def validate_styles(df: pd.DataFrame) -> pd.DataFrame:
     validated = df.copy()
     validated = validated.fillna({"style": "None"})
-    for (artist, album), group in validated.groupby(
-        [
-            "artist",
-            "album",
-        ]
-    ):
-        try:
-            if len(group) > 1:
-                validated.loc[
-                    (validated["artist"] == artist)
-                    & (validated["album"] == album),
-                    "style",
-                ] = group["style"].mode().values[0]
-        except Exception:
-            pass
+    # Every (artist, album) gets its most frequent style; rows with a
+    # missing key keep theirs
+    validated["style"] = _group_modes(
+        validated, ["artist", "album"], "style"
+    ).fillna(validated["style"])
 
     return validated
 
 
-def process_raw(df: pd.DataFrame, bins=None) -> pd.DataFrame:
-    
+def _clean_raw_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The row-by-row part of `process_raw`: normalizes barcodes, drops rows
+    without the required values and casts prices.
+    """
     validated = df.fillna({"barcode": "None"})
     validated.loc[:, "barcode"] = validated["barcode"].map(
         lambda x: x.replace(" ", "").lstrip("0")
@@ -1029,6 +1577,17 @@ def process_raw(df: pd.DataFrame, bins=None) -> pd.DataFrame:
         validated["price"], errors='coerce'
     ).astype("int64")
 
+    return validated
+
+
+def process_raw(df: pd.DataFrame, bins=None) -> pd.DataFrame:
+    """
+    Validates and types a raw upload. A frame of distinct rows with their
+    counts in `ROW_COUNT_COLUMN` gives the same statistics as the rows it
+    stands for, and keeps the counts.
+    """
+    validated = _clean_raw_rows(df)
+
     validated, bins = categorize_prices(validated, bins)
     validated = validate_feature_date_columns(validated)
     validated = categorize_dates(validated)
@@ -1038,7 +1597,10 @@ def process_raw(df: pd.DataFrame, bins=None) -> pd.DataFrame:
     coltypes = dict(filter(lambda x: x[0] in validated.columns, COLTYPES.items()))
     datecols = [col for col in validated.columns if col in ["created_date", "sold_date"]]
 
-    validated = validated[list(coltypes.keys())]
+    kept_columns = list(coltypes.keys())
+    if ROW_COUNT_COLUMN in validated.columns:
+        kept_columns.append(ROW_COUNT_COLUMN)
+    validated = validated[kept_columns]
     validated = validated.dropna()
     
     # Validate that we have data after processing
@@ -1108,7 +1670,14 @@ def categorize_prices(
 
     if bins is None:
         try:
-            df["price_category"], bins = pd.qcut(prices, q=q, retbins=True, duplicates='drop')
+            if ROW_COUNT_COLUMN in df.columns:
+                # Quantiles are taken over the raw rows
+                _, bins = pd.qcut(
+                    prices.repeat(df[ROW_COUNT_COLUMN]), q=q, retbins=True, duplicates='drop'
+                )
+                df["price_category"] = pd.cut(prices, bins=bins, include_lowest=True)
+            else:
+                df["price_category"], bins = pd.qcut(prices, q=q, retbins=True, duplicates='drop')
         except ValueError as e:
             if "Bin edges must be unique" in str(e) or "Too many duplicate edges" in str(e):
                 raise ValueError(
@@ -1199,11 +1768,18 @@ def _init_stock(
     stock_path: str,
     all_keys: Sequence[str],
     cutoff_date: pd.Timestamp | None = None,
-    bins: pd.IntervalIndex | None = None
+    bins: pd.IntervalIndex | None = None,
+    cache_dir: str | Path | None = None,
+    csv_memory_limit_mb: float | None = None,
+    excel_engine: str | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
-    stock_df = read_data_file(path=stock_path)
-
-    preprocessed_stock_df = process_raw(stock_df, bins=bins)
+    preprocessed_stock_df = read_processed_file(
+        stock_path,
+        bins=bins,
+        cache_dir=cache_dir,
+        csv_memory_limit_mb=csv_memory_limit_mb,
+        excel_engine=excel_engine,
+    )
 
     filtered_stock_df = filter_by_date(preprocessed_stock_df, cutoff_date)
     
@@ -1239,20 +1815,121 @@ def _get_sales_files_paths(sales_path: str) -> list[Path]:
     return sales_files
 
 
+def _csv_rows_per_chunk(src, encoding: str, memory_limit_mb: float) -> int:
+    """
+    Chunk size in rows that keeps a parsed CSV chunk within the memory limit,
+    estimated from the in-memory size of the first rows.
+    """
+    sample = pd.read_csv(src, dtype=str, encoding=encoding, nrows=1000)
+    if hasattr(src, "seek"):
+        src.seek(0)
+    if sample.empty:
+        return 1000
+    bytes_per_row = sample.memory_usage(index=False, deep=True).sum() / len(sample)
+    # The raw chunk and its cleaned copy coexist while a chunk is reduced
+    return max(1, int(memory_limit_mb * 2**20 / (2 * bytes_per_row)))
+
+
+def _count_distinct_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Distinct rows of `df`, in order of first appearance, with the raw rows
+    they stand for in `ROW_COUNT_COLUMN`.
+    """
+    columns = [column for column in df.columns if column != ROW_COUNT_COLUMN]
+    return (
+        _row_counts(df)
+        .groupby([df[column] for column in columns], sort=False, dropna=False)
+        .sum()
+        .rename(ROW_COUNT_COLUMN)
+        .reset_index()
+    )
+
+
+def _read_csv_chunked(src, encoding: str, memory_limit_mb: float) -> pd.DataFrame:
+    """
+    Reads a CSV as strings in chunks, reduced to its distinct clean rows.
+
+    Each chunk is renamed, cleaned as in `process_raw` and reduced to its
+    distinct rows with their counts in `ROW_COUNT_COLUMN`. Only these
+    partials are kept, merged as they grow, so memory follows the distinct
+    rows of the file rather than its length.
+    """
+    chunk_rows = _csv_rows_per_chunk(src, encoding, memory_limit_mb)
+    # Source headers and headers already using the canonical names
+    mapped_columns = set(COLUMN_MAPPING) | set(COLUMN_MAPPING.values())
+    merged, partials, partial_rows = [], [], 0
+    for chunk in pd.read_csv(
+        src,
+        dtype=str,
+        encoding=encoding,
+        usecols=lambda column: column in mapped_columns,
+        chunksize=chunk_rows,
+    ):
+        chunk = _clean_raw_rows(chunk.rename(columns=COLUMN_MAPPING))
+        partials.append(_count_distinct_rows(chunk))
+        partial_rows += len(partials[-1])
+        # Merging once the partials outgrow both a chunk and the merged rows
+        # keeps memory near the distinct rows and the merges linear overall
+        if partial_rows > max(chunk_rows, sum(map(len, merged))):
+            merged = [_count_distinct_rows(pd.concat([*merged, *partials]))]
+            partials, partial_rows = [], 0
+
+    return _count_distinct_rows(pd.concat([*merged, *partials]))
+
+
+def _excel_engines(preferred: str | None = None) -> list[str | None]:
+    """
+    Excel engines to try in order: `preferred` if it is usable, then the
+    default pandas engine (None) for the workbook format.
+    """
+    if preferred is None:
+        return [None]
+    module = EXCEL_ENGINES.get(preferred)
+    if module is not None and importlib.util.find_spec(module) is None:
+        logger.warning(f"Excel engine {preferred} needs {module}, using the default engine")
+        return [None]
+    return [preferred, None]
+
+
+def _is_excel_file(src) -> bool:
+    """Sniffs an Excel workbook from the leading bytes of a path or binary file."""
+    if hasattr(src, "read"):
+        position = src.tell()
+        head = src.read(8)
+        src.seek(position)
+    else:
+        with open(src, "rb") as f:
+            head = f.read(8)
+    return isinstance(head, bytes) and head.startswith(EXCEL_MAGIC_BYTES)
+
+
 def read_data_file(
     file: io.BytesIO | None = None, 
     path: "Path" = None, 
     encoding: str = None, 
-    sheet_name: str = None
+    sheet_name: str = None,
+    csv_memory_limit_mb: float | None = None,
+    excel_engine: str | None = None,
 ) -> "pd.DataFrame":
     """
     Read data from CSV or Excel file with improved error handling.
 
+    The format is sniffed from the content, the extension only has to be a
+    supported one. Excel workbooks are parsed with the default pandas engine
+    unless `excel_engine` asks for another one to be tried first.
+
     Args:
         file: File object (takes priority over path)
         path: Path to file
         encoding: Text encoding for CSV files (ignored for Excel)
         sheet_name: Excel sheet name (if None and multiple sheets, raises error)
+        csv_memory_limit_mb: If set, CSV files are streamed in chunks sized to
+            about this much memory, unmapped columns are never loaded, and
+            the result holds the distinct cleaned rows with their counts in
+            `ROW_COUNT_COLUMN` (see `_read_csv_chunked`).
+        excel_engine: pandas Excel engine to try first, e.g. 'calamine'
+            (see `EXCEL_ENGINES`), falling back to the default engine if it
+            is not installed or fails. Cell types may differ from the default.
 
     Returns:
         DataFrame with standardized column names
@@ -1277,12 +1954,12 @@ def read_data_file(
             except Exception:
                 pass
 
-    def _read_excel_from_source(src) -> pd.DataFrame:
+    def _read_excel_with_engine(src, engine: str | None) -> pd.DataFrame:
         """Read Excel file with proper sheet handling."""
         if sheet_name is not None:
-            return pd.read_excel(src, sheet_name=sheet_name, dtype=str)
+            return pd.read_excel(src, sheet_name=sheet_name, dtype=str, engine=engine)
         
-        with pd.ExcelFile(src) as xls:
+        with pd.ExcelFile(src, engine=engine) as xls:
             if len(xls.sheet_names) != 1:
                 raise ValueError(
                     f"Excel file has {len(xls.sheet_names)} sheets: "
@@ -1290,6 +1967,18 @@ def read_data_file(
                 )
             return pd.read_excel(xls, sheet_name=xls.sheet_names[0], dtype=str)
 
+    def _read_excel_from_source(src) -> pd.DataFrame:
+        """Read Excel file, falling back to the default engine."""
+        *fast_engines, default_engine = _excel_engines(excel_engine)
+        for engine in fast_engines:
+            _seek_start(src)
+            try:
+                return _read_excel_with_engine(src, engine)
+            except Exception as e:
+                logger.warning(f"Excel engine {engine} failed, falling back: {e}")
+        _seek_start(src)
+        return _read_excel_with_engine(src, default_engine)
+
     def _read_csv_from_source(src) -> pd.DataFrame:
         """Read CSV file with encoding fallback."""
         encodings = [encoding] if encoding else [
@@ -1299,6 +1988,9 @@ def read_data_file(
         
         for enc in encodings:
             try:
+                if csv_memory_limit_mb is not None:
+                    _seek_start(src)
+                    return _read_csv_chunked(src, enc, csv_memory_limit_mb)
                 return pd.read_csv(src, dtype=str, encoding=enc)
             except UnicodeDecodeError as e:
                 last_err = e
@@ -1308,49 +2000,193 @@ def read_data_file(
 
     # Priority: file object over path
     if file is not None and path is None:
-        _seek_start(file)
-        
-        # Try Excel first, then CSV
-        try:
-            _seek_start(file)
-            df = _read_excel_from_source(file)
-        except Exception:
-            _seek_start(file)
-            try:
-                df = _read_csv_from_source(file)
-            finally:
-                _seek_start(file)
+        readable = file
     else:
-        # Read from path
         ext = (provided_path.suffix or "").lower()
-        readable = file if file else provided_path
-        if ext in {".xlsx", ".xls"}:
-            df = _read_excel_from_source(readable)
-        elif ext == ".csv":
-            df = _read_csv_from_source(readable)
-        else:
+        if ext not in {".xlsx", ".xls", ".csv"}:
             raise ValueError(
                 f"Unsupported file extension: {provided_path.suffix!r}"
             )
+        readable = file if file else provided_path
+
+    _seek_start(readable)
+    try:
+        if _is_excel_file(readable):
+            df = _read_excel_from_source(readable)
+        else:
+            df = _read_csv_from_source(readable)
+    finally:
+        _seek_start(readable)
 
     # Post-process: rename columns and validate
     df = df.rename(columns=COLUMN_MAPPING)
 
-    return df[[c for c in df.columns if c in set(COLUMN_MAPPING.values())]]
+    return df[
+        [c for c in df.columns if c in {*COLUMN_MAPPING.values(), ROW_COUNT_COLUMN}]
+    ]
 
 
-def _preprocess_sort_sales(sales_files_paths: list[Path], bins: pd.IntervalIndex) -> OrderedDict:
-    monthly_dfs = {}
-    for path in sales_files_paths:
-        df = process_raw(read_data_file(path=path), bins=bins)
-        if not df.empty and "sold_date" in df.columns:
-            month = pd.to_datetime(
-                df["sold_date"]
-                .mode()[0]
-                .to_period('M')
-                .start_time
+def _processed_file_cache_key(
+    path: Path, bins: pd.IntervalIndex | None, excel_engine: str | None = None
+) -> str:
+    """
+    Content hash of a raw file plus everything else `process_raw` output
+    depends on: the price bins, the current year (decade labels and year
+    clipping), the requested Excel engine and the cache format version.
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+
+    bins_key = (
+        "None"
+        if bins is None
+        else f"{bins.closed}:{bins.left.tolist()}:{bins.right.tolist()}"
+    )
+    hasher.update(
+        f"|{PROCESSED_FILE_CACHE_VERSION}|{datetime.now().year}|{bins_key}".encode()
+    )
+    if excel_engine is not None:
+        hasher.update(f"|{excel_engine}".encode())
+    return hasher.hexdigest()
+
+
+def read_processed_file(
+    path: Path,
+    bins: pd.IntervalIndex | None = None,
+    cache_dir: str | Path | None = None,
+    csv_memory_limit_mb: float | None = None,
+    excel_engine: str | None = None,
+) -> pd.DataFrame:
+    """
+    `read_data_file` followed by `process_raw`, cached on disk by content.
+
+    With `cache_dir` set, the processed DataFrame is stored there as
+    `<content hash>.parquet`, so re-sent files skip parsing and validation.
+    Cache failures are logged and fall back to processing the file.
+    `csv_memory_limit_mb` and `excel_engine` are passed to `read_data_file`;
+    with the limit, CSV files give distinct rows with their counts in
+    `ROW_COUNT_COLUMN`, which the later steps treat as the rows they stand
+    for, so both forms of an entry are interchangeable.
+    """
+    def _read_and_process():
+        raw_df = read_data_file(
+            path=path, csv_memory_limit_mb=csv_memory_limit_mb, excel_engine=excel_engine
+        )
+        return process_raw(raw_df, bins=bins)
+
+    if cache_dir is None:
+        return _read_and_process()
+
+    cache_dir = Path(cache_dir)
+    cache_path = cache_dir / f"{_processed_file_cache_key(path, bins, excel_engine)}.parquet"
+    if cache_path.exists():
+        try:
+            df = pd.read_parquet(cache_path)
+            # Retention cleanup removes entries by time since last use
+            os.utime(cache_path)
+            return df
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry {cache_path}: {e}")
+
+    df = _read_and_process()
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Could not cache processed {path} in {cache_dir}: {e}")
+
+    return df
+
+
+def _preprocess_sales_file(
+    path: Path,
+    bins: pd.IntervalIndex,
+    cache_dir: str | Path | None = None,
+    csv_memory_limit_mb: float | None = None,
+    excel_engine: str | None = None,
+) -> tuple[pd.Timestamp, pd.DataFrame] | None:
+    """Reads and processes one sales file, keyed by its dominant sales month."""
+    df = read_processed_file(
+        path,
+        bins=bins,
+        cache_dir=cache_dir,
+        csv_memory_limit_mb=csv_memory_limit_mb,
+        excel_engine=excel_engine,
+    )
+    if df.empty or "sold_date" not in df.columns:
+        return None
+    month = pd.to_datetime(
+        _weighted_mode(df["sold_date"], _row_counts(df))
+        .to_period('M')
+        .start_time
+    )
+    return month, df
+
+
+def _worker_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for the parsing worker processes.
+
+    Workers must not be forked from the caller, which may be a threaded
+    server holding locks and open database connections. The fork server is
+    a fresh process that imports this module once, so workers start without
+    paying for the import each time; where it is unavailable workers are
+    spawned.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _preprocess_sort_sales(
+    sales_files_paths: list[Path],
+    bins: pd.IntervalIndex,
+    max_workers: int | None = 1,
+    cache_dir: str | Path | None = None,
+    csv_memory_limit_mb: float | None = None,
+    excel_engine: str | None = None,
+) -> OrderedDict:
+    """
+    Processes sales files and orders them from the latest month to the earliest.
+
+    Files are independent, so with `max_workers` other than 1 they are parsed
+    in a process pool (`None` uses all CPUs), see `_worker_context`. Results are collected in input
+    order, so a later file still replaces an earlier one for the same month.
+    See `read_processed_file` for `cache_dir`, `excel_engine` and
+    `csv_memory_limit_mb`, which applies to each worker separately.
+    """
+    # Directory globs may list the same file more than once; keep its last
+    # occurrence, which is the one that decided the result before
+    sales_files_paths = list(dict.fromkeys(sales_files_paths[::-1]))[::-1]
+
+    if max_workers != 1 and len(sales_files_paths) > 1:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=_worker_context()
+        ) as executor:
+            results = list(
+                executor.map(
+                    _preprocess_sales_file,
+                    sales_files_paths,
+                    repeat(bins, len(sales_files_paths)),
+                    repeat(cache_dir, len(sales_files_paths)),
+                    repeat(csv_memory_limit_mb, len(sales_files_paths)),
+                    repeat(excel_engine, len(sales_files_paths)),
+                )
             )
-            monthly_dfs[month] = df
+    else:
+        results = [
+            _preprocess_sales_file(path, bins, cache_dir, csv_memory_limit_mb, excel_engine)
+            for path in sales_files_paths
+        ]
+
+    monthly_dfs = dict(result for result in results if result is not None)
     return OrderedDict(sorted(monthly_dfs.items(), reverse=True))  # reverse=True для обработки от позднего к раннему
 
 
@@ -1359,16 +2195,30 @@ def _get_grouped_df(
     group_keys: Sequence[str],
 ) -> pd.DataFrame:
     
+    """
+    Counts rows and averages prices per group, as `process_movements` would
+    per group, with vectorized aggregations over the whole frame. Rows count
+    as many raw rows as `ROW_COUNT_COLUMN` says.
+    """
     group_keys = [k for k in group_keys if k in processed_df.columns]
+    counts = _row_counts(processed_df).astype("float64")
+    # Column order and float counts follow the per-group Series of
+    # process_movements
     preprocessed_df = (
-        processed_df
+        pd.DataFrame(
+            {
+                "price": processed_df["price"].astype("float64") * counts,
+                "count": counts,
+            }
+        )
         .groupby(
-            group_keys, 
+            [processed_df[k] for k in group_keys],
             sort=False,
             observed=True)
-        .apply(process_movements)
-        .sort_index(axis=1, ascending=False)
+        .sum()
     )
+    # Prices are integers, so the sums are exact and this equals the mean
+    preprocessed_df["price"] /= preprocessed_df["count"]
 
     return preprocessed_df
 
@@ -1377,9 +2227,15 @@ def _process_grouped_df(
         grouped_df: pd.DataFrame, 
         all_keys: Sequence[str], 
         keys_no_dates: Sequence[str],
-        cutoff_date: pd.Timestamp | None = None
     ):
-    """Process sales data to create sales, movement, and prices DataFrames."""
+    """
+    Process sales data to create sales, movement, and prices DataFrames.
+
+    Only the month's own rows are used: arrivals are kept from the month's
+    first sale on, and the upload-wide cutoff date is applied afterwards by
+    `_apply_cutoff_date`. The sold and arrived counts are returned as well
+    for that step.
+    """
 
     def _prune_arrival_dates(
             arrived: pd.DataFrame, 
@@ -1424,25 +2280,30 @@ def _process_grouped_df(
         )
     ).squeeze()
 
-    arrived = (
-        grouped_df
-        .pipe(
-            (filter_by_date, 'df'), 
-            cutoff_date=cutoff_date
-        ).groupby(
-            arrived_keys
-        ).agg(
-            inflow=(
-                "count", 
-                "sum"
-            )
-        ).squeeze())
+    arrived = grouped_df.groupby(
+        arrived_keys
+    ).agg(
+        inflow=(
+            "count", 
+            "sum"
+        )
+    ).squeeze()
 
     arrived.rename_axis(index={"created_date": "_date"}, inplace=True)
     sold.rename_axis(index={"sold_date": "_date"}, inplace=True)
 
     arrived = _prune_arrival_dates(arrived, sold)
 
+    sales_pivot, movement_pivot = _pivot_movements(sold, arrived)
+
+    return sold, arrived, sales_pivot, movement_pivot, prices
+
+
+def _pivot_movements(
+        sold: pd.Series,
+        arrived: pd.Series
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Pivots sold and net moved counts to items x dates."""
     sold_aligned, arrived_aligned = sold.align(
         arrived,
         join='outer',
@@ -1467,7 +2328,30 @@ def _process_grouped_df(
         level='_date'
     ).fillna(0).astype(int)
 
-    return sales_pivot, movement_pivot, prices
+    return sales_pivot, movement_pivot
+
+
+def _apply_cutoff_date(
+        sold: pd.Series,
+        arrived: pd.Series,
+        sales: pd.DataFrame,
+        movement: pd.DataFrame,
+        cutoff_date: pd.Timestamp | None = None
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Drops arrivals up to `cutoff_date` from the month's pivots.
+
+    The cutoff follows the oldest uploaded month, so it is kept out of the
+    month-local steps. It only changes months with sales up to the cutoff;
+    other months keep their pivots as they are.
+    """
+    if cutoff_date is None:
+        return sales, movement
+    cutoff_date = pd.to_datetime(cutoff_date, dayfirst=True)
+    after_cutoff = arrived.index.get_level_values('_date') > cutoff_date
+    if after_cutoff.all():
+        return sales, movement
+    return _pivot_movements(sold, arrived.loc[after_cutoff])
 
 
 def _combine_prices(
@@ -1633,10 +2517,171 @@ def _gather_base_features(
     return base_features_dict
 
 
+def _artifact_fingerprint(value) -> str:
+    """Content hash of a pipeline artifact, stable across runs and processes."""
+    hasher = hashlib.sha256()
+    if isinstance(value, pd.DataFrame | pd.Series):
+        hasher.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        hasher.update(repr(value.index.names).encode())
+        if isinstance(value, pd.DataFrame):
+            hasher.update(repr(value.columns.tolist()).encode())
+            hasher.update(repr(value.dtypes.tolist()).encode())
+        else:
+            hasher.update(repr((value.name, value.dtype)).encode())
+    else:
+        hasher.update(repr(value).encode())
+    return hasher.hexdigest()
+
+
+def _month_cache_key(
+    artifact_pool: dict, inputs: Sequence[str], parent_key: str = ""
+) -> str:
+    hasher = hashlib.sha256(f"{MONTH_ARTIFACTS_CACHE_VERSION}|{parent_key}".encode())
+    for name in inputs:
+        fingerprint = _artifact_fingerprint(artifact_pool.get(name))
+        hasher.update(f"|{name}:{fingerprint}".encode())
+    return hasher.hexdigest()
+
+
+def _load_month_artifacts(cache_path: Path) -> dict | None:
+    if not cache_path.exists():
+        return None
+    try:
+        artifacts = pd.read_pickle(cache_path)
+        # Retention cleanup removes entries by time since last use
+        os.utime(cache_path)
+        return artifacts
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache entry {cache_path}: {e}")
+        return None
+
+
+def _store_month_artifacts(cache_path: Path, artifacts: dict) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        pd.to_pickle(artifacts, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Could not cache month artifacts in {cache_path}: {e}")
+
+
+def _peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def _artifact_nbytes(value) -> int | None:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        sizes = [_artifact_nbytes(v) for v in value.values()]
+        return sum(size for size in sizes if size is not None)
+    return None
+
+
+def _run_pipeline_step(
+    step_config: dict,
+    inputs: dict,
+    stage: str,
+    step_name: str,
+    month=None,
+    profile: bool = False,
+) -> tuple[dict, dict | None]:
+    """
+    Runs one pipeline step, returning its outputs by name and, with
+    `profile` set, its profile record (see `run_data_processing_pipeline`).
+    """
+    func = step_config['func']
+    output_names = step_config.get('outputs', [])
+    if profile:
+        peak_rss_before = _peak_rss_bytes()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+    results = func(**inputs)
+    if not isinstance(results, tuple):
+        results = (results,)
+    record = None
+    if profile:
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        peak_rss_after = _peak_rss_bytes()
+        output_sizes = [_artifact_nbytes(value) for value in results]
+        record = {
+            'stage': stage,
+            'step': step_name,
+            'month': month,
+            'wall_time_s': wall_time,
+            'cpu_time_s': cpu_time,
+            'peak_rss_delta_bytes': (
+                None if peak_rss_before is None
+                else peak_rss_after - peak_rss_before
+            ),
+            'output_bytes': sum(size for size in output_sizes if size is not None),
+        }
+    return dict(zip(output_names, results)), record
+
+
+def _run_month_local_steps(
+    steps: dict,
+    inputs: dict,
+    output_names: Sequence[str],
+    month=None,
+    profile: bool = False,
+) -> tuple[dict, list[dict]]:
+    """
+    Runs a month's `local` steps in order on the month's own inputs, as a
+    parsing worker process does. Returns the `output_names` artifacts and
+    the profile records of the steps.
+    """
+    artifacts, records = dict(inputs), []
+    for step_name, step_config in steps.items():
+        step_inputs = {key: artifacts.get(key) for key in step_config.get('inputs', [])}
+        outputs, record = _run_pipeline_step(
+            step_config, step_inputs, 'steps', step_name, month, profile
+        )
+        artifacts.update(outputs)
+        if record is not None:
+            records.append(record)
+    return {key: artifacts[key] for key in output_names}, records
+
+
 def run_data_processing_pipeline(config: dict, initial_inputs: dict) -> dict:
     """ 
     Runs a declarative, three-stage data processing pipeline with built-in logic 
     for base and report feature aggregation.
+
+    The `month_cache` section of the config names the `local` steps, which
+    depend only on the month's own inputs, and the `state` inputs and
+    outputs carried between months.
+
+    With `cache_dir` among the inputs, each month's artifacts are stored
+    there and reused incrementally:
+    - `local` step outputs are reused whenever the month's file content is
+      unchanged, even if the other uploaded months or the stock file change;
+    - the whole month, including the carry-over `state` outputs and the
+      features, is reused when the incoming state and the upload-wide
+      `state` inputs (stock, cutoff date) are unchanged as well.
+    Months are still visited from the latest to the earliest, so a changed
+    month only invalidates the months before it whose incoming state changed.
+
+    With `max_workers` other than 1 among the inputs, the `local` steps of
+    the months not found in the cache run in the parsing process pool (see
+    `_worker_context`) before the months are visited. Only the steps chained
+    through the carried-over state run month by month. Results are identical
+    to sequential execution.
+
+    With `profile` set among the inputs, every executed step is recorded in
+    the `pipeline_profile` entry of the outputs, a DataFrame with one row per
+    step and month: wall and CPU time in seconds, growth of the peak RSS of
+    the process that ran the step and the in-memory size of the step outputs
+    in bytes.
     """
     artifact_pool = initial_inputs.copy()
     base_features_names = artifact_pool.get('base_features_names', [])
@@ -1645,35 +2690,125 @@ def run_data_processing_pipeline(config: dict, initial_inputs: dict) -> dict:
     artifact_pool['base_features_lists'] = base_features_lists
     artifact_pool['pipeline_outputs'] = None
     monthly_reports_list = []
-
-    def _apply_step(step_config: dict):
-        func = step_config['func']
+    cache_dir = artifact_pool.get('cache_dir')
+    local = config.get('month_cache', {}).get('local')
+    month_cache = config.get('month_cache') if cache_dir is not None else None
+    max_workers = artifact_pool.get('max_workers', 1)
+    profile = artifact_pool.get('profile', False)
+    profile_records = []
+    precomputed_local = {}
+
+    def _apply_step(step_config: dict, stage: str, step_name: str):
         inputs = {key: artifact_pool.get(key) for key in step_config.get('inputs', [])}
-        output_names = step_config.get('outputs', [])
-        results = func(**inputs)
-        if not isinstance(results, tuple):
-            results = (results,)
-        for name, value in zip(output_names, results):
-            artifact_pool[name] = value
+        month = artifact_pool.get('month_date') if stage == 'steps' else None
+        outputs, record = _run_pipeline_step(
+            step_config, inputs, stage, step_name, month, profile
+        )
+        artifact_pool.update(outputs)
+        if record is not None:
+            profile_records.append(record)
+
+    def _month_cache_paths(pool: dict) -> tuple[Path, Path]:
+        local_key = _month_cache_key(pool, local['inputs'])
+        state_key = _month_cache_key(
+            pool, month_cache['state']['inputs'], parent_key=local_key
+        )
+        return (
+            Path(cache_dir) / f"month_{local_key}.pkl",
+            Path(cache_dir) / f"month_{state_key}.pkl",
+        )
+
+    def _store_month_cache(local_path: Path | None, state_path: Path):
+        if local_path is not None:
+            _store_month_artifacts(
+                local_path,
+                {key: artifact_pool[key] for key in local['outputs']},
+            )
+        month_outputs = dict.fromkeys(
+            [*month_cache['state']['outputs'], *base_features_names, *report_features_names]
+        )
+        _store_month_artifacts(
+            state_path,
+            {key: artifact_pool[key] for key in month_outputs if key in artifact_pool},
+        )
+
+    def _precompute_local_steps(months: list[tuple]):
+        steps = config.get('steps', {})
+        pending = []
+        for month_date, processed_df in months:
+            month_pool = {
+                **artifact_pool, 'processed_df': processed_df, 'month_date': month_date
+            }
+            if month_cache is not None and _month_cache_paths(month_pool)[0].exists():
+                continue
+            pending.append(
+                (month_date, {key: month_pool.get(key) for key in local['inputs']})
+            )
+        if len(pending) < 2:
+            return
+
+        logger.info(f"Running local steps of {len(pending)} months in worker processes")
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=_worker_context()
+        ) as executor:
+            results = executor.map(
+                _run_month_local_steps,
+                repeat({name: steps[name] for name in local['steps']}, len(pending)),
+                [inputs for _, inputs in pending],
+                repeat(local['outputs'], len(pending)),
+                [month_date for month_date, _ in pending],
+                repeat(profile, len(pending)),
+            )
+            for (month_date, _), (outputs, records) in zip(pending, results):
+                precomputed_local[month_date] = outputs
+                profile_records.extend(records)
+
+    def _run_month_steps():
+        steps = config.get('steps', {})
+        local_outputs = precomputed_local.pop(artifact_pool['month_date'], None)
+        if month_cache is not None:
+            local_path, state_path = _month_cache_paths(artifact_pool)
+            cached_month = _load_month_artifacts(state_path)
+            if cached_month is not None:
+                logger.info("Reusing cached month artifacts")
+                artifact_pool.update(cached_month)
+                return
+            cached_local = _load_month_artifacts(local_path)
+            if cached_local is not None:
+                local_outputs, local_path = cached_local, None
+
+        if local_outputs is not None:
+            artifact_pool.update(local_outputs)
+
+        for step_name, step_config in steps.items():
+            if local_outputs is not None and step_name in local['steps']:
+                logger.info(f"Reusing outputs of step: {step_name}")
+                continue
+            logger.info(f"Running step: {step_name}")
+            _apply_step(step_config, 'steps', step_name)
+
+        if month_cache is not None:
+            _store_month_cache(local_path, state_path)
 
     # --- 1. Init Stage ---
     logger.info("=== INIT STAGE ===")
     for step_name, step_config in config.get('init_steps', {}).items():
         logger.info(f"Running init step: {step_name}")
-        _apply_step(step_config)
+        _apply_step(step_config, 'init_steps', step_name)
 
     # --- 2. Iterative Steps Stage ---
     logger.info("=== ITERATIVE STEPS STAGE ===")
     sorted_sales_dfs = artifact_pool.get('sorted_sales_dfs', {})
+
+    if local is not None and max_workers != 1 and len(sorted_sales_dfs) > 1:
+        _precompute_local_steps(list(sorted_sales_dfs.items()))
     
     for month_date, processed_df in sorted_sales_dfs.items():
         logger.info(f"Processing month: {month_date}")
         artifact_pool['processed_df'] = processed_df
         artifact_pool['month_date'] = month_date
         
-        for step_name, step_config in config.get('steps', {}).items():
-            logger.info(f"Running step: {step_name}")
-            _apply_step(step_config)
+        _run_month_steps()
 
         # --- Built-in Aggregation Logic ---
         for key in base_features_names:
@@ -1720,9 +2855,19 @@ def run_data_processing_pipeline(config: dict, initial_inputs: dict) -> dict:
     # --- Dynamic closure Logic ---
     for step_name, step_config in config.get('closure', {}).items():
         logger.info(f"Running closure step: {step_name}")
-        _apply_step(step_config)
+        _apply_step(step_config, 'closure', step_name)
+
+    pipeline_outputs = artifact_pool.get('pipeline_outputs')
+    if profile and isinstance(pipeline_outputs, dict):
+        pipeline_outputs['pipeline_profile'] = pd.DataFrame(
+            profile_records,
+            columns=[
+                'stage', 'step', 'month', 'wall_time_s', 'cpu_time_s',
+                'peak_rss_delta_bytes', 'output_bytes',
+            ],
+        )
         
-    return artifact_pool.get('pipeline_outputs')
+    return pipeline_outputs
 
 
 def process_data(
@@ -1730,8 +2875,27 @@ def process_data(
     sales_path: str, 
     bins: pd.IntervalIndex | None = None,
     base_features_names: list[str] = [],
-    report_features_names: list[str] = []
+    report_features_names: list[str] = [],
+    max_workers: int | None = 1,
+    cache_dir: str | Path | None = None,
+    profile: bool = False,
+    profile_path: str | Path | None = None,
+    csv_memory_limit_mb: float | None = None,
+    excel_engine: str | None = None,
 ) -> dict[str, pd.DataFrame]:
+    """
+    Processes the stock and sales uploads into base and report features.
+
+    `max_workers` parallelizes parsing the sales files and the month-local
+    steps, see `run_data_processing_pipeline`. With
+    `csv_memory_limit_mb` set, CSV uploads are streamed in chunks of about
+    that size, and `excel_engine` picks the engine tried first for Excel
+    uploads (see `read_data_file`).
+
+    With `profile` or `profile_path` set, the per-step profile of the
+    pipeline is returned under `pipeline_profile` and, if `profile_path` is
+    given, also written there as CSV.
+    """
     if not base_features_names:
         base_features_names = BASE_FEATURES_DEFAULT
     if not report_features_names:
@@ -1746,6 +2910,11 @@ def process_data(
         'keys_no_dates': GROUP_KEYS,
         'base_features_names': base_features_names,
         'report_features_names': report_features_names,
+        'max_workers': max_workers,
+        'cache_dir': cache_dir,
+        'profile': profile or profile_path is not None,
+        'csv_memory_limit_mb': csv_memory_limit_mb,
+        'excel_engine': excel_engine,
     }
     
     final_artifacts = run_data_processing_pipeline(UNIFIED_PIPELINE_CONFIG, initial_inputs)
@@ -1759,11 +2928,20 @@ def process_data(
                 df_pivot.columns.name = '_date'
                 base_features_dict[feature_name] = df_pivot
 
-    return {
+    outputs = {
         **base_features_dict,
         'report_features': report_features
     }
 
+    pipeline_profile = final_artifacts.get('pipeline_profile')
+    if pipeline_profile is not None:
+        outputs['pipeline_profile'] = pipeline_profile
+        if profile_path is not None:
+            Path(profile_path).parent.mkdir(parents=True, exist_ok=True)
+            pipeline_profile.to_csv(profile_path, index=False)
+
+    return outputs
+
 
 UNIFIED_PIPELINE_CONFIG = {
     'init_steps': OrderedDict([
@@ -1774,7 +2952,10 @@ UNIFIED_PIPELINE_CONFIG = {
         }),
         ('_preprocess_sort_sales', {
             'func': _preprocess_sort_sales,
-            'inputs': ['sales_files_paths', 'bins'],
+            'inputs': [
+                'sales_files_paths', 'bins', 'max_workers', 'cache_dir',
+                'csv_memory_limit_mb', 'excel_engine',
+            ],
             'outputs': ['sorted_sales_dfs']
         }),
         ('_extract_cutoff_date', {
@@ -1792,7 +2973,10 @@ UNIFIED_PIPELINE_CONFIG = {
         }),
         ('_init_stock', {
             'func': _init_stock,
-            'inputs': ['stock_path', 'all_keys', 'cutoff_date', 'bins'],
+            'inputs': [
+                'stock_path', 'all_keys', 'cutoff_date', 'bins', 'cache_dir',
+                'csv_memory_limit_mb', 'excel_engine',
+            ],
             'outputs': ['stock', 'prices_from_stock']
         }),
     ]),
@@ -1804,8 +2988,13 @@ UNIFIED_PIPELINE_CONFIG = {
         }),
         ('_process_grouped_df', {
             'func': _process_grouped_df,
-            'inputs': ['grouped_df', 'all_keys', 'keys_no_dates', 'cutoff_date'],
-            'outputs': ['sales', 'movement', 'prices_from_sales']
+            'inputs': ['grouped_df', 'all_keys', 'keys_no_dates'],
+            'outputs': ['sold', 'arrived', 'sales', 'movement', 'prices_from_sales']
+        }),
+        ('_apply_cutoff_date', {
+            'func': _apply_cutoff_date,
+            'inputs': ['sold', 'arrived', 'sales', 'movement', 'cutoff_date'],
+            'outputs': ['sales', 'movement']
         }),
         ('_combine_prices', {
             'func': _combine_prices,
@@ -1838,6 +3027,17 @@ UNIFIED_PIPELINE_CONFIG = {
             'outputs': ['lost_sales']
         }),
     ]),
+    'month_cache': {
+        'local': {
+            'steps': ['_get_grouped_df', '_process_grouped_df'],
+            'inputs': ['processed_df', 'group_keys', 'all_keys', 'keys_no_dates'],
+            'outputs': ['sold', 'arrived', 'sales', 'movement', 'prices_from_sales'],
+        },
+        'state': {
+            'inputs': ['stock', 'prices_from_stock', 'cutoff_date'],
+            'outputs': ['stock'],
+        },
+    },
     'closure': OrderedDict([
         ('_pack_outputs', {
             'func': lambda base_features_dict, report_features: {
@@ -1879,41 +3079,68 @@ def get_monthly_sales_pivot(monthly_sales_df):
 
 
 def get_past_covariates_df(monthly_sales_df, stock_features, feature_list, span):
-    boolean_mask = stock_features.T
-    boolean_mask = boolean_mask[:, 0].astype(bool)
-    monthly_sales_df = monthly_sales_df.T
-    masked_data = monthly_sales_df.where(boolean_mask)
-
-    pc_df = masked_data.reset_index(
-        [
-            i
-            for i in masked_data.index.names
-            if i not in [*feature_list, "recording_decade"]
-        ],
-        drop=True,
-    )
-    pc_df = pc_df.reset_index()
+    return get_past_covariates_dfs(
+        monthly_sales_df, stock_features, [feature_list], span
+    )[0]
 
-    grouped = pc_df.groupby([*feature_list, "recording_decade"])
 
-    pc_df_ema = (
-        grouped.apply(
-            lambda x: x.iloc[:, 2:].mean(axis=0).ewm(span=span, adjust=False).mean()
-        )
-        .bfill(axis=1, limit=3)
-        .fillna(0)
-    )
-    pc_df_ema["aggregation"] = "exponentially_weighted_moving_average"
-    pc_df_ema = pc_df_ema.set_index("aggregation", append=True)
+def get_past_covariates_dfs(monthly_sales_df, stock_features, feature_lists, span):
+    """
+    Computes grouped exponentially weighted statistics of available sales.
 
-    pc_df_emv = (
-        grouped.apply(
-            lambda x: x.iloc[:, 2:].mean(axis=0).ewm(span=span, adjust=False).var()
+    For every grouping in `feature_lists` items are grouped by the grouping
+    features and `recording_decade`; sales observed while the item was in
+    stock are averaged within each group and smoothed with an exponentially
+    weighted mean and variance over time. All groupings are aggregated from
+    the same T x N arrays and smoothed in a single pass.
+
+    Returns one DataFrame per grouping with the time index as rows and
+    (*grouping values, recording_decade, aggregation) columns.
+    """
+    available = stock_features[:, 0, :].T.astype(bool)
+    sales = np.where(available, monthly_sales_df.to_numpy().T, np.nan)
+    observed = ~np.isnan(sales)
+    sales = np.where(observed, sales, 0)
+    items = monthly_sales_df.columns.to_frame(index=False)
+
+    group_means, group_keys = [], []
+    for feature_list in feature_lists:
+        group_cols = [*feature_list, "recording_decade"]
+        grouper = items.groupby(group_cols, sort=True)
+        codes = grouper.ngroup().to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(grouper.ngroups))
+
+        sums = np.add.reduceat(sales[order], bounds, axis=0)
+        counts = np.add.reduceat(observed[order], bounds, axis=0, dtype=sums.dtype)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            group_means.append(sums / counts)
+        group_keys.append(grouper.size().index.rename(group_cols))
+
+    ewm = pd.DataFrame(
+        np.vstack(group_means).T, index=monthly_sales_df.index
+    ).ewm(span=span, adjust=False)
+    aggregations = {
+        "exponentially_weighted_moving_average": ewm.mean(),
+        "exponentially_weighted_moving_variance": ewm.var(),
+    }
+    aggregations = {
+        name: agg.bfill(limit=3).fillna(0) for name, agg in aggregations.items()
+    }
+
+    past_covariates_dfs, offset = [], 0
+    for keys in group_keys:
+        columns = slice(offset, offset + len(keys))
+        offset += len(keys)
+        past_covariates_dfs.append(
+            pd.concat(
+                {
+                    name: agg.iloc[:, columns].set_axis(keys, axis=1)
+                    for name, agg in aggregations.items()
+                },
+                axis=1,
+                names=["aggregation"],
+            ).reorder_levels([*keys.names, "aggregation"], axis=1)
         )
-        .bfill(axis=1, limit=3)
-        .fillna(0)
-    )
-    pc_df_emv["aggregation"] = "exponentially_weighted_moving_variance"
-    pc_df_emv = pc_df_emv.set_index("aggregation", append=True)
 
-    return pd.concat([pc_df_ema, pc_df_emv], axis=0).T
+    return past_covariates_dfs
@@ -385,7 +385,7 @@ def load_datasets(input_dir: str) -> tuple[PlastinkaTrainingTSDataset, Plastinka
     Load and validate training and inference datasets.
 
     Args:
-        input_dir: Directory containing train.dill and inference.dill files
+        input_dir: Directory containing the saved train and inference datasets
 
     Returns:
         Tuple of (train_dataset, inference_dataset)
@@ -393,20 +393,20 @@ def load_datasets(input_dir: str) -> tuple[PlastinkaTrainingTSDataset, Plastinka
     Raises:
         SystemExit: If dataset loading fails
     """
-    train_dill_path = os.path.join(input_dir, "train.dill")
-    inference_dill_path = os.path.join(input_dir, "inference.dill")
+    train_dataset_path = os.path.join(input_dir, "train")
+    inference_dataset_path = os.path.join(input_dir, "inference")
 
     # Validate dataset files exist
-    validate_dataset_file(train_dill_path, "train")
-    validate_dataset_file(inference_dill_path, "inference")
+    validate_dataset_file(train_dataset_path, "train")
+    validate_dataset_file(inference_dataset_path, "inference")
 
     try:
-        logger.info(f"Loading train_dataset from {train_dill_path}...")
-        train_dataset = PlastinkaTrainingTSDataset.from_dill(train_dill_path)
+        logger.info(f"Loading train_dataset from {train_dataset_path}...")
+        train_dataset = PlastinkaTrainingTSDataset.load(train_dataset_path)
         logger.info("Train dataset loaded successfully.")
 
-        logger.info(f"Loading inference_dataset from {inference_dill_path}...")
-        inference_dataset = PlastinkaInferenceTSDataset.from_dill(inference_dill_path)
+        logger.info(f"Loading inference_dataset from {inference_dataset_path}...")
+        inference_dataset = PlastinkaInferenceTSDataset.load(inference_dataset_path)
         logger.info("Inference dataset loaded successfully.")
 
         # Validate loaded dataset objects
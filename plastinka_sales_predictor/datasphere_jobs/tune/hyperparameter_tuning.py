@@ -14,7 +14,6 @@ import pandas as pd
 
 import ray
 from plastinka_sales_predictor import (
-    PlastinkaTrainingTSDataset,
     configure_logger,
     flatten_config,
     load_fixed_params,
@@ -366,17 +365,16 @@ def main(input_dir, output):
     tunable_params = _apply_mode_specific_changes(_tunable_params, mode)
 
     # dataset paths
-    train_path = os.path.join(input_dir_real, "train.dill")
+    train_path = os.path.join(input_dir_real, "train")
 
     if not os.path.exists(train_path):
-        logger.error("train.dill not found in input dir")
+        logger.error("train dataset not found in input dir")
         sys.exit(1)
 
-    ds = PlastinkaTrainingTSDataset.from_dill(train_path)
-
-    # re-create train_with_parameters with new ds
+    # Trials open the dataset themselves so that its memory-mapped arrays
+    # are shared between trial processes instead of copied into each one
     train_with_parameters = tune.with_parameters(
-        train_fn, fixed_config=fixed_params, ds=ds
+        train_fn, fixed_config=fixed_params, ds=train_path
     )
     train_with_parameters = tune.with_resources(
         train_with_parameters,
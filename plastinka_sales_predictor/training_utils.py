@@ -271,7 +271,11 @@ def train_model(
 
         logger.info("Принудительно установлен флаг _uses_static_covariates = True")
 
-        model = model.fit_from_dataset(ds, val_ds)
+        model = model.fit_from_dataset(
+            ds,
+            val_ds,
+            dataloader_kwargs={"collate_fn": PlastinkaTrainingTSDataset.collate_fn},
+        )
 
     except Exception:
         logger.error("Error training model.")
@@ -16,6 +16,7 @@ import ray
 from plastinka_sales_predictor import (
     DEFAULT_METRICS,
     DartsCheckpointCallback,
+    PlastinkaTrainingTSDataset,
     apply_config,
     configure_logger,
     get_model,
@@ -212,7 +213,11 @@ def train_model(config, ds, val_ds, random_state=42, model_name="TiDE"):
         )
         inject_callback()
 
-    model.fit_from_dataset(ds, val_ds)
+    model.fit_from_dataset(
+        ds,
+        val_ds,
+        dataloader_kwargs={"collate_fn": PlastinkaTrainingTSDataset.collate_fn},
+    )
     return model
 
 
@@ -220,10 +225,13 @@ def train_fn(config, fixed_config, ds):
     """Ray Tune trainable wrapper.
 
     If *val_ds* provided, use it directly; otherwise split *ds* into
-    train/val windows (legacy behaviour).
+    train/val windows (legacy behaviour). *ds* may also be a path to a
+    saved dataset, which is then opened memory-mapped inside the trial.
     """
 
     config = merge_configs(config, fixed_config)
+    if isinstance(ds, str | Path):
+        ds = PlastinkaTrainingTSDataset.load(ds)
     train_ds, val_ds = split_dataset(ds, config["lags"])
     if train_ds is not None and val_ds is not None:
         train_model(config, train_ds, val_ds)
@@ -0,0 +1,134 @@
+"""
+Tests for the pooled SQLite connections.
+"""
+
+import gc
+import os
+import sqlite3
+
+import pytest
+
+from deployment.app.db.connection_pool import (
+    SQLiteConnectionPool,
+    close_connection_pools,
+    get_connection_pool,
+    pooled_connection,
+)
+from deployment.app.db.data_access_layer import DataAccessLayer
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path / "pool.db")
+    close_connection_pools()
+
+
+def test_connections_are_configured(db_path):
+    pool = SQLiteConnectionPool(db_path)
+    conn = pool.acquire()
+
+    def pragma(name):
+        return next(iter(conn.execute(f"PRAGMA {name}").fetchone().values()))
+
+    assert pragma("journal_mode") == "wal"
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("temp_store") == 2  # MEMORY
+    assert pragma("foreign_keys") == 1
+    assert pragma("busy_timeout") == 5000
+    assert pragma("cache_size") == -65536
+    # The schema is created for new connections
+    assert conn.execute(
+        "SELECT name FROM sqlite_master WHERE name = 'jobs'"
+    ).fetchone()
+    pool.release(conn)
+
+
+def test_released_connections_are_reused(db_path):
+    pool = SQLiteConnectionPool(db_path, max_idle=1)
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    assert pool.idle_count == 1
+    assert pool.acquire() is first
+    with pytest.raises(sqlite3.ProgrammingError):
+        second.execute("SELECT 1")
+
+
+def test_open_transaction_is_rolled_back_on_release(db_path):
+    pool = SQLiteConnectionPool(db_path)
+    conn = pool.acquire()
+    conn.execute("INSERT INTO processing_runs (start_time, status) VALUES ('now', 'running')")
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) AS n FROM processing_runs").fetchone()["n"] == 0
+
+
+def test_old_connections_are_replaced(db_path):
+    pool = SQLiteConnectionPool(db_path, max_lifetime=0.0)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.idle_count == 0
+    assert pool.acquire() is not conn
+
+
+def test_unhealthy_connections_are_replaced(db_path):
+    pool = SQLiteConnectionPool(db_path, health_check_interval=0.0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+
+    replacement = pool.acquire()
+
+    assert replacement is not conn
+    assert replacement.execute("SELECT 1 AS one").fetchone() == {"one": 1}
+
+
+def test_replaced_database_file_is_not_reused(db_path):
+    pool = SQLiteConnectionPool(db_path)
+    conn = pool.acquire()
+    pool.release(conn)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    replacement = pool.acquire()
+
+    assert replacement is not conn
+    assert replacement.execute(
+        "SELECT name FROM sqlite_master WHERE name = 'jobs'"
+    ).fetchone()
+
+
+def test_dal_returns_its_connection_to_the_pool(db_path):
+    pool = get_connection_pool(db_path)
+
+    dal = DataAccessLayer(db_path=db_path)
+    conn = dal.connection
+    assert pool.in_use_count == 1
+    dal.close()
+    assert pool.in_use_count == 0
+    assert DataAccessLayer(db_path=db_path).connection is conn
+
+    # Request-scoped DALs are not closed explicitly
+    gc.collect()
+    assert pool.in_use_count == 0
+    assert pool.idle_count == 1
+
+
+def test_pooled_connection_commits(db_path):
+    with pooled_connection(db_path) as conn:
+        conn.execute("INSERT INTO processing_runs (start_time, status) VALUES ('now', 'done')")
+    with pytest.raises(ValueError):
+        with pooled_connection(db_path) as conn:
+            conn.execute("INSERT INTO processing_runs (start_time, status) VALUES ('now', 'failed')")
+            raise ValueError
+
+    with pooled_connection(db_path) as conn:
+        rows = conn.execute("SELECT status FROM processing_runs").fetchall()
+    assert rows == [{"status": "done"}]
+    assert get_connection_pool(db_path).idle_count == 1
@@ -11,6 +11,7 @@ from deployment.app.db.data_retention import (
     cleanup_old_historical_data,
     cleanup_old_models,
     cleanup_old_predictions,
+    cleanup_processed_files_cache,
     run_cleanup_job,
 )
 
@@ -525,11 +526,38 @@ class TestDataRetention(unittest.TestCase):
             )
             self.assertIsNone(result, f"{model_id} should be deleted from database")
 
+    def test_cleanup_processed_files_cache(self):
+        """Test removal of cache entries unused for longer than the retention period"""
+        cache_dir = os.path.join(self.test_dir, "cache")
+        os.makedirs(cache_dir)
+        stale = os.path.join(cache_dir, "stale.parquet")
+        stale_month = os.path.join(cache_dir, "month_stale.pkl")
+        fresh = os.path.join(cache_dir, "fresh.parquet")
+        for path in (stale, stale_month, fresh):
+            with open(path, "wb") as f:
+                f.write(b"PAR1")
+        stale_ts = (datetime.now() - timedelta(days=40)).timestamp()
+        os.utime(stale, (stale_ts, stale_ts))
+        os.utime(stale_month, (stale_ts, stale_ts))
+        self.mock_settings_object.processed_files_cache_dir = cache_dir
+
+        removed = cleanup_processed_files_cache(days_to_keep=30)
+
+        self.assertEqual(removed, 2)
+        self.assertFalse(os.path.exists(stale))
+        self.assertFalse(os.path.exists(stale_month))
+        self.assertTrue(os.path.exists(fresh))
+
+    @patch("deployment.app.db.data_retention.cleanup_processed_files_cache")
     @patch("deployment.app.db.data_retention.cleanup_old_predictions")
     @patch("deployment.app.db.data_retention.cleanup_old_models")
     @patch("deployment.app.db.data_retention.cleanup_old_historical_data")
     def test_run_cleanup_job(
-        self, mock_cleanup_historical, mock_cleanup_models, mock_cleanup_predictions
+        self,
+        mock_cleanup_historical,
+        mock_cleanup_models,
+        mock_cleanup_predictions,
+        mock_cleanup_cache,
     ):
         """Test running the complete cleanup job"""
         # Setup return values
@@ -547,6 +575,7 @@ class TestDataRetention(unittest.TestCase):
         mock_cleanup_predictions.assert_called_once()
         mock_cleanup_models.assert_called_once()
         mock_cleanup_historical.assert_called_once()
+        mock_cleanup_cache.assert_called_once()
 
 
 if __name__ == "__main__":
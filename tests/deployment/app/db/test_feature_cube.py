@@ -0,0 +1,135 @@
+"""
+Tests for the dense feature cube loader.
+
+`SQLFeatureStore.load_feature_cube` must give the datasets the same arrays as
+pivoting the `load_features` output, without the DataFrame round trip.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from deployment.app.db.data_access_layer import DataAccessLayer
+from deployment.app.db.feature_storage import SQLFeatureStore
+from deployment.app.db.schema import MULTIINDEX_NAMES
+from plastinka_sales_predictor.data_preparation import (
+    PlastinkaTrainingTSDataset,
+    get_monthly_sales_pivot,
+)
+
+PRODUCTS = [
+    (1, "333", "Artist A", "Album C", "CD", "Std", "Studio", "2010s", "2020s", "Rock", "2018"),
+    (2, "222", "Artist B", "Album B", "Vinyl", "Ltd", "Live", "2000s", "2020s", "Pop", "2008"),
+    (3, "111", "Artist A", "Album A", "CD", "Std", "Studio", "2010s", "2020s", "Rock", "2015"),
+    (4, "444", "Artist C", "Album D", "CD", "Std", "Studio", "1990s", "2020s", "Jazz", "1995"),
+]
+MONTHS = pd.date_range("2023-01-01", periods=5, freq="MS")
+
+
+@pytest.fixture
+def cube_dal(tmp_path):
+    dal = DataAccessLayer(db_path=str(tmp_path / "features.db"))
+    conn = dal._connection
+    rng = np.random.default_rng(3)
+    columns_str = ", ".join(MULTIINDEX_NAMES)
+    placeholders = ", ".join("?" * (len(MULTIINDEX_NAMES) + 1))
+    conn.executemany(
+        f"INSERT INTO dim_multiindex_mapping (multiindex_id, {columns_str}) "
+        f"VALUES ({placeholders})",
+        PRODUCTS,
+    )
+
+    sales = []
+    for product_id in (1, 2, 3):
+        for month in MONTHS:
+            # Product 2 has no sales in March; product 3 sells twice a month
+            if product_id == 2 and month.month == 3:
+                continue
+            days = [1, 15] if product_id == 3 else [1]
+            for day in days:
+                date = month.replace(day=day).strftime("%Y-%m-%d")
+                sales.append((product_id, date, float(rng.integers(-3, 10))))
+    conn.executemany(
+        "INSERT INTO fact_sales (multiindex_id, data_date, value) VALUES (?, ?, ?)",
+        sales,
+    )
+
+    report = [
+        (product_id, month.strftime("%Y-%m-%d"), rng.random(), rng.random())
+        for product_id in (1, 2, 3, 4)
+        for month in MONTHS
+    ]
+    conn.executemany(
+        "INSERT INTO report_features (multiindex_id, data_date, availability, confidence) "
+        "VALUES (?, ?, ?, ?)",
+        report,
+    )
+    conn.commit()
+
+    yield dal
+
+    dal.close()
+
+
+def _pivoted_datasets_inputs(dal):
+    """The DataFrame path `get_datasets` used before the cube loader."""
+    features = SQLFeatureStore(dal=dal).load_features()
+    stock_long = features["report_features"]
+    stock_long["data_date"] = pd.to_datetime(stock_long["data_date"])
+    stock_features = stock_long.pivot_table(
+        index="data_date",
+        columns=MULTIINDEX_NAMES,
+        values=["availability", "confidence"],
+    )
+    return {
+        "stock_features": stock_features,
+        "monthly_sales": get_monthly_sales_pivot(features["sales"]),
+    }
+
+
+def test_cube_matches_pivoted_features(cube_dal):
+    cube = SQLFeatureStore(dal=cube_dal).load_feature_cube()
+
+    assert cube.monthly_sales.shape == (len(MONTHS), 3)
+    assert cube.stock_features.shape == (len(MONTHS), 2, 3)
+    assert list(cube.items.names) == MULTIINDEX_NAMES
+    assert list(cube.items.get_level_values("barcode")) == ["111", "222", "333"]
+    pd.testing.assert_index_equal(cube.time_index, MONTHS, exact=False)
+    assert cube.time_index.freqstr == "MS"
+
+    params = {"input_chunk_length": 3, "output_chunk_length": 1}
+    expected = PlastinkaTrainingTSDataset(**_pivoted_datasets_inputs(cube_dal), **params)
+    result = PlastinkaTrainingTSDataset(**cube._asdict(), **params)
+
+    np.testing.assert_array_equal(result._monthly_sales, expected._monthly_sales)
+    np.testing.assert_array_equal(result._stock_features, expected._stock_features)
+    assert result._monthly_sales.dtype == expected._monthly_sales.dtype
+    assert result._idx2multiidx == expected._idx2multiidx
+    assert result._index_names_mapping == expected._index_names_mapping
+    pd.testing.assert_index_equal(result._time_index, expected._time_index)
+    assert result._idx_mapping == expected._idx_mapping
+
+
+def test_cube_respects_date_range(cube_dal):
+    cube = SQLFeatureStore(dal=cube_dal).load_feature_cube(
+        start_date="2023-02-01", end_date="2023-03-31"
+    )
+
+    pd.testing.assert_index_equal(cube.time_index, MONTHS[1:3], exact=False)
+    assert cube.monthly_sales.shape == (2, 3)
+
+
+def test_cube_requires_sales(cube_dal):
+    with pytest.raises(ValueError, match="No sales"):
+        SQLFeatureStore(dal=cube_dal).load_feature_cube(start_date="2024-01-01")
+
+
+def test_array_inputs_need_an_index(cube_dal):
+    cube = SQLFeatureStore(dal=cube_dal).load_feature_cube()
+
+    with pytest.raises(ValueError, match="time_index and items"):
+        PlastinkaTrainingTSDataset(
+            stock_features=cube.stock_features, monthly_sales=cube.monthly_sales
+        )
+    with pytest.raises(ValueError, match="do not match"):
+        PlastinkaTrainingTSDataset(**cube._replace(time_index=cube.time_index[:-1])._asdict())
@@ -0,0 +1,121 @@
+"""
+Tests for the set-based `insert_predictions`.
+"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from deployment.app.db.data_access_layer import DataAccessLayer
+from deployment.app.db.database import get_or_create_multiindex_id
+
+QUANTILES = ["0.05", "0.25", "0.5", "0.75", "0.95"]
+
+
+@pytest.fixture
+def dal(tmp_path):
+    dal = DataAccessLayer(db_path=str(tmp_path / "predictions.db"))
+    conn = dal.connection
+    conn.execute(
+        "INSERT INTO jobs (job_id, job_type, status, created_at, updated_at) "
+        "VALUES ('j1', 'prediction', 'running', '2024-01-01', '2024-01-01')"
+    )
+    conn.execute(
+        "INSERT INTO models (model_id, job_id, model_path, created_at) "
+        "VALUES ('m1', 'j1', 'model.onnx', '2024-01-01')"
+    )
+    conn.executemany(
+        "INSERT INTO prediction_results (result_id, job_id, model_id) VALUES (?, 'j1', 'm1')",
+        [("r1",), ("r2",)],
+    )
+    conn.commit()
+    yield dal
+    dal.close()
+
+
+def _predictions(barcodes):
+    n_rows = len(barcodes)
+    df = pd.DataFrame(
+        {
+            "barcode": barcodes,
+            "artist": "Artist",
+            "album": [f"Album {b}" for b in barcodes],
+            "cover_type": "Gatefold",
+            "price_category": "Std",
+            "release_type": "Studio",
+            "recording_decade": "1970s",
+            "release_decade": "2020s",
+            "style": "Rock",
+            "recording_year": 1975,
+        }
+    )
+    for i, q in enumerate(QUANTILES):
+        df[q] = [float(i + row) for row in range(n_rows)]
+    return df
+
+
+def _saved(dal, result_id):
+    return pd.DataFrame(
+        dal.execute_raw_query(
+            """
+            SELECT m.barcode, m.album, m.recording_year, p.multiindex_id,
+                   p.prediction_month, p.quantile_05, p.quantile_95
+            FROM fact_predictions p
+            JOIN dim_multiindex_mapping m ON p.multiindex_id = m.multiindex_id
+            WHERE p.result_id = ?
+            ORDER BY m.barcode
+            """,
+            (result_id,),
+            fetchall=True,
+        )
+    )
+
+
+def test_reuses_existing_and_creates_new_ids(dal):
+    existing_id = get_or_create_multiindex_id(
+        "1001", "Artist", "Album 1001", "Gatefold", "Std", "Studio",
+        "1970s", "2020s", "Rock", 1975, connection=dal.connection,
+    )
+    dal.commit()
+    df = _predictions([1001, 1002, 1003])
+
+    result = dal.insert_predictions("r1", "m1", date(2024, 3, 1), df)
+
+    saved = _saved(dal, "r1")
+    assert result == {"result_id": "r1", "predictions_count": 3}
+    assert list(saved["barcode"]) == ["1001", "1002", "1003"]
+    assert saved["multiindex_id"].iloc[0] == existing_id
+    assert saved["multiindex_id"].nunique() == 3
+    assert list(saved["recording_year"]) == [1975] * 3
+    assert list(saved["prediction_month"]) == ["2024-03-01"] * 3
+    assert list(saved["quantile_05"]) == [0.0, 1.0, 2.0]
+    assert list(saved["quantile_95"]) == [4.0, 5.0, 6.0]
+
+
+def test_later_results_resolve_the_same_ids(dal):
+    df = _predictions([str(b) for b in range(2000, 2300)])
+
+    dal.insert_predictions("r1", "m1", date(2024, 3, 1), df)
+    dal.insert_predictions("r2", "m1", date(2024, 4, 1), df)
+
+    first, second = _saved(dal, "r1"), _saved(dal, "r2")
+    assert len(first) == 300
+    assert list(first["multiindex_id"]) == list(second["multiindex_id"])
+    mapping_count = dal.execute_raw_query(
+        "SELECT COUNT(*) AS n FROM dim_multiindex_mapping"
+    )["n"]
+    assert mapping_count == 300
+
+
+def test_invalid_rows_write_nothing(dal):
+    df = _predictions([1, 2])
+    df.loc[1, "recording_year"] = None
+
+    with pytest.raises(Exception):
+        dal.insert_predictions("r1", "m1", date(2024, 3, 1), df)
+
+    assert _saved(dal, "r1").empty
+    assert dal.execute_raw_query(
+        "SELECT COUNT(*) AS n FROM dim_multiindex_mapping"
+    )["n"] == 0
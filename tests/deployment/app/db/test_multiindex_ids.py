@@ -0,0 +1,191 @@
+"""
+Tests for multi-index ID resolution by `key_hash` and the process-level ID cache.
+"""
+
+import sqlite3
+
+import pytest
+
+from deployment.app.db import database
+from deployment.app.db.data_access_layer import DataAccessLayer
+from deployment.app.db.database import (
+    DatabaseError,
+    get_or_create_multiindex_id,
+    get_or_create_multiindex_ids_batch,
+)
+from deployment.app.db.schema import MULTIINDEX_NAMES, init_db, multiindex_key_hash
+
+
+def _item(i, recording_year="1975"):
+    return (str(i), "Artist", f"Album {i}", "CD", "Std", "Studio", "1970s", "2020s", "Rock", recording_year)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    database._multiindex_id_cache.clear()
+    conn = sqlite3.connect(str(tmp_path / "ids.db"))
+    conn.row_factory = database.dict_factory
+    init_db(connection=conn)
+    yield conn
+    conn.close()
+    database._multiindex_id_cache.clear()
+
+
+def _raw_insert(conn, items):
+    placeholders = ", ".join("?" * len(MULTIINDEX_NAMES))
+    conn.executemany(
+        f"INSERT INTO dim_multiindex_mapping ({', '.join(MULTIINDEX_NAMES)}) VALUES ({placeholders})",
+        items,
+    )
+    conn.commit()
+
+
+def _mapping(conn):
+    rows = conn.execute(
+        f"SELECT multiindex_id, key_hash, {', '.join(MULTIINDEX_NAMES)} FROM dim_multiindex_mapping"
+    ).fetchall()
+    return {tuple(str(row[name]) for name in MULTIINDEX_NAMES): row for row in rows}
+
+
+def test_init_db_adds_and_fills_key_hash(tmp_path):
+    path = str(tmp_path / "old.db")
+    old = sqlite3.connect(path)
+    old.execute(
+        f"CREATE TABLE dim_multiindex_mapping (multiindex_id INTEGER PRIMARY KEY, "
+        f"{', '.join(MULTIINDEX_NAMES)}, UNIQUE({', '.join(MULTIINDEX_NAMES)}))"
+    )
+    old.executemany(
+        f"INSERT INTO dim_multiindex_mapping ({', '.join(MULTIINDEX_NAMES)}) "
+        f"VALUES ({', '.join('?' * len(MULTIINDEX_NAMES))})",
+        [_item(1, 1975), _item(2, 1980)],
+    )
+    old.commit()
+
+    assert init_db(connection=old)
+
+    rows = old.execute("SELECT key_hash FROM dim_multiindex_mapping ORDER BY multiindex_id").fetchall()
+    assert [row[0] for row in rows] == [
+        multiindex_key_hash(_item(1, "1975")),
+        multiindex_key_hash(_item(2, "1980")),
+    ]
+    indexes = [row[1] for row in old.execute("PRAGMA index_list(dim_multiindex_mapping)")]
+    assert "idx_multiindex_key_hash" in indexes
+    old.close()
+
+
+def test_batch_creates_then_reuses_ids(conn):
+    items = [_item(i) for i in range(5)]
+
+    created = get_or_create_multiindex_ids_batch(items, conn)
+    conn.commit()
+    reused = get_or_create_multiindex_ids_batch(items[::-1], conn)
+
+    mapping = _mapping(conn)
+    assert created == reused
+    assert created == {item: mapping[item]["multiindex_id"] for item in items}
+    assert all(mapping[item]["key_hash"] == multiindex_key_hash(item) for item in items)
+
+
+def test_values_are_matched_as_strings(conn):
+    multiindex_id = get_or_create_multiindex_id(*_item(1, 1975), connection=conn)
+    conn.commit()
+
+    assert get_or_create_multiindex_ids_batch([_item(1, "1975")], conn) == {_item(1): multiindex_id}
+    assert len(_mapping(conn)) == 1
+
+
+def test_rows_without_key_hash_are_matched(conn):
+    _raw_insert(conn, [_item(1)])
+    raw_id = _mapping(conn)[_item(1)]["multiindex_id"]
+
+    id_map = get_or_create_multiindex_ids_batch([_item(1), _item(2)], conn)
+
+    mapping = _mapping(conn)
+    assert id_map[_item(1)] == raw_id
+    assert len(mapping) == 2
+    assert mapping[_item(1)]["key_hash"] == multiindex_key_hash(_item(1))
+
+
+def test_cached_ids_skip_the_database(conn, monkeypatch):
+    items = [_item(i) for i in range(3)]
+    get_or_create_multiindex_ids_batch(items, conn)
+    conn.commit()
+    expected = get_or_create_multiindex_ids_batch(items, conn)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("IDs should come from the cache")
+
+    monkeypatch.setattr(database, "execute_query_with_batching", _fail)
+
+    assert get_or_create_multiindex_ids_batch(items, conn) == expected
+
+
+def test_rolled_back_ids_are_not_cached(conn):
+    get_or_create_multiindex_ids_batch([_item(1)], conn)
+    get_or_create_multiindex_ids_batch([_item(1)], conn)
+    conn.rollback()
+    # Reuses the rolled back rowid, so the highest ID is unchanged
+    _raw_insert(conn, [_item(2)])
+
+    id_map = get_or_create_multiindex_ids_batch([_item(1)], conn)
+
+    mapping = _mapping(conn)
+    assert id_map[_item(1)] == mapping[_item(1)]["multiindex_id"]
+
+
+def test_cache_is_dropped_when_other_connections_change_the_mapping(conn, tmp_path):
+    get_or_create_multiindex_ids_batch([_item(1), _item(2)], conn)
+    conn.commit()
+    get_or_create_multiindex_ids_batch([_item(1), _item(2)], conn)
+
+    other = sqlite3.connect(str(tmp_path / "ids.db"))
+    other.execute("DELETE FROM dim_multiindex_mapping")
+    other.commit()
+    other.close()
+    _raw_insert(conn, [_item(3), _item(2), _item(1)])
+
+    id_map = get_or_create_multiindex_ids_batch([_item(1), _item(2)], conn)
+
+    mapping = _mapping(conn)
+    assert id_map == {item: mapping[item]["multiindex_id"] for item in (_item(1), _item(2))}
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("IDs should come from the cache")
+
+
+def test_ids_resolved_in_a_dal_transaction_are_cached_after_commit(conn, monkeypatch):
+    dal = DataAccessLayer(connection=conn)
+    committed = dal.get_or_create_multiindex_ids_batch([_item(1), _item(2)])
+
+    with dal.transaction():
+        created = dal.get_or_create_multiindex_ids_batch([_item(3)])
+        assert conn.in_transaction
+        # Found by hash while the transaction is open, so not cached yet
+        found = dal.get_or_create_multiindex_ids_batch([_item(1), _item(3)])
+        with monkeypatch.context() as patch:
+            patch.setattr(database, "execute_query_with_batching", _fail)
+            # Entries committed before the transaction are read inside it
+            assert dal.get_or_create_multiindex_ids_batch([_item(2)]) == {_item(2): committed[_item(2)]}
+
+    monkeypatch.setattr(database, "execute_query_with_batching", _fail)
+    items = [_item(1), _item(2), _item(3)]
+    assert dal.get_or_create_multiindex_ids_batch(items) == {**committed, **created, **found}
+    mapping = _mapping(conn)
+    assert {**committed, **created} == {item: mapping[item]["multiindex_id"] for item in items}
+
+
+def test_ids_of_a_rolled_back_dal_transaction_are_not_cached(conn):
+    dal = DataAccessLayer(connection=conn)
+
+    with pytest.raises(DatabaseError):
+        with dal.transaction():
+            dal.get_or_create_multiindex_ids_batch([_item(1)])
+            raise RuntimeError("abort")
+    # Reuses the rolled back rowid
+    _raw_insert(conn, [_item(2)])
+
+    id_map = dal.get_or_create_multiindex_ids_batch([_item(1)])
+
+    mapping = _mapping(conn)
+    assert id_map[_item(1)] == mapping[_item(1)]["multiindex_id"]
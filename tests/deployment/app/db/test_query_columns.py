@@ -0,0 +1,165 @@
+"""
+Tests for the columnar query path (`execute_query_columns`, `iter_query_columns`)
+and the DAL reads built on it.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from deployment.app.db import database
+from deployment.app.db.data_access_layer import DataAccessLayer
+from deployment.app.db.database import (
+    DatabaseError,
+    dict_factory,
+    execute_query_columns,
+    get_or_create_multiindex_ids_batch,
+    iter_query_columns,
+)
+
+
+@pytest.fixture
+def dal(tmp_path):
+    dal = DataAccessLayer(db_path=str(tmp_path / "columns.db"))
+    yield dal
+    dal.close()
+
+
+@pytest.fixture
+def values_conn(dal):
+    conn = dal.connection
+    conn.execute("CREATE TABLE t (id INTEGER, name TEXT, value REAL, maybe INTEGER)")
+    conn.executemany(
+        "INSERT INTO t VALUES (?, ?, ?, ?)",
+        [(i, f"n{i}", i / 2, None if i % 3 == 0 else i) for i in range(10)],
+    )
+    conn.commit()
+    return conn
+
+
+def _item(i):
+    return (str(i), "Artist", f"Album {i}", "CD", "Std", "Studio", "1970s", "2020s", "Rock", "1975")
+
+
+def test_columns_are_typed(values_conn):
+    frame = execute_query_columns(
+        "SELECT id, name, value, maybe FROM t ORDER BY id",
+        values_conn,
+        dtypes={"maybe": "Int64"},
+    )
+
+    assert frame.dtypes.to_dict() == {
+        "id": np.dtype("int64"),
+        "name": np.dtype(object),
+        "value": np.dtype("float64"),
+        "maybe": pd.Int64Dtype(),
+    }
+    assert frame["maybe"].isna().sum() == 4
+    expected = pd.DataFrame(
+        database.execute_query("SELECT id, name, value FROM t ORDER BY id", values_conn, fetchall=True)
+    )
+    pd.testing.assert_frame_equal(frame[["id", "name", "value"]], expected)
+    # The connection keeps its dictionary rows
+    assert values_conn.row_factory is dict_factory
+
+
+def test_nulls_in_inferred_columns_become_nan(values_conn):
+    frame = execute_query_columns("SELECT maybe FROM t ORDER BY id", values_conn)
+
+    assert frame["maybe"].dtype == np.float64
+    assert np.isnan(frame["maybe"].iloc[0])
+
+
+def test_empty_result_keeps_columns(values_conn):
+    frame = execute_query_columns(
+        "SELECT id, value FROM t WHERE id < ?", values_conn, params=(0,), dtypes={"id": "int64"}
+    )
+
+    assert frame.empty
+    assert list(frame.columns) == ["id", "value"]
+    assert frame["id"].dtype == np.int64
+
+
+def test_chunks(values_conn):
+    query = "SELECT id, value FROM t ORDER BY id"
+    dtypes = {"id": "int64", "value": "float64"}
+
+    chunks = list(iter_query_columns(query, values_conn, dtypes=dtypes, chunk_size=4))
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    pd.testing.assert_frame_equal(
+        execute_query_columns(query, values_conn, dtypes=dtypes, chunk_size=4),
+        execute_query_columns(query, values_conn, dtypes=dtypes),
+    )
+    assert list(iter_query_columns(query + " LIMIT 0", values_conn)) == []
+
+
+def test_errors_are_database_errors(values_conn):
+    with pytest.raises(DatabaseError):
+        execute_query_columns("SELECT missing FROM t", values_conn)
+    with pytest.raises(DatabaseError):
+        list(iter_query_columns("SELECT missing FROM t", values_conn))
+
+
+def test_predictions_are_read_as_columns(dal):
+    conn = dal.connection
+    conn.execute(
+        "INSERT INTO jobs (job_id, job_type, status, created_at, updated_at) "
+        "VALUES ('j1', 'prediction', 'completed', '2024-01-01', '2024-01-01')"
+    )
+    conn.execute(
+        "INSERT INTO models (model_id, job_id, model_path, created_at) "
+        "VALUES ('m1', 'j1', 'model.onnx', '2024-01-01')"
+    )
+    conn.execute(
+        "INSERT INTO prediction_results (result_id, job_id, model_id, prediction_month) "
+        "VALUES ('r1', 'j1', 'm1', '2024-03-01')"
+    )
+    ids = get_or_create_multiindex_ids_batch([_item(1), _item(2)], conn)
+    conn.executemany(
+        "INSERT INTO fact_predictions (result_id, multiindex_id, prediction_month, model_id, "
+        "quantile_05, quantile_25, quantile_50, quantile_75, quantile_95, created_at) "
+        "VALUES ('r1', ?, '2024-03-01', 'm1', ?, 2, 3, 4, 5, '2024-01-01')",
+        [(ids[_item(1)], 0), (ids[_item(2)], 1)],
+    )
+    conn.commit()
+
+    predictions = dal.get_predictions(prediction_month=date(2024, 3, 1), model_id="m1")
+
+    # Ordered by artist and album
+    assert list(predictions["multiindex_id"]) == [ids[_item(1)], ids[_item(2)]]
+    assert predictions["quantile_05"].dtype == np.float64
+    assert list(predictions["quantile_05"]) == [0.0, 1.0]
+    assert dal.get_predictions(["j1"]).shape == predictions.shape
+    assert dal.get_predictions(["other"]).empty
+    assert dal.get_predictions(prediction_month=date(2024, 4, 1)).empty
+
+
+def test_report_features_filter_ids_and_dates_across_batches(dal, monkeypatch):
+    conn = dal.connection
+    ids = sorted(get_or_create_multiindex_ids_batch([_item(i) for i in range(5)], conn).values())
+    conn.executemany(
+        "INSERT INTO report_features (multiindex_id, data_date, availability, lost_sales) "
+        "VALUES (?, ?, ?, NULL)",
+        [(multiindex_id, month, 0.5) for multiindex_id in ids for month in ("2024-01-01", "2024-02-01")],
+    )
+    conn.commit()
+    # Two date parameters leave room for two IDs per query
+    monkeypatch.setattr(database, "get_batch_size", lambda: 4)
+
+    features = dal.get_report_features(
+        multiidx_ids=ids[:3],
+        start_date=date(2024, 2, 1),
+        end_date=date(2024, 2, 28),
+        feature_subset=["lost_sales", "availability"],
+    )
+
+    assert sorted(features["multiindex_id"]) == ids[:3]
+    assert set(features["data_date"]) == {"2024-02-01"}
+    assert list(features.columns[-2:]) == ["availability", "lost_sales"]
+    assert features["lost_sales"].dtype == np.float64
+    assert features["lost_sales"].isna().all()
+    assert "key_hash" not in features.columns
+    assert len(dal.get_report_features()) == 10
@@ -0,0 +1,154 @@
+"""
+Tests for the normalized `result_metrics` table and the ranking queries using it.
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from deployment.app.db import database
+from deployment.app.db.database import (
+    get_best_model_by_metric,
+    get_top_configs,
+    get_tuning_results,
+)
+from deployment.app.db.schema import init_db
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = database.dict_factory
+    init_db(connection=conn)
+    conn.execute(
+        "INSERT INTO jobs (job_id, job_type, status, created_at, updated_at) "
+        "VALUES ('j1', 'training', 'completed', '2024-01-01', '2024-01-01')"
+    )
+    yield conn
+    conn.close()
+
+
+def _config(conn, config_id, created_at, is_active=0, source=None):
+    conn.execute(
+        "INSERT INTO configs (config_id, config, created_at, is_active, source) VALUES (?, ?, ?, ?, ?)",
+        (config_id, json.dumps({"name": config_id}), created_at, is_active, source),
+    )
+
+
+def _training_result(conn, result_id, config_id, metrics, model_id=None):
+    if model_id:
+        conn.execute(
+            "INSERT INTO models (model_id, job_id, model_path, created_at) VALUES (?, 'j1', 'm.onnx', '2024-01-01')",
+            (model_id,),
+        )
+    conn.execute(
+        "INSERT INTO training_results (result_id, job_id, model_id, config_id, metrics) VALUES (?, 'j1', ?, ?, ?)",
+        (result_id, model_id, config_id, json.dumps(metrics)),
+    )
+
+
+def _tuning_result(conn, result_id, config_id, metrics):
+    conn.execute(
+        "INSERT INTO tuning_results (result_id, job_id, config_id, metrics) VALUES (?, 'j1', ?, ?)",
+        (result_id, config_id, json.dumps(metrics)),
+    )
+
+
+def _metrics(conn):
+    rows = conn.execute(
+        "SELECT result_type, result_id, metric_name, value FROM result_metrics ORDER BY 1, 2, 3"
+    ).fetchall()
+    return [tuple(row.values()) for row in rows]
+
+
+def test_metrics_follow_the_results(conn):
+    _config(conn, "c1", "2024-01-01")
+    _training_result(conn, "r1", "c1", {"val_MIC": 0.5, "epochs": 3, "note": "x", "nested": {"a": 1}})
+    _tuning_result(conn, "r1", "c1", {"val_MIC": 0.9})
+    conn.execute("INSERT INTO training_results (result_id, job_id, metrics) VALUES ('r2', 'j1', 'not json')")
+
+    assert _metrics(conn) == [
+        ("training", "r1", "epochs", 3.0),
+        ("training", "r1", "val_MIC", 0.5),
+        ("tuning", "r1", "val_MIC", 0.9),
+    ]
+
+    conn.execute("UPDATE training_results SET metrics = '{\"val_MIC\": 0.7}' WHERE result_id = 'r1'")
+    conn.execute("DELETE FROM tuning_results")
+
+    assert _metrics(conn) == [("training", "r1", "val_MIC", 0.7)]
+
+
+def test_init_db_backfills_existing_results(conn):
+    _config(conn, "c1", "2024-01-01")
+    _training_result(conn, "r1", "c1", {"val_MIC": 0.5})
+    _tuning_result(conn, "t1", "c1", {"val_MIC": 0.9, "val_loss": 1})
+    # A database from before the table existed
+    conn.execute("DROP TABLE result_metrics")
+    conn.commit()
+
+    assert init_db(connection=conn)
+
+    assert _metrics(conn) == [
+        ("training", "r1", "val_MIC", 0.5),
+        ("tuning", "t1", "val_MIC", 0.9),
+        ("tuning", "t1", "val_loss", 1.0),
+    ]
+
+
+@pytest.fixture
+def ranked_configs(conn):
+    _config(conn, "c1", "2024-01-01")
+    _config(conn, "c2", "2024-01-02", source="tuning")
+    _config(conn, "c3", "2024-01-03")
+    _config(conn, "active", "2024-01-04", is_active=1)
+    _training_result(conn, "r1", "c1", {"val_MIC": 0.5, "run": "low"})
+    _training_result(conn, "r2", "c1", {"val_MIC": 0.6, "run": "high"})
+    _tuning_result(conn, "t1", "c1", {"val_MIC": 0.9})
+    _tuning_result(conn, "t2", "c2", {"val_MIC": 0.7, "run": "tuned"})
+    _training_result(conn, "r3", "c3", {"val_loss": 1.0})
+    _training_result(conn, "r4", "active", {"val_MIC": 0.1})
+    return conn
+
+
+def test_top_configs_rank_by_best_metric(ranked_configs):
+    top = get_top_configs(ranked_configs, limit=10, metric_name="val_MIC")
+
+    assert [row["config_id"] for row in top] == ["active", "c1", "c2", "c3"]
+    assert top[1]["config"] == {"name": "c1"}
+    # Metrics of the best training result, else of the best tuning result
+    assert top[1]["metrics"] == {"val_MIC": 0.6, "run": "high"}
+    assert top[2]["metrics"] == {"val_MIC": 0.7, "run": "tuned"}
+    assert top[3]["metrics"] == {"val_loss": 1.0}
+
+    lowest = get_top_configs(
+        ranked_configs, limit=2, metric_name="val_MIC", higher_is_better=False, include_active=False
+    )
+    assert [row["config_id"] for row in lowest] == ["c1", "c2"]
+    assert lowest[0]["metrics"] == {"val_MIC": 0.5, "run": "low"}
+
+
+def test_top_configs_source_is_a_parameter(ranked_configs):
+    top = get_top_configs(ranked_configs, metric_name="val_MIC", source="tuning")
+    assert [row["config_id"] for row in top] == ["c2"]
+
+    assert get_top_configs(ranked_configs, metric_name="val_MIC", source="x' OR '1'='1") == []
+
+
+def test_best_model_and_tuning_results_use_result_metrics(conn):
+    _config(conn, "c1", "2024-01-01")
+    _training_result(conn, "r1", "c1", {"val_MIC": 0.5}, model_id="m1")
+    _training_result(conn, "r2", "c1", {"val_MIC": 0.8}, model_id="m2")
+    _training_result(conn, "r3", "c1", {"val_loss": 0.1}, model_id="m3")
+    _tuning_result(conn, "t1", "c1", {"val_MIC": 0.3})
+    _tuning_result(conn, "t2", "c1", {"val_MIC": 0.4})
+
+    best = get_best_model_by_metric("val_MIC", connection=conn)
+    worst = get_best_model_by_metric("val_MIC", higher_is_better=False, connection=conn)
+
+    assert best["model_id"] == "m2"
+    assert best["metrics"] == {"val_MIC": 0.8}
+    assert worst["model_id"] == "m1"
+    tuning = get_tuning_results(conn, metric_name="val_MIC", higher_is_better=True)
+    assert [(row["result_id"], row["metric_value"]) for row in tuning] == [("t2", 0.4), ("t1", 0.3)]
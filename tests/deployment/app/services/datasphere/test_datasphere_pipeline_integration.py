@@ -180,13 +180,11 @@ async def test_datasphere_job_polling_status_tracking(mock_datasphere_env, monke
             output_dir = tempfile.mkdtemp()
 
         output_path = Path(output_dir)
-        train_file = output_path / "train.dill"
-        inference_file = output_path / "inference.dill"
         config_file = output_path / "config.json"
 
-        # Create dummy files
-        train_file.write_text("dummy train data")
-        inference_file.write_text("dummy inference data")
+        # Create dummy dataset directories and config
+        (output_path / "train").mkdir(exist_ok=True)
+        (output_path / "inference").mkdir(exist_ok=True)
         config_file.write_text('{"dummy": "config"}')
 
         return None
@@ -376,8 +374,8 @@ async def test_datasphere_pipeline_db_format_validation(mock_datasphere_env, mon
         if output_dir:
             Path(output_dir).mkdir(parents=True, exist_ok=True)
             # Create the required files
-            (Path(output_dir) / "train.dill").touch()
-            (Path(output_dir) / "inference.dill").touch()
+            (Path(output_dir) / "train").mkdir(exist_ok=True)
+            (Path(output_dir) / "inference").mkdir(exist_ok=True)
     monkeypatch.setattr("deployment.app.services.datasphere_service._prepare_job_datasets", mock_prepare_job_datasets)
 
     # Mock _verify_datasphere_job_inputs to skip file verification
@@ -505,8 +503,8 @@ async def test_datasphere_pipeline_missing_metrics(mock_datasphere_env, caplog,
         if output_dir:
             Path(output_dir).mkdir(parents=True, exist_ok=True)
             # Create the required files
-            (Path(output_dir) / "train.dill").touch()
-            (Path(output_dir) / "inference.dill").touch()
+            (Path(output_dir) / "train").mkdir(exist_ok=True)
+            (Path(output_dir) / "inference").mkdir(exist_ok=True)
     monkeypatch.setattr("deployment.app.services.datasphere_service._prepare_job_datasets", mock_prepare_job_datasets)
 
     # Mock _verify_datasphere_job_inputs to skip file verification
@@ -645,8 +643,8 @@ async def test_datasphere_pipeline_rollback_cleanup(mock_datasphere_env, caplog,
         if output_dir:
             Path(output_dir).mkdir(parents=True, exist_ok=True)
             # Create the required files
-            (Path(output_dir) / "train.dill").touch()
-            (Path(output_dir) / "inference.dill").touch()
+            (Path(output_dir) / "train").mkdir(exist_ok=True)
+            (Path(output_dir) / "inference").mkdir(exist_ok=True)
     monkeypatch.setattr("deployment.app.services.datasphere_service._prepare_job_datasets", mock_prepare_job_datasets)
 
     # Mock _verify_datasphere_job_inputs to skip file verification
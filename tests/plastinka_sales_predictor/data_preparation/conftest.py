@@ -0,0 +1,96 @@
+"""
+Fixtures for the raw upload processing tests.
+
+`write_raw_uploads` writes a stock export and monthly sales exports with the
+same column names as the shop's CSV uploads, so that the full
+`process_data` pipeline can be run on small synthetic data.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+STYLES = ["Rock", "Jazz", "Pop", "Blues", None]
+COVERS = ["SS", "VG", "NM", None]
+RELEASE_TYPES = ["Оригинал", "Переиздание"]
+
+
+def _make_catalogue(rng, n_items):
+    catalogue = []
+    for i in range(n_items):
+        recording_year = int(rng.integers(1955, 2020))
+        release_type = RELEASE_TYPES[int(rng.integers(0, 2))]
+        release_year = (
+            recording_year
+            if release_type == "Оригинал"
+            else min(recording_year + int(rng.integers(1, 30)), 2023)
+        )
+        catalogue.append(
+            {
+                "Штрихкод": f"0{4600000000000 + i}",
+                "Исполнитель": f"Artist {i % (n_items // 3 + 1)}",
+                "Альбом": f"Album {i // 2}",
+                "Конверт": COVERS[int(rng.integers(0, len(COVERS)))],
+                "Цена, руб.": str(int(rng.choice([500, 1500, 3000, 4500, 6500, 9000]))),
+                "Тип": release_type,
+                "Год записи": str(recording_year),
+                "Год выпуска": str(release_year),
+                "Стиль": STYLES[int(rng.integers(0, len(STYLES)))],
+            }
+        )
+    return catalogue
+
+
+def write_raw_uploads(root, n_items=60, n_months=4, seed=0):
+    """
+    Writes `stock.csv` and `sales/<YYYY-MM>.csv` under `root`.
+
+    Stock rows are single copies currently on hand, created during the sales
+    period; sales rows are single copies sold within their file's month.
+    """
+    rng = np.random.default_rng(seed)
+    catalogue = _make_catalogue(rng, n_items)
+    first_month = pd.Timestamp("2024-01-01")
+
+    period_days = (first_month + pd.DateOffset(months=n_months) - first_month).days
+    stock_rows = []
+    for item in catalogue:
+        for _ in range(int(rng.integers(1, 6))):
+            created = first_month + pd.Timedelta(days=int(rng.integers(0, period_days)))
+            stock_rows.append(
+                {**item, "Дата создания": created.strftime("%d.%m.%Y")}
+            )
+
+    sales_dir = root / "sales"
+    sales_dir.mkdir(parents=True, exist_ok=True)
+    for month_offset in range(n_months):
+        month_start = first_month + pd.DateOffset(months=month_offset)
+        days_in_month = month_start.days_in_month
+        sales_rows = []
+        for item_idx in rng.choice(n_items, size=n_items // 2, replace=False):
+            item = catalogue[item_idx]
+            for _ in range(int(rng.integers(1, 4))):
+                sold = month_start + pd.Timedelta(
+                    days=int(rng.integers(0, days_in_month))
+                )
+                created = sold - pd.Timedelta(days=int(rng.integers(0, 200)))
+                sales_rows.append(
+                    {
+                        **item,
+                        "Дата создания": created.strftime("%d.%m.%Y"),
+                        "Дата заказа": sold.strftime("%d.%m.%Y"),
+                    }
+                )
+        pd.DataFrame(sales_rows).to_csv(
+            sales_dir / f"{month_start:%Y-%m}.csv", index=False
+        )
+
+    stock_path = root / "stock.csv"
+    pd.DataFrame(stock_rows).to_csv(stock_path, index=False)
+    return stock_path, sales_dir
+
+
+@pytest.fixture
+def raw_uploads(tmp_path):
+    """Paths of a synthetic stock export and sales export directory."""
+    return write_raw_uploads(tmp_path)
@@ -0,0 +1,81 @@
+"""
+Tests for the vectorized movement aggregation.
+
+`_get_grouped_df` must match the per-group `process_movements` computation
+it replaces, including group order, column order and dtypes.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plastinka_sales_predictor.data_preparation import (
+    GROUP_KEYS,
+    _get_grouped_df,
+    process_movements,
+    read_processed_file,
+)
+
+ALL_KEYS = ["created_date", "sold_date", *GROUP_KEYS]
+
+
+def _reference_grouped_df(processed_df, group_keys):
+    group_keys = [k for k in group_keys if k in processed_df.columns]
+    return (
+        processed_df.groupby(group_keys, sort=False, observed=True)
+        .apply(process_movements)
+        .sort_index(axis=1, ascending=False)
+    )
+
+
+@pytest.fixture
+def movements():
+    rng = np.random.default_rng(7)
+    n_rows = 500
+    return pd.DataFrame(
+        {
+            "barcode": rng.choice(["a", "b", "c", "d"], n_rows),
+            "style": rng.choice(["Rock", "Jazz", None], n_rows),
+            "created_date": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 5, n_rows), unit="D"),
+            "sold_date": pd.Timestamp("2024-02-01")
+            + pd.to_timedelta(rng.integers(0, 5, n_rows), unit="D"),
+            "price": rng.choice([500, 1500, 3333], n_rows).astype("int64"),
+        }
+    )
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_matches_per_group_apply(movements):
+    keys = ["created_date", "sold_date", "barcode", "style"]
+
+    result = _get_grouped_df(movements, keys)
+
+    pd.testing.assert_frame_equal(
+        result, _reference_grouped_df(movements, keys), check_exact=True
+    )
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_missing_keys_are_ignored(movements):
+    keys = ["sold_date", "barcode", "artist"]
+
+    result = _get_grouped_df(movements, keys)
+
+    pd.testing.assert_frame_equal(
+        result, _reference_grouped_df(movements, keys), check_exact=True
+    )
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_matches_on_processed_uploads(raw_uploads):
+    stock_path, sales_dir = raw_uploads
+
+    for path in [stock_path, *sorted(sales_dir.glob("*.csv"))]:
+        processed_df = read_processed_file(path)
+
+        result = _get_grouped_df(processed_df, ALL_KEYS)
+
+        pd.testing.assert_frame_equal(
+            result, _reference_grouped_df(processed_df, ALL_KEYS), check_exact=True
+        )
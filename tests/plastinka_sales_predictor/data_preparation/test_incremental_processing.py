@@ -0,0 +1,134 @@
+"""
+Tests for the incremental monthly processing in `process_data`.
+
+With `cache_dir` set, per-month artifacts are reused across runs; the results
+must stay identical to a run without the cache.
+"""
+
+import pandas as pd
+import pytest
+
+from plastinka_sales_predictor import data_preparation
+from plastinka_sales_predictor.data_preparation import process_data
+
+BINS = pd.IntervalIndex.from_breaks(
+    [0.0, 689.999, 2490.0, 3990.0, 5590.0, 7390.0, 8590.0, 11990.0, float("inf")],
+    closed="right",
+)
+
+
+def _process(stock_path, sales_dir, cache_dir=None):
+    return process_data(str(stock_path), str(sales_dir), bins=BINS, cache_dir=cache_dir)
+
+
+def _assert_same_features(result, expected):
+    assert result.keys() == expected.keys()
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(result[name], df, check_exact=True)
+
+
+def _forbid_step(monkeypatch, step_name):
+    def _fail(**kwargs):
+        raise AssertionError(f"{step_name} should be reused from the cache")
+
+    steps = data_preparation.UNIFIED_PIPELINE_CONFIG["steps"]
+    monkeypatch.setitem(steps, step_name, {**steps[step_name], "func": _fail})
+
+
+def _record_step(monkeypatch, step_name):
+    calls = []
+    steps = data_preparation.UNIFIED_PIPELINE_CONFIG["steps"]
+    func = steps[step_name]["func"]
+
+    def _record(**kwargs):
+        calls.append(kwargs)
+        return func(**kwargs)
+
+    monkeypatch.setitem(steps, step_name, {**steps[step_name], "func": _record})
+    return calls
+
+
+def _drop_half_rows(path):
+    df = pd.read_csv(path, dtype=str)
+    df.iloc[: len(df) // 2].to_csv(path, index=False)
+
+
+def test_warm_run_reuses_all_months(raw_uploads, tmp_path, monkeypatch):
+    stock_path, sales_dir = raw_uploads
+    cache_dir = tmp_path / "cache"
+    expected = _process(stock_path, sales_dir)
+
+    cold = _process(stock_path, sales_dir, cache_dir)
+    n_entries = len(list(cache_dir.glob("month_*.pkl")))
+    _forbid_step(monkeypatch, "_calculate_cumulative_stock")
+    warm = _process(stock_path, sales_dir, cache_dir)
+
+    _assert_same_features(cold, expected)
+    _assert_same_features(warm, expected)
+    assert n_entries == 2 * len(list(sales_dir.glob("*.csv")))
+    assert len(list(cache_dir.glob("month_*.pkl"))) == n_entries
+
+
+@pytest.mark.parametrize("changed", ["earliest", "latest"])
+def test_changed_month_is_recomputed(raw_uploads, tmp_path, changed):
+    stock_path, sales_dir = raw_uploads
+    cache_dir = tmp_path / "cache"
+    _process(stock_path, sales_dir, cache_dir)
+
+    files = sorted(sales_dir.glob("*.csv"))
+    _drop_half_rows(files[0] if changed == "earliest" else files[-1])
+    expected = _process(stock_path, sales_dir)
+    result = _process(stock_path, sales_dir, cache_dir)
+
+    _assert_same_features(result, expected)
+
+
+def test_month_local_steps_reused_when_stock_changes(
+    raw_uploads, tmp_path, monkeypatch
+):
+    stock_path, sales_dir = raw_uploads
+    cache_dir = tmp_path / "cache"
+    _process(stock_path, sales_dir, cache_dir)
+
+    _drop_half_rows(stock_path)
+    expected = _process(stock_path, sales_dir)
+    _forbid_step(monkeypatch, "_get_grouped_df")
+    result = _process(stock_path, sales_dir, cache_dir)
+
+    _assert_same_features(result, expected)
+
+
+def test_next_upload_only_groups_the_new_month(raw_uploads, tmp_path, monkeypatch):
+    stock_path, sales_dir = raw_uploads
+    cache_dir = tmp_path / "cache"
+    held_back = tmp_path / "held_back"
+    held_back.mkdir()
+    oldest, *_, newest = sorted(sales_dir.glob("*.csv"))
+    newest.rename(held_back / newest.name)
+    _process(stock_path, sales_dir, cache_dir)
+
+    # The next upload shifts the window by a month and has a new stock snapshot
+    oldest.unlink()
+    (held_back / newest.name).rename(newest)
+    _drop_half_rows(stock_path)
+    expected = _process(stock_path, sales_dir)
+    grouped = _record_step(monkeypatch, "_get_grouped_df")
+    processed = _record_step(monkeypatch, "_process_grouped_df")
+    result = _process(stock_path, sales_dir, cache_dir)
+
+    _assert_same_features(result, expected)
+    assert len(grouped) == len(processed) == 1
+    sold_months = grouped[0]["processed_df"]["sold_date"].dt.to_period("M").unique()
+    assert list(sold_months.astype(str)) == [newest.stem]
+
+
+def test_unreadable_month_entry_is_recomputed(raw_uploads, tmp_path):
+    stock_path, sales_dir = raw_uploads
+    cache_dir = tmp_path / "cache"
+    expected = _process(stock_path, sales_dir, cache_dir)
+    for entry in cache_dir.glob("month_*.pkl"):
+        entry.write_bytes(b"not a pickle")
+
+    result = _process(stock_path, sales_dir, cache_dir)
+
+    _assert_same_features(result, expected)
@@ -0,0 +1,111 @@
+"""
+Tests for the mode-based imputation of cover types and styles.
+
+`validate_categories` and `validate_styles` compute group modes with
+set-based operations; the tests compare them with the per-group pandas
+computations they replace.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plastinka_sales_predictor.data_preparation import (
+    validate_categories,
+    validate_styles,
+)
+
+
+def _reference_validate_categories(df):
+    validated = df.copy()
+
+    def _mode_or_first(series):
+        non_null = series.dropna()
+        if non_null.empty:
+            return np.nan
+        mode_vals = non_null.mode()
+        if not mode_vals.empty:
+            return mode_vals.iloc[0]
+        return non_null.iloc[0]
+
+    for grouping_cols in [
+        ["artist", "album", "release_decade"],
+        ["price_category", "release_decade"],
+    ]:
+        fill_vals = (
+            validated.groupby(grouping_cols, observed=True)["cover_type"]
+            .transform(_mode_or_first)
+        )
+        validated["cover_type"] = validated["cover_type"].fillna(fill_vals)
+
+    validated["cover_type"] = validated["cover_type"].map(
+        lambda x: "Sealed" if x == "SS" else "Opened"
+    )
+    return validated
+
+
+def _reference_validate_styles(df):
+    validated = df.fillna({"style": "None"})
+    for (artist, album), group in validated.groupby(["artist", "album"]):
+        if len(group) > 1:
+            validated.loc[
+                (validated["artist"] == artist) & (validated["album"] == album),
+                "style",
+            ] = group["style"].mode().values[0]
+    return validated
+
+
+@pytest.fixture(params=[0, 1, 2])
+def catalogue(request):
+    rng = np.random.default_rng(request.param)
+    n_rows = 400
+    prices = rng.choice([300, 1500, 3000, 6000], n_rows)
+    df = pd.DataFrame(
+        {
+            "artist": rng.choice([f"Artist {i}" for i in range(12)], n_rows),
+            "album": rng.choice([f"Album {i}" for i in range(6)], n_rows),
+            "cover_type": rng.choice(["SS", "VG", "NM", None, None], n_rows),
+            "style": rng.choice(["Rock", "Jazz", "Pop", None], n_rows),
+            "price": prices,
+            "price_category": pd.cut(prices, bins=[0, 1000, 4000, np.inf]),
+            "release_decade": pd.cut(
+                rng.integers(1960, 2020, n_rows),
+                bins=[-np.inf, 1970, 1990, np.inf],
+                labels=["<1970", "1970s-80s", ">1990"],
+            ),
+        },
+        index=rng.permutation(n_rows) * 3,
+    )
+    # Single-row groups, missing keys and groups without any known value
+    df.loc[df.index[:5], "artist"] = [f"Solo {i}" for i in range(5)]
+    df.loc[df.index[5:8], "artist"] = None
+    df.loc[df["artist"] == "Artist 0", "cover_type"] = None
+    return df
+
+
+def test_validate_categories_matches_per_group_computation(catalogue):
+    result = validate_categories(catalogue)
+
+    pd.testing.assert_frame_equal(
+        result, _reference_validate_categories(catalogue), check_exact=True
+    )
+
+
+def test_validate_styles_matches_per_group_computation(catalogue):
+    result = validate_styles(catalogue)
+
+    pd.testing.assert_frame_equal(
+        result, _reference_validate_styles(catalogue), check_exact=True
+    )
+
+
+def test_mode_ties_go_to_smallest_value():
+    df = pd.DataFrame(
+        {
+            "artist": ["A"] * 4,
+            "album": ["X"] * 4,
+            "style": ["Rock", "Jazz", "Jazz", "Rock"],
+        }
+    )
+
+    assert validate_styles(df)["style"].tolist() == ["Jazz"] * 4
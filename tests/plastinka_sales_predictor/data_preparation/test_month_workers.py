@@ -0,0 +1,77 @@
+"""
+Tests for running the month-local pipeline steps in worker processes.
+"""
+
+import pandas as pd
+
+from plastinka_sales_predictor import data_preparation
+from plastinka_sales_predictor.data_preparation import (
+    UNIFIED_PIPELINE_CONFIG,
+    process_data,
+)
+
+BINS = pd.IntervalIndex.from_breaks(
+    [0.0, 689.999, 2490.0, 3990.0, 5590.0, 7390.0, 8590.0, 11990.0, float("inf")],
+    closed="right",
+)
+LOCAL_STEPS = UNIFIED_PIPELINE_CONFIG["month_cache"]["local"]["steps"]
+
+
+def _assert_same_features(result, expected):
+    assert result.keys() == expected.keys()
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(result[name], df, check_exact=True)
+
+
+def test_local_steps_run_in_workers(raw_uploads, monkeypatch):
+    stock_path, sales_dir = raw_uploads
+    n_months = len(list(sales_dir.glob("*.csv")))
+    expected = process_data(str(stock_path), str(sales_dir), bins=BINS)
+    # Only steps run by this process are seen, workers use their own module
+    in_process = []
+    run_step = data_preparation._run_pipeline_step
+    monkeypatch.setattr(
+        data_preparation,
+        "_run_pipeline_step",
+        lambda *args, **kwargs: in_process.append(args[3]) or run_step(*args, **kwargs),
+    )
+
+    result = process_data(
+        str(stock_path), str(sales_dir), bins=BINS, max_workers=2, profile=True
+    )
+    profile = result.pop("pipeline_profile")
+
+    _assert_same_features(result, expected)
+    assert not set(in_process) & set(LOCAL_STEPS)
+    month_steps = profile[profile["stage"] == "steps"]
+    assert month_steps.groupby("step").size().to_dict() == dict.fromkeys(
+        UNIFIED_PIPELINE_CONFIG["steps"], n_months
+    )
+
+
+def test_workers_only_get_uncached_months(raw_uploads, tmp_path, monkeypatch):
+    stock_path, sales_dir = raw_uploads
+    cache_dir = tmp_path / "cache"
+    pools = []
+    worker_context = data_preparation._worker_context
+    monkeypatch.setattr(
+        data_preparation,
+        "_worker_context",
+        lambda: pools.append(None) or worker_context(),
+    )
+
+    expected = process_data(str(stock_path), str(sales_dir), bins=BINS)
+    cold = process_data(
+        str(stock_path), str(sales_dir), bins=BINS, cache_dir=cache_dir, max_workers=2
+    )
+    n_entries = len(list(cache_dir.glob("month_*.pkl")))
+    cold_pools = len(pools)
+    warm = process_data(
+        str(stock_path), str(sales_dir), bins=BINS, cache_dir=cache_dir, max_workers=2
+    )
+
+    _assert_same_features(cold, expected)
+    _assert_same_features(warm, expected)
+    assert n_entries == 2 * len(list(sales_dir.glob("*.csv")))
+    # Parsing and grouping pools on the cold run, only parsing on the warm one
+    assert (cold_pools, len(pools) - cold_pools) == (2, 1)
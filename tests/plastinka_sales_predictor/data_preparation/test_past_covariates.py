@@ -0,0 +1,89 @@
+"""
+Tests for the grouped exponentially weighted past covariates.
+
+`get_past_covariates_dfs` aggregates all groups and features in one pass; the
+tests compare it with a straightforward per-group pandas computation.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plastinka_sales_predictor.data_preparation import (
+    get_past_covariates_df,
+    get_past_covariates_dfs,
+)
+
+
+@pytest.fixture
+def sales_and_stock():
+    rng = np.random.default_rng(42)
+    n_items, n_months = 30, 14
+    columns = pd.MultiIndex.from_arrays(
+        [
+            [str(i) for i in range(n_items)],
+            rng.choice(["Rock", "Jazz", "Pop"], n_items),
+            rng.choice(["Sealed", "Opened"], n_items),
+            rng.choice(["1970s", "1980s", "1990s"], n_items),
+        ],
+        names=["barcode", "style", "cover_type", "recording_decade"],
+    )
+    sales = pd.DataFrame(
+        rng.poisson(2.0, (n_months, n_items)).astype(np.float32),
+        index=pd.date_range("2023-01-01", periods=n_months, freq="MS"),
+        columns=columns,
+    )
+    stock = (rng.uniform(0, 1, (n_months, 2, n_items)) > 0.3).astype(np.float32)
+    return sales, stock
+
+
+def _reference_past_covariates(sales, stock, feature, span):
+    masked = sales.where(stock[:, 0, :].astype(bool))
+    group_keys = [feature, "recording_decade"]
+    aggregations = {}
+    for keys, group in masked.T.groupby(level=group_keys, sort=True):
+        ewm = group.mean(axis=0).ewm(span=span, adjust=False)
+        aggregations[(*keys, "exponentially_weighted_moving_average")] = ewm.mean()
+        aggregations[(*keys, "exponentially_weighted_moving_variance")] = ewm.var()
+    result = pd.DataFrame(aggregations).bfill(limit=3).fillna(0)
+    result.columns.names = [*group_keys, "aggregation"]
+    return result
+
+
+@pytest.mark.parametrize("feature", ["style", "cover_type"])
+@pytest.mark.parametrize("span", [1, 3, 6])
+def test_matches_per_group_computation(sales_and_stock, feature, span):
+    sales, stock = sales_and_stock
+
+    result = get_past_covariates_df(sales, stock, (feature,), span)
+    expected = _reference_past_covariates(sales, stock, feature, span)
+
+    assert set(result.columns) == set(expected.columns)
+    assert result.columns.names == expected.columns.names
+    np.testing.assert_array_equal(
+        result.loc[:, expected.columns].values, expected.values
+    )
+
+
+def test_all_features_in_one_pass(sales_and_stock):
+    sales, stock = sales_and_stock
+
+    results = get_past_covariates_dfs(
+        sales, stock, [("style",), ("cover_type",)], span=3
+    )
+
+    for feature, result in zip(["style", "cover_type"], results, strict=True):
+        pd.testing.assert_frame_equal(
+            result, get_past_covariates_df(sales, stock, (feature,), 3)
+        )
+
+
+def test_group_without_available_sales_is_zero(sales_and_stock):
+    sales, stock = sales_and_stock
+    stock = stock.copy()
+    jazz = sales.columns.get_level_values("style") == "Jazz"
+    stock[:, 0, jazz] = 0
+
+    result = get_past_covariates_df(sales, stock, ("style",), 3)
+
+    assert (result.loc[:, pd.IndexSlice["Jazz", :, :]].values == 0).all()
@@ -0,0 +1,58 @@
+"""
+Tests for the per-step profile of the processing pipeline.
+"""
+
+import pandas as pd
+
+from plastinka_sales_predictor.data_preparation import (
+    UNIFIED_PIPELINE_CONFIG,
+    process_data,
+)
+
+BINS = pd.IntervalIndex.from_breaks(
+    [0.0, 689.999, 2490.0, 3990.0, 5590.0, 7390.0, 8590.0, 11990.0, float("inf")],
+    closed="right",
+)
+
+
+def test_profile_has_a_row_per_step_and_month(raw_uploads):
+    stock_path, sales_dir = raw_uploads
+    n_months = len(list(sales_dir.glob("*.csv")))
+
+    result = process_data(str(stock_path), str(sales_dir), bins=BINS, profile=True)
+    profile = result["pipeline_profile"]
+
+    assert list(profile.columns) == [
+        "stage", "step", "month", "wall_time_s", "cpu_time_s",
+        "peak_rss_delta_bytes", "output_bytes",
+    ]
+    month_steps = profile[profile["stage"] == "steps"]
+    assert len(month_steps) == n_months * len(UNIFIED_PIPELINE_CONFIG["steps"])
+    assert month_steps.groupby("month").size().eq(
+        len(UNIFIED_PIPELINE_CONFIG["steps"])
+    ).all()
+    assert list(profile.loc[profile["stage"] == "init_steps", "step"]) == list(
+        UNIFIED_PIPELINE_CONFIG["init_steps"]
+    )
+    assert profile.loc[profile["stage"] != "steps", "month"].isna().all()
+    assert (profile["wall_time_s"] >= 0).all()
+    assert (profile["peak_rss_delta_bytes"] >= 0).all()
+    grouped_sizes = month_steps.loc[month_steps["step"] == "_get_grouped_df", "output_bytes"]
+    assert (grouped_sizes > 0).all()
+
+
+def test_profile_is_persisted_and_features_unchanged(raw_uploads, tmp_path):
+    stock_path, sales_dir = raw_uploads
+    profile_path = tmp_path / "profiles" / "profile.csv"
+
+    expected = process_data(str(stock_path), str(sales_dir), bins=BINS)
+    result = process_data(
+        str(stock_path), str(sales_dir), bins=BINS, profile_path=profile_path
+    )
+
+    assert "pipeline_profile" not in expected
+    persisted = pd.read_csv(profile_path)
+    assert len(persisted) == len(result.pop("pipeline_profile"))
+    assert result.keys() == expected.keys()
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(result[name], df)
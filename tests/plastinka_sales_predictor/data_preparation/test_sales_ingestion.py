@@ -0,0 +1,273 @@
+"""
+Tests for reading and ordering the monthly sales files.
+"""
+
+import io
+import logging
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from plastinka_sales_predictor import data_preparation
+from plastinka_sales_predictor.data_preparation import (
+    ROW_COUNT_COLUMN,
+    _clean_raw_rows,
+    _csv_rows_per_chunk,
+    _is_excel_file,
+    _get_sales_files_paths,
+    _preprocess_sort_sales,
+    process_data,
+    read_data_file,
+    read_processed_file,
+)
+
+BINS = pd.IntervalIndex.from_breaks(
+    [0.0, 689.999, 2490.0, 3990.0, 5590.0, 7390.0, 8590.0, 11990.0, float("inf")],
+    closed="right",
+)
+
+
+@pytest.mark.parametrize("max_workers", [2, None])
+def test_process_pool_matches_sequential(raw_uploads, max_workers):
+    _, sales_dir = raw_uploads
+    paths = _get_sales_files_paths(sales_dir)
+
+    expected = _preprocess_sort_sales(paths, BINS, max_workers=1)
+    result = _preprocess_sort_sales(paths, BINS, max_workers=max_workers)
+
+    assert list(result.keys()) == list(expected.keys())
+    assert list(result.keys()) == sorted(result.keys(), reverse=True)
+    for month, df in expected.items():
+        pd.testing.assert_frame_equal(result[month], df)
+
+
+def test_process_data_with_workers_matches_sequential(raw_uploads):
+    stock_path, sales_dir = raw_uploads
+
+    expected = process_data(str(stock_path), str(sales_dir), bins=BINS, max_workers=1)
+    result = process_data(str(stock_path), str(sales_dir), bins=BINS, max_workers=2)
+
+    assert result.keys() == expected.keys()
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(result[name], df, check_exact=True)
+
+
+def test_later_file_wins_for_same_month(raw_uploads, tmp_path):
+    _, sales_dir = raw_uploads
+    paths = sorted(_get_sales_files_paths(sales_dir))
+    first = pd.read_csv(paths[0], dtype=str)
+    duplicate = tmp_path / "duplicate.csv"
+    first.iloc[: len(first) // 2].to_csv(duplicate, index=False)
+
+    result = _preprocess_sort_sales([*paths, duplicate, paths[0]], BINS, max_workers=2)
+
+    assert len(result) == len(paths)
+    month = min(result.keys())
+    expected = _preprocess_sort_sales([paths[0]], BINS)[month]
+    pd.testing.assert_frame_equal(result[month], expected)
+
+
+class TestProcessedFileCache:
+    """read_processed_file caches process_raw output by file content."""
+
+    def test_cache_hit_skips_processing(self, raw_uploads, tmp_path, monkeypatch):
+        stock_path, _ = raw_uploads
+        cache_dir = tmp_path / "cache"
+
+        expected = read_processed_file(stock_path, bins=BINS, cache_dir=cache_dir)
+        assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("process_raw should not run on a cache hit")
+
+        monkeypatch.setattr(data_preparation, "process_raw", _fail)
+        cached = read_processed_file(stock_path, bins=BINS, cache_dir=cache_dir)
+
+        pd.testing.assert_frame_equal(cached, expected, check_exact=True)
+
+    def test_key_depends_on_content_and_bins(self, raw_uploads, tmp_path):
+        stock_path, sales_dir = raw_uploads
+        cache_dir = tmp_path / "cache"
+        renamed = tmp_path / "renamed.csv"
+        renamed.write_bytes(stock_path.read_bytes())
+
+        read_processed_file(stock_path, bins=BINS, cache_dir=cache_dir)
+        read_processed_file(renamed, bins=BINS, cache_dir=cache_dir)
+        assert len(list(cache_dir.glob("*.parquet"))) == 1
+
+        read_processed_file(stock_path, bins=None, cache_dir=cache_dir)
+        read_processed_file(next(sales_dir.glob("*.csv")), bins=BINS, cache_dir=cache_dir)
+        assert len(list(cache_dir.glob("*.parquet"))) == 3
+
+    def test_unreadable_entry_is_replaced(self, raw_uploads, tmp_path):
+        stock_path, _ = raw_uploads
+        cache_dir = tmp_path / "cache"
+        expected = read_processed_file(stock_path, bins=BINS, cache_dir=cache_dir)
+        (entry,) = cache_dir.glob("*.parquet")
+        entry.write_bytes(b"not a parquet file")
+
+        result = read_processed_file(stock_path, bins=BINS, cache_dir=cache_dir)
+
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+        pd.testing.assert_frame_equal(pd.read_parquet(entry), expected)
+
+    def test_sales_ingestion_with_cache(self, raw_uploads, tmp_path):
+        _, sales_dir = raw_uploads
+        paths = _get_sales_files_paths(sales_dir)
+        cache_dir = tmp_path / "cache"
+
+        expected = _preprocess_sort_sales(paths, BINS)
+        _preprocess_sort_sales(paths, BINS, cache_dir=cache_dir)
+        result = _preprocess_sort_sales(paths, BINS, max_workers=2, cache_dir=cache_dir)
+
+        assert list(result.keys()) == list(expected.keys())
+        for month, df in expected.items():
+            pd.testing.assert_frame_equal(result[month], df, check_exact=True)
+
+
+class TestChunkedCsvRead:
+    """read_data_file streams CSV files in chunks, keeping distinct clean rows."""
+
+    @pytest.fixture
+    def wide_csv(self, raw_uploads, tmp_path):
+        stock_path, _ = raw_uploads
+        df = pd.read_csv(stock_path, dtype=str)
+        df = pd.concat([df, df.iloc[::3]])
+        df.loc[df.index[::7], "Стиль"] = None
+        df.loc[df.index[:40], "Конверт"] = None
+        df["Комментарий"] = "unmapped " + df["Альбом"]
+        path = tmp_path / "wide.csv"
+        df.to_csv(path, index=False, encoding="cp1251")
+        return path
+
+    @staticmethod
+    def _rows(df):
+        """Rows of `df` repeated by their counts, in a fixed order."""
+        if ROW_COUNT_COLUMN in df.columns:
+            df = df.loc[df.index.repeat(df[ROW_COUNT_COLUMN])]
+            df = df.drop(columns=ROW_COUNT_COLUMN)
+        return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+    def test_counts_match_clean_rows(self, wide_csv):
+        assert _csv_rows_per_chunk(wide_csv, "cp1251", 0.01) < 20
+
+        expected = _clean_raw_rows(read_data_file(path=wide_csv))
+        result = read_data_file(path=wide_csv, csv_memory_limit_mb=0.01)
+
+        assert len(result) < len(expected)
+        assert result[ROW_COUNT_COLUMN].sum() == len(expected)
+        pd.testing.assert_frame_equal(
+            self._rows(result), self._rows(expected), check_dtype=False
+        )
+        assert "Комментарий" not in result.columns
+
+    def test_canonical_headers_are_kept(self, wide_csv, tmp_path):
+        df = pd.read_csv(wide_csv, dtype=str, encoding="cp1251")
+        df = df.rename(columns={"Исполнитель": "artist", "Цена, руб.": "price"})
+        path = tmp_path / "canonical.csv"
+        df.to_csv(path, index=False)
+
+        expected = _clean_raw_rows(read_data_file(path=path))
+        result = read_data_file(path=path, csv_memory_limit_mb=0.01)
+
+        pd.testing.assert_frame_equal(
+            self._rows(result), self._rows(expected), check_dtype=False
+        )
+        assert {"artist", "price"} <= set(result.columns)
+
+    def test_header_only_file(self, tmp_path):
+        path = tmp_path / "empty.csv"
+        path.write_text(
+            'Штрихкод,Исполнитель,Альбом,"Цена, руб.",Дата создания\n', encoding="utf-8"
+        )
+
+        expected = read_data_file(path=path)
+        result = read_data_file(path=path, csv_memory_limit_mb=0.01)
+
+        assert result.empty
+        assert list(result.columns) == [*expected.columns, ROW_COUNT_COLUMN]
+
+    def test_memory_follows_distinct_rows(self, raw_uploads, tmp_path):
+        stock_path, _ = raw_uploads
+        df = pd.read_csv(stock_path, dtype=str)
+        peaks = []
+        for copies in (16, 64):
+            path = tmp_path / f"stock_x{copies}.csv"
+            pd.concat([df] * copies).to_csv(path, index=False)
+            tracemalloc.start()
+            try:
+                processed = read_processed_file(path, bins=BINS, csv_memory_limit_mb=0.2)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+            assert processed[ROW_COUNT_COLUMN].sum() == copies * len(df)
+
+        assert peaks[1] < 1.25 * peaks[0]
+
+    def test_process_data_is_unchanged(self, raw_uploads):
+        stock_path, sales_dir = raw_uploads
+
+        expected = process_data(str(stock_path), str(sales_dir), bins=BINS)
+        result = process_data(
+            str(stock_path), str(sales_dir), bins=BINS, csv_memory_limit_mb=0.01
+        )
+
+        assert result.keys() == expected.keys()
+        for name, df in expected.items():
+            pd.testing.assert_frame_equal(result[name], df, check_exact=True)
+
+
+class TestExcelReading:
+    """read_data_file sniffs the format and falls back between Excel engines."""
+
+    @pytest.fixture
+    def workbook(self, raw_uploads, tmp_path):
+        stock_path, _ = raw_uploads
+        path = tmp_path / "stock.xlsx"
+        pd.read_csv(stock_path, dtype=str).to_excel(path, index=False)
+        return stock_path, path
+
+    def test_format_is_sniffed_from_content(self, workbook):
+        csv_path, xlsx_path = workbook
+        expected = read_data_file(path=xlsx_path)
+
+        assert _is_excel_file(xlsx_path)
+        assert not _is_excel_file(csv_path)
+        from_file = read_data_file(file=io.BytesIO(xlsx_path.read_bytes()))
+        misnamed_csv = read_data_file(
+            file=io.BytesIO(csv_path.read_bytes()), path="upload.xlsx"
+        )
+
+        pd.testing.assert_frame_equal(from_file, expected)
+        pd.testing.assert_frame_equal(
+            misnamed_csv.fillna(""), expected.fillna(""), check_dtype=False
+        )
+
+    def test_default_engine_unless_requested(self, monkeypatch, caplog):
+        assert data_preparation._excel_engines() == [None]
+        assert data_preparation._excel_engines("openpyxl") == ["openpyxl", None]
+        monkeypatch.setitem(data_preparation.EXCEL_ENGINES, "missing", "no_such_module")
+
+        with caplog.at_level(logging.WARNING):
+            assert data_preparation._excel_engines("missing") == [None]
+        assert "no_such_module" in caplog.text
+
+    def test_failing_engine_falls_back_to_default(self, workbook, caplog):
+        _, xlsx_path = workbook
+        expected = read_data_file(path=xlsx_path)
+
+        with caplog.at_level(logging.WARNING):
+            result = read_data_file(path=xlsx_path, excel_engine="no_such_engine")
+
+        pd.testing.assert_frame_equal(result, expected)
+        assert "no_such_engine" in caplog.text
+
+    def test_calamine_matches_default_engine(self, workbook):
+        pytest.importorskip("python_calamine")
+        _, xlsx_path = workbook
+
+        pd.testing.assert_frame_equal(
+            read_data_file(path=xlsx_path, excel_engine="calamine"),
+            read_data_file(path=xlsx_path),
+        )
@@ -0,0 +1,469 @@
+"""
+Tests for PlastinkaBaseTSDataset sample extraction.
+
+The datasets precompute per-item arrays on the first sample access, so these tests
+check the precomputed samples against the per-item reference helpers
+(`get_past_covariates`, `get_future_covariates`) on a small synthetic catalogue.
+"""
+
+import json
+
+import dill
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from darts import TimeSeries
+from torch.utils.data import DataLoader
+
+from plastinka_sales_predictor import data_preparation
+from plastinka_sales_predictor.data_preparation import (
+    GlobalLogMinMaxScaler,
+    MultiColumnLabelBinarizer,
+    PlastinkaInferenceTSDataset,
+    PlastinkaTrainingTSDataset,
+)
+
+MULTIINDEX_NAMES = [
+    "barcode",
+    "artist",
+    "album",
+    "cover_type",
+    "price_category",
+    "release_type",
+    "recording_decade",
+    "release_decade",
+    "style",
+    "recording_year",
+]
+
+
+@pytest.fixture
+def synthetic_features():
+    """Monthly sales and stock features for a small random catalogue."""
+    rng = np.random.default_rng(0)
+    n_items, n_months = 12, 10
+    items = [
+        (
+            str(1000 + i),
+            f"artist_{i % 4}",
+            f"album_{i}",
+            rng.choice(["Sealed", "Opened"]),
+            rng.choice(["p1", "p2"]),
+            rng.choice(["Оригинал", "Переиздание"]),
+            rng.choice(["1970s", "1980s"]),
+            rng.choice(["1990s", "2000s"]),
+            rng.choice(["Rock", "Jazz"]),
+            str(rng.choice([2015, 2016])),
+        )
+        for i in range(n_items)
+    ]
+    time_index = pd.date_range("2023-01-01", periods=n_months, freq="MS")
+    sales = pd.DataFrame(
+        rng.poisson(1.0, (n_months, n_items)).astype(float),
+        index=time_index,
+        columns=pd.MultiIndex.from_tuples(items, names=MULTIINDEX_NAMES),
+    )
+    stock = pd.DataFrame(
+        rng.uniform(0, 1, (n_months, 2 * n_items)).round(1),
+        index=time_index,
+        columns=pd.MultiIndex.from_tuples(
+            [(f, *item) for f in ["availability", "confidence"] for item in items]
+        ),
+    )
+    return sales, stock
+
+
+def _make_dataset(cls, synthetic_features):
+    sales, stock = synthetic_features
+    return cls(
+        stock_features=stock,
+        monthly_sales=sales,
+        static_transformer=MultiColumnLabelBinarizer(),
+        static_features=["cover_type", "style"],
+        scaler=GlobalLogMinMaxScaler(),
+        input_chunk_length=4,
+        output_chunk_length=1,
+        past_covariates_span=3,
+        minimum_sales_months=1,
+    )
+
+
+class TestSampleArraysCache:
+    """Precomputed sample arrays must match the per-item computation."""
+
+    def test_training_samples_match_reference(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        assert len(ds) > 0
+
+        for idx in range(len(ds)):
+            array_index, start_index, end_index = ds._project_index(idx)
+            item_multiidx = ds._idx2multiidx[array_index]
+            end_index = end_index if end_index is not None else ds._n_time_steps
+
+            past_covariates = ds.get_past_covariates(item_multiidx)
+            future_covariates = ds.get_future_covariates(item_multiidx)
+            series = ds.scaler.transform(
+                ds.monthly_sales[start_index:end_index, array_index][:, None]
+            )
+            sample = ds[idx]
+
+            np.testing.assert_array_equal(sample[0], series[:-1])
+            np.testing.assert_array_equal(
+                sample[1], past_covariates[start_index:end_index - 1]
+            )
+            np.testing.assert_array_equal(
+                sample[2], future_covariates[start_index:end_index - 1]
+            )
+            np.testing.assert_array_equal(
+                sample[3], future_covariates[end_index - 1:end_index]
+            )
+            np.testing.assert_array_equal(sample[6], series[-1:])
+
+    def test_cache_follows_window_changes(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        windowed = ds.setup_dataset(
+            window=(2, 9), input_chunk_length=3, output_chunk_length=1, span=2
+        )
+
+        cache = windowed._get_sample_arrays_cache()
+        assert cache["past_covariates"].shape[:2] == (
+            windowed.monthly_sales.shape[1],
+            windowed.L,
+        )
+        item_multiidx = windowed._idx2multiidx[0]
+        np.testing.assert_array_equal(
+            cache["past_covariates"][0],
+            windowed.get_past_covariates(item_multiidx),
+        )
+        # The source dataset keeps its own cache for the full range
+        assert ds._get_sample_arrays_cache()["series"].shape[1] == ds.L
+
+    @pytest.mark.parametrize(
+        "cls", [PlastinkaTrainingTSDataset, PlastinkaInferenceTSDataset]
+    )
+    def test_cache_is_built_once_on_first_access(
+        self, synthetic_features, monkeypatch, cls
+    ):
+        builds = []
+        build = cls._build_sample_arrays_cache
+        monkeypatch.setattr(
+            cls,
+            "_build_sample_arrays_cache",
+            lambda ds: builds.append(ds) or build(ds),
+        )
+
+        ds = _make_dataset(cls, synthetic_features)
+
+        assert builds == []
+        ds[0]
+        ds[len(ds) - 1]
+        assert builds == [ds]
+        ds.setup_dataset(input_chunk_length=3, copy=False)
+        assert ds._sample_arrays_cached is None
+
+    def test_cache_is_rebuilt_after_unpickling(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        ds._get_sample_arrays_cache()
+
+        loaded = dill.loads(dill.dumps(ds))
+
+        assert loaded._sample_arrays_cached is None
+        for idx in range(len(ds)):
+            for expected, actual in zip(ds[idx], loaded[idx], strict=True):
+                np.testing.assert_array_equal(expected, actual)
+
+    @pytest.mark.parametrize(
+        "cls, field",
+        [(PlastinkaTrainingTSDataset, 4), (PlastinkaInferenceTSDataset, 5)],
+    )
+    def test_static_covariates_match_mapping(self, synthetic_features, cls, field):
+        ds = _make_dataset(cls, synthetic_features)
+
+        static_covariates = ds._get_sample_arrays_cache()["static_covariates"]
+
+        assert static_covariates.dtype == np.float32
+        assert static_covariates.shape == (
+            len(ds._idx2multiidx),
+            ds.static_covariates_mapping.shape[1],
+        )
+        for idx in range(len(ds)):
+            array_index, _, _ = ds._project_index(idx)
+            expected = ds.static_covariates_mapping.loc[
+                ds._idx2multiidx[array_index]
+            ].to_numpy()
+            np.testing.assert_array_equal(ds[idx][field], expected[None, :])
+
+    def test_inference_samples_match_reference(self, synthetic_features):
+        ds = _make_dataset(PlastinkaInferenceTSDataset, synthetic_features)
+
+        for idx in range(len(ds)):
+            array_index, start_index, _ = ds._project_index(idx)
+            item_multiidx = ds._idx2multiidx[array_index]
+            past_covariates = ds.get_past_covariates(item_multiidx)
+
+            sample = ds[idx]
+
+            np.testing.assert_array_equal(
+                sample[1], past_covariates[start_index:start_index + 4]
+            )
+            assert sample[7] == ds.time_index[-1]
+
+    def test_inference_schema_matches_timeseries_schema(self, synthetic_features):
+        ds = _make_dataset(PlastinkaInferenceTSDataset, synthetic_features)
+
+        for idx in range(len(ds)):
+            array_index, start_index, end_index = ds._project_index(idx)
+            item_multiidx = ds._idx2multiidx[array_index]
+            times = ds.time_index[start_index:end_index]
+            expected = TimeSeries.from_times_and_values(
+                times=times,
+                values=np.zeros((len(times), 1), dtype=np.float32),
+                static_covariates=ds.static_covariates_mapping.loc[item_multiidx],
+            ).schema()
+
+            schema = ds[idx][6]
+
+            assert schema.keys() == expected.keys()
+            assert schema["time_freq"] == expected["time_freq"]
+            assert schema["time_name"] == expected["time_name"]
+            pd.testing.assert_index_equal(schema["columns"], expected["columns"])
+            pd.testing.assert_frame_equal(
+                schema["static_covariates"], expected["static_covariates"]
+            )
+            assert schema["hierarchy"] is expected["hierarchy"] is None
+            assert schema["metadata"] is expected["metadata"] is None
+
+
+class TestCalendarCovariates:
+    """Calendar future covariates are computed once per window."""
+
+    def test_matches_calendar_features(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        view = ds.setup_dataset(window=(2, 9), input_chunk_length=3)
+
+        future_covariates = view.get_future_covariates(view._idx2multiidx[0])
+
+        months = view.time_index.month.to_numpy()
+        years = view.time_index.year.to_numpy()
+        expected = np.stack(
+            [
+                np.zeros(len(months)),
+                np.sin(2 * np.pi * months / 12),
+                np.cos(2 * np.pi * months / 12),
+                (years - years.min()) / max(years.max() - years.min(), 1),
+            ],
+            axis=1,
+        ).astype(np.float32)
+        np.testing.assert_allclose(future_covariates, expected, atol=1e-6)
+
+    def test_cache_is_shared_and_follows_window(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        first, second = ds._idx2multiidx[0], ds._idx2multiidx[1]
+
+        full_range = ds.get_future_covariates(first)
+        assert ds._get_calendar_covariates() is ds._get_calendar_covariates()
+
+        ds.setup_dataset(window=(3, 10), input_chunk_length=3, copy=False)
+        windowed = ds.get_future_covariates(second)
+
+        assert windowed.shape[0] == 7
+        np.testing.assert_array_equal(windowed[:, 1:3], full_range[3:, 1:3])
+        # Year scaling is relative to the window
+        assert windowed[:, 3].min() == 0.0
+
+
+class TestWindowView:
+    """setup_dataset(copy=True) shares raw data with the source dataset."""
+
+    def test_view_shares_arrays_and_transformers(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+
+        view = ds.setup_dataset(window=(2, 9), input_chunk_length=3)
+
+        assert view is not ds
+        assert np.shares_memory(view._monthly_sales, ds._monthly_sales)
+        assert np.shares_memory(view._stock_features, ds._stock_features)
+        assert view.scaler is ds.scaler
+        assert view.static_transformer is ds.static_transformer
+        assert view._idx2multiidx is ds._idx2multiidx
+
+    def test_source_is_unaffected_by_view_setup(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        expected_samples = [ds[idx] for idx in range(len(ds))]
+        expected_mapping = dict(ds._index_mapping)
+
+        view = ds.setup_dataset(
+            window=(2, 9), input_chunk_length=3, span=2, weights_alpha=0.5
+        )
+
+        assert (view.start, view.end, view.input_chunk_length) == (2, 9, 3)
+        assert (ds.start, ds.end, ds.input_chunk_length) == (0, 10, 4)
+        assert ds._index_mapping == expected_mapping
+        assert ds._past_covariates_span == 3
+        for idx, expected in enumerate(expected_samples):
+            for expected_arr, actual_arr in zip(expected, ds[idx], strict=True):
+                np.testing.assert_array_equal(expected_arr, actual_arr)
+
+    def test_view_matches_deep_copy(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        reference = dill.loads(dill.dumps(ds))
+        reference.setup_dataset(window=(1, 8), input_chunk_length=3, copy=False)
+
+        view = ds.setup_dataset(window=(1, 8), input_chunk_length=3)
+
+        assert view._index_mapping == reference._index_mapping
+        for idx in range(len(view)):
+            for expected, actual in zip(reference[idx], view[idx], strict=True):
+                np.testing.assert_array_equal(expected, actual)
+
+    def test_shared_arrays_are_read_only_in_view(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+
+        view = ds.setup_dataset(window=(2, 9), input_chunk_length=3)
+
+        with pytest.raises(ValueError, match="read-only"):
+            view._monthly_sales[0, 0] = 1.0
+        assert ds._monthly_sales.flags.writeable
+
+
+class TestBatchGather:
+    """__getitems__ batches must equal stacked __getitem__ samples."""
+
+    @pytest.mark.parametrize("window", [None, (2, 9)])
+    def test_batch_matches_stacked_samples(self, synthetic_features, window):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        ds = ds.setup_dataset(window=window, input_chunk_length=3)
+        indices = list(range(len(ds)))[::-1]
+
+        batch = ds.__getitems__(indices)
+
+        assert len(batch) == 7
+        for field, batch_arr in enumerate(batch):
+            expected = np.stack([ds[idx][field] for idx in indices])
+            assert batch_arr.dtype == expected.dtype
+            np.testing.assert_array_equal(batch_arr, expected)
+
+    def test_collate_matches_stacked_samples(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        indices = [3, 0, 5]
+        samples = [ds[i] for i in indices]
+
+        collated = PlastinkaTrainingTSDataset.collate_fn(ds.__getitems__(indices))
+        from_samples = PlastinkaTrainingTSDataset.collate_fn(samples)
+
+        for field, (actual, fallback) in enumerate(
+            zip(collated, from_samples, strict=True)
+        ):
+            expected = torch.from_numpy(np.stack([sample[field] for sample in samples]))
+            torch.testing.assert_close(actual, expected, rtol=0, atol=0)
+            torch.testing.assert_close(fallback, expected, rtol=0, atol=0)
+
+    def test_dataloader_uses_batch_api(self, synthetic_features):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        loader = DataLoader(
+            ds, batch_size=4, collate_fn=PlastinkaTrainingTSDataset.collate_fn
+        )
+
+        batches = list(loader)
+
+        assert sum(len(batch[0]) for batch in batches) == len(ds)
+        torch.testing.assert_close(
+            batches[0][6], torch.from_numpy(np.stack([ds[i][6] for i in range(4)]))
+        )
+
+
+class TestIndexMapping:
+    """The bulk index mapping must select the same samples as _sample_is_valid."""
+
+    @pytest.mark.parametrize("minimum_sales_months", [1, 3])
+    @pytest.mark.parametrize("window", [None, (0, 7), (3, 10)])
+    def test_mapping_matches_per_sample_validation(
+        self, synthetic_features, minimum_sales_months, window
+    ):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        ds.minimum_sales_months = minimum_sales_months
+        ds.setup_dataset(
+            window=window,
+            input_chunk_length=3,
+            output_chunk_length=1,
+            span=3,
+            copy=False,
+        )
+
+        ds._index_mapping = {}
+        expected = [
+            i
+            for i in range(ds.monthly_sales.shape[1] * ds.outputs_per_array)
+            if ds._sample_is_valid(i)
+        ]
+        ds._build_index_mapping()
+
+        assert list(ds._index_mapping.values()) == expected
+        assert list(ds._index_mapping.keys()) == list(range(len(expected)))
+
+
+class TestSaveLoad:
+    """Saved dataset directories must load back into equivalent datasets."""
+
+    @pytest.mark.parametrize(
+        "cls", [PlastinkaTrainingTSDataset, PlastinkaInferenceTSDataset]
+    )
+    def test_round_trip(self, synthetic_features, tmp_path, cls):
+        ds = _make_dataset(cls, synthetic_features)
+
+        dataset_dir = ds.save(tmp_path, "dataset")
+        loaded = cls.load(dataset_dir)
+
+        assert dataset_dir.is_dir()
+        assert isinstance(loaded.monthly_sales, np.memmap)
+        assert len(loaded) == len(ds)
+        assert loaded._idx2multiidx == ds._idx2multiidx
+        pd.testing.assert_index_equal(loaded.time_index, ds.time_index)
+        for idx in range(len(ds)):
+            for expected, actual in zip(ds[idx], loaded[idx], strict=True):
+                if isinstance(expected, np.ndarray):
+                    np.testing.assert_array_equal(expected, actual)
+
+    def test_past_covariates_are_loaded_not_recomputed(
+        self, synthetic_features, tmp_path, monkeypatch
+    ):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        ds.setup_dataset(window=(2, 9), input_chunk_length=3, span=2, copy=False)
+        dataset_dir = ds.save(tmp_path, "train")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("past covariates were recomputed")
+
+        monkeypatch.setattr(data_preparation, "get_past_covariates_dfs", fail)
+        loaded = PlastinkaTrainingTSDataset.load(dataset_dir)
+
+        assert loaded._past_covariates_cached.keys() == ds._past_covariates_cached.keys()
+        for feat_name, expected in ds._past_covariates_cached.items():
+            actual = loaded._past_covariates_cached[feat_name]
+            pd.testing.assert_frame_equal(actual, expected)
+        # The first sample is built from the loaded arrays
+        for expected, actual in zip(ds[0], loaded[0], strict=True):
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_windowed_dataset_round_trip(self, synthetic_features, tmp_path):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        ds.setup_dataset(window=(2, 9), input_chunk_length=3, copy=False)
+
+        loaded = PlastinkaTrainingTSDataset.load(ds.save(tmp_path, "train"))
+
+        assert (loaded.start, loaded.end) == (ds.start, ds.end)
+        assert loaded._index_mapping == ds._index_mapping
+        for expected, actual in zip(ds[0], loaded[0], strict=True):
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_rejects_unknown_format_version(self, synthetic_features, tmp_path):
+        ds = _make_dataset(PlastinkaTrainingTSDataset, synthetic_features)
+        dataset_dir = ds.save(tmp_path, "train")
+        metadata_path = dataset_dir / "metadata.json"
+        metadata = json.loads(metadata_path.read_text())
+        metadata["format_version"] += 1
+        metadata_path.write_text(json.dumps(metadata))
+
+        with pytest.raises(ValueError, match="format version"):
+            PlastinkaTrainingTSDataset.load(dataset_dir)
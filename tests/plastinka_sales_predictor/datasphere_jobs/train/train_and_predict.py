@@ -21,8 +21,8 @@
         mock_inference_dataset = MagicMock()
         
         # Configure the class methods to return different datasets
-        mock_training_dataset_class.from_dill.return_value = mock_train_dataset
-        mock_inference_dataset_class.from_dill.return_value = mock_inference_dataset
+        mock_training_dataset_class.load.return_value = mock_train_dataset
+        mock_inference_dataset_class.load.return_value = mock_inference_dataset
 
         # Act
         train_ds, inference_ds = train_and_predict.load_datasets(input_dir)
@@ -35,8 +35,8 @@
         assert mock_validate_file.call_count == 2
 
         # Verify dataset loading calls
-        expected_train_path = os.path.join(input_dir, "train.dill")
-        expected_inference_path = os.path.join(input_dir, "inference.dill")
+        expected_train_path = os.path.join(input_dir, "train")
+        expected_inference_path = os.path.join(input_dir, "inference")
         
-        mock_training_dataset_class.from_dill.assert_called_once_with(expected_train_path)
-        mock_inference_dataset_class.from_dill.assert_called_once_with(expected_inference_path)
+        mock_training_dataset_class.load.assert_called_once_with(expected_train_path)
+        mock_inference_dataset_class.load.assert_called_once_with(expected_inference_path)